@@ -0,0 +1,116 @@
+"""
+This is a file that contains rules for ending games that would otherwise
+never finish, for example when two bots keep moving their kings back and
+forth.
+
+An Adjudicator is told about every move of a game and ends it:
+- with a draw, when the same position (with the same player to move)
+  appears for the third time
+- with a draw, when no piece has been captured and no man has moved for a
+  given number of plies
+- optionally, after a given number of plies, in favour of the player that
+  has more material, or with a draw if the material is close
+
+Positions are compared by their Zobrist hash (see zobrist.py). Captures and
+moves of men can never be taken back, so the positions seen before them
+can never appear again and are forgotten.
+"""
+
+from zobrist import hash_game
+
+REPETITION = "repetition"
+NO_PROGRESS = "no progress"
+MATERIAL = "material"
+
+
+class Adjudicator:
+    """
+    This class decides when a game should be ended without a winner by the
+    usual rules.
+
+    Public Attributes:
+        - repetitions (int) - how many times a position has to appear for the
+                              game to be drawn, None to never draw by repetition
+        - no_progress_limit (int) - number of plies without captures and moves
+                              of men after which the game is drawn, or None
+        - adjudicate_after (int) - number of plies after which the game is
+                              decided by material, or None
+        - material_margin (float) - how much more material (in men) a player
+                              needs to be declared the winner by material
+        - king_value (float) - how many men a king is worth
+        - ply (int) - number of plies played since start
+        - plies_without_progress (int) - plies since the last capture or move
+                              of a man
+    """
+
+    def __init__(self, repetitions=3, no_progress_limit=100, adjudicate_after=None,
+                 material_margin=2, king_value=1.5):
+        self.repetitions = repetitions
+        self.no_progress_limit = no_progress_limit
+        self.adjudicate_after = adjudicate_after
+        self.material_margin = material_margin
+        self.king_value = king_value
+        self.ply = 0
+        self.plies_without_progress = 0
+        self._seen = {}
+
+    def start(self, game, player):
+        """
+        Starts following a game.
+
+        Input:
+            game (Game) - the game to follow
+            player (Player) - the player who moves first
+        """
+        self.ply = 0
+        self.plies_without_progress = 0
+        self._seen = {hash_game(game, player): 1}
+
+    def record_move(self, game, was_king, captured, next_player):
+        """
+        Is called after every move of the game.
+
+        Input:
+            game (Game) - the game, after the move was made
+            was_king (bool) - whether the moved piece was a king before the move
+            captured (list[GamePiece]) - pieces captured by the move (see
+                                         MoveDelta in game.py)
+            next_player (Player) - the player who moves next
+        Output:
+            tuple(Player, str) - the winner (None for a draw) and the reason
+                                 the game is ended, or None if it goes on
+        """
+        self.ply += 1
+        if captured or not was_king:
+            self.plies_without_progress = 0
+            self._seen = {}
+        else:
+            self.plies_without_progress += 1
+
+        position = hash_game(game, next_player)
+        self._seen[position] = self._seen.get(position, 0) + 1
+
+        if self.repetitions is not None and self._seen[position] >= self.repetitions:
+            return None, REPETITION
+        if self.no_progress_limit is not None and \
+                self.plies_without_progress >= self.no_progress_limit:
+            return None, NO_PROGRESS
+        if self.adjudicate_after is not None and self.ply >= self.adjudicate_after:
+            return self.material_winner(game), MATERIAL
+        return None
+
+    def material_winner(self, game):
+        """
+        Input:
+            game (Game) - the game to judge
+        Output:
+            (Player) - the player ahead by at least material_margin, or None
+        """
+        material = []
+        for player in game.players:
+            material.append(game.men_counts[player]
+                            + self.king_value * game.king_counts[player])
+        leader = 0 if material[0] >= material[1] else 1
+        if abs(material[0] - material[1]) >= self.material_margin:
+            return game.players[leader]
+        return None
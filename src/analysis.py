@@ -0,0 +1,336 @@
+"""
+This is a file that contains a daemon that analyses positions for other
+programs on the same machine, and a client for it.
+
+Starting a Python interpreter, importing the game and filling the tables of
+a search takes longer than analysing a single position, so the daemon keeps
+a pool of worker processes running, each with its search and tables ready,
+and takes requests over a Unix socket.
+
+Clients send one request per line, in the position format of the engine
+protocol (see engine.py):
+
+    analyse <request_id> <depth> <rows> <cols> <side> [<row>,<col>,<side>,<king> ...]
+
+Requests that arrive close together, from one client or many, are grouped
+into batches so that the workers are not handed one tiny task at a time.
+Results are sent back as soon as the batch they were in is done, so they
+may come in another order than the requests:
+
+    result <request_id> <score> <depth searched> <from> <to> [<to> ...]
+    result <request_id> <score> <depth searched> none
+    error <request_id> <message>
+
+To run the daemon, run the following from the root of the repository:
+
+    python3 src/analysis.py --socket /tmp/checkers-analysis.sock
+
+Example of a client:
+>>> for request_id, score, depth, move in analyse_positions(
+...         "/tmp/checkers-analysis.sock", [(snapshot, side)], depth=6):
+...     print(request_id, score, move)
+"""
+
+import asyncio
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from game import Game
+from player import Player
+from search import Searcher, search_fingerprint
+from transposition import TranspositionTable
+from persistent_cache import PersistentCache
+from engine import format_position, parse_position, format_move, parse_move
+
+PLAYERS = [Player("Player 1", ""), Player("Player 2", "")]
+
+# Largest number of rows and of columns of a position, as for the games of
+# server.py
+MAX_BOARD_SIZE = 26
+
+# The search of a worker process, made once when the process starts
+_worker_searcher = None
+
+
+def _start_worker(table_entries, cache_path):
+    """
+    Prepares a worker process: creates its search and tables and runs a
+    small search, so that the first real request does not pay for it.
+
+    Input:
+        table_entries (int) - size of the transposition table
+        cache_path (str) - path of a persistent cache shared by the workers,
+                           or None to keep the table in memory
+    """
+    global _worker_searcher
+    if cache_path is None:
+        table = TranspositionTable(table_entries)
+    else:
+        table = PersistentCache(cache_path, fingerprint=search_fingerprint())
+    _worker_searcher = Searcher(table=table)
+    game = Game(PLAYERS, 2, 6)
+    _worker_searcher.search(game, PLAYERS[0], 2)
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _analyse_batch(requests):
+    """
+    Analyses a batch of positions inside of a worker process.
+
+    Input:
+        requests (list[tuple(str, tuple, int, int)]) - request id, snapshot
+                  of the position, index of the player to move and depth
+    Output:
+        list[tuple] - for every request, either the request id, score, depth
+              searched and the best move as (initial position, path) or None,
+              or the request id and the error if it could not be analysed
+    """
+    results = []
+    for request_id, snapshot, side, depth in requests:
+        # A request that fails does not fail the others of its batch, which
+        # may come from other clients
+        try:
+            game = Game.from_snapshot(snapshot, PLAYERS)
+            score, move = _worker_searcher.search(game, PLAYERS[side], depth)
+        except Exception as error:
+            results.append((request_id, str(error)))
+            continue
+        if move is not None:
+            move = (move[0].position, list(move[1]))
+        results.append((request_id, score, _worker_searcher.completed_depth, move))
+    if isinstance(_worker_searcher.table, PersistentCache):
+        _worker_searcher.table.flush()
+    return results
+
+
+class AnalysisDaemon:
+    """
+    This class takes analysis requests from a Unix socket, groups them into
+    batches and runs the batches in a pool of worker processes.
+
+    Public Attributes:
+        - path (str) - path of the Unix socket
+        - processes (int) - number of worker processes
+        - batch_size (int) - largest number of positions in a batch
+        - batch_delay (float) - how long in seconds a request may wait for
+                                others to fill its batch
+        - max_depth (int) - deepest search a client may ask for
+    """
+
+    def __init__(self, path, processes=None, batch_size=16, batch_delay=0.005,
+                 table_entries=1 << 18, cache_path=None, max_depth=12):
+        self.path = path
+        self.processes = os.cpu_count() if processes is None else processes
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.table_entries = table_entries
+        self.cache_path = cache_path
+        self.max_depth = max_depth
+        self._executor = None
+        self._server = None
+        self._queue = None
+        self._batcher = None
+        self._batches = set()
+
+    async def start(self):
+        """
+        Starts the worker processes, waits until they are ready and starts
+        accepting clients.
+        """
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes, initializer=_start_worker,
+            initargs=(self.table_entries, self.cache_path))
+        loop = asyncio.get_running_loop()
+        # Every process starts (and runs _start_worker) before the first request
+        await asyncio.gather(*[loop.run_in_executor(self._executor, _warm_up)
+                               for _ in range(self.processes)])
+        self._queue = asyncio.Queue()
+        self._batcher = loop.create_task(self._make_batches())
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._server = await asyncio.start_unix_server(self.handle_client, self.path)
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting clients and stops the workers.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        self._executor.shutdown(cancel_futures=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    async def handle_client(self, reader, writer):
+        """
+        Reads the requests of a client until it disconnects.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if words == []:
+                    continue
+                request = self.parse_request(words)
+                if isinstance(request, str):
+                    writer.write(request.encode())
+                    await writer.drain()
+                else:
+                    await self._queue.put((writer, request))
+        except ConnectionError:
+            pass
+
+    def parse_request(self, words):
+        """
+        Input:
+            words (list[str]) - a request split into words
+        Output:
+            tuple(str, tuple, int, int) - request id, snapshot, side and depth,
+                  or the error line to send back if the request is wrong
+        """
+        request_id = words[1] if len(words) > 1 else "-"
+        if words[0] != "analyse" or len(words) < 6:
+            return f"error {request_id} unknown request\n"
+        try:
+            depth = int(words[2])
+            snapshot, side = parse_position(["position"] + words[3:])
+        except ValueError:
+            return f"error {request_id} the position cannot be read\n"
+        if not 1 <= depth <= self.max_depth or side not in (0, 1):
+            return f"error {request_id} the depth or side is out of range\n"
+        number_of_rows, number_of_cols, pieces = snapshot
+        if not (1 <= number_of_rows <= MAX_BOARD_SIZE and 1 <= number_of_cols <= MAX_BOARD_SIZE):
+            return (f"error {request_id} the board can have at most {MAX_BOARD_SIZE} "
+                    "rows and columns\n")
+        squares = set()
+        for row, col, index, _ in pieces:
+            if not (0 <= row < number_of_rows and 0 <= col < number_of_cols) \
+                    or (row, col) in squares or index not in (0, 1):
+                return (f"error {request_id} a piece is off the board, on a taken square "
+                        "or of no player\n")
+            squares.add((row, col))
+        return request_id, snapshot, side, depth
+
+    async def _make_batches(self):
+        """
+        Takes requests from the queue and sends them to the workers in
+        batches, waiting at most batch_delay for a batch to fill up.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._run_batch(batch))
+            # Tasks are only kept weakly by the loop
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch):
+        """
+        Runs a batch in a worker and sends every result to its client.
+        """
+        requests = [request for _, request in batch]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _analyse_batch, requests)
+            lines = []
+            for result in results:
+                if len(result) == 2:
+                    lines.append(f"error {result[0]} {result[1]}\n")
+                    continue
+                request_id, score, depth, move = result
+                move = "none" if move is None else format_move(*move)
+                lines.append(f"result {request_id} {score} {depth} {move}\n")
+        except Exception as error:
+            lines = [f"error {request[0]} {error}\n" for request in requests]
+
+        for (writer, _), line in zip(batch, lines):
+            if not writer.is_closing():
+                writer.write(line.encode())
+        for writer in {writer for writer, _ in batch}:
+            if not writer.is_closing():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+
+def analyse_positions(path, positions, depth=6):
+    """
+    Asks a running daemon to analyse positions, and gives back the results
+    as they arrive.
+
+    Input:
+        path (str) - path of the Unix socket of the daemon
+        positions (list[tuple(tuple, int)]) - snapshots of the positions
+                  (see Game.snapshot) with the index of the player to move
+        depth (int) - depth to search every position to
+    Output:
+        generator of tuple(int, int, int, tuple) - index of the position in
+              positions, score, depth searched and the best move as
+              (initial position, path), or None if there are no moves. If
+              the daemon refused the position, the score and depth are None
+              and the last item is the reason (str).
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        lines = []
+        for index, (snapshot, side) in enumerate(positions):
+            position = format_position(snapshot, side)[len("position "):]
+            lines.append(f"analyse {index} {depth} {position}\n")
+        connection.sendall("".join(lines).encode())
+
+        stream = connection.makefile("r")
+        for _ in positions:
+            words = stream.readline().split()
+            if words == []:
+                raise Exception("The analysis daemon closed the connection")
+            if words[0] == "error":
+                yield int(words[1]), None, None, " ".join(words[2:])
+                continue
+            move = None if words[4] == "none" else parse_move(words[4:])
+            yield int(words[1]), int(words[2]), int(words[3]), move
+
+
+@click.command(name="checkers-analysis")
+@click.option('--socket', 'socket_path', default="/tmp/checkers-analysis.sock",
+              help="Path of the Unix socket to listen on")
+@click.option('--processes', default=None, type=int, help="Number of worker processes")
+@click.option('--batch-size', default=16, help="Largest number of positions in a batch")
+@click.option('--cache-path', default=None,
+              help="Persistent cache file shared by the workers (see persistent_cache.py)")
+def cmd(socket_path, processes, batch_size, cache_path):
+    """
+    Runs the analysis daemon until it is interrupted.
+    """
+    async def run():
+        daemon = AnalysisDaemon(socket_path, processes, batch_size, cache_path=cache_path)
+        await daemon.start()
+        print(f"Analysing positions on {socket_path}")
+        await daemon.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    cmd()
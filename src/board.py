@@ -9,10 +9,13 @@ class Board:
     - number_of_rows : The number of rows of the board.
     - number_of_cols : The number of columns of the board.
     - grid : The grid of the board. It stores the game pieces.
+    - players : The players that play on the board, in the order of their turns.
+                It is None for boards that were created without a game.
     """
-    def __init__(self, number_of_rows, number_of_cols):
+    def __init__(self, number_of_rows, number_of_cols, players=None):
         self.number_of_rows = number_of_rows
         self.number_of_cols = number_of_cols
+        self.players = players
         self.grid = []
         # Populate the board with empty spaces
         for i in range(number_of_rows):
@@ -31,7 +34,10 @@ class Board:
             final_pos: tuple(int,int) - final position of the piece (row, col)
 
             game: Game - the game object
-        
+
+        Output:
+            GamePiece - the piece that was captured by the move, or None
+
         :raises: Exception if the piece cannot be moved
         """
 
@@ -41,16 +47,33 @@ class Board:
         if self.grid[final_pos[0]][final_pos[1]] is not None:
             raise Exception("There is piece at the final position")
 
-        self.grid[initial_pos[0]][initial_pos[1]].position = final_pos
-        self.grid[final_pos[0]][final_pos[1]] = self.grid[initial_pos[0]][initial_pos[1]]
+        piece = self.grid[initial_pos[0]][initial_pos[1]]
+        for tracker in game.trackers:
+            tracker.remove_piece(game, piece)
+        piece.position = final_pos
+        self.grid[final_pos[0]][final_pos[1]] = piece
         self.grid[initial_pos[0]][initial_pos[1]] = None
-        
-        if abs(initial_pos[0] - final_pos[0]) == 2:
-            row_to_remove = (initial_pos[0] + final_pos[0]) // 2
-            column_to_remove = (initial_pos[1] + final_pos[1]) // 2
-            self.remove_piece(self.grid[row_to_remove][column_to_remove], game)
+        for tracker in game.trackers:
+            tracker.add_piece(game, piece)
+
+        captured_piece = None
+        if abs(initial_pos[0] - final_pos[0]) >= 2:
+            # The captured piece is somewhere on the diagonal between the two
+            # positions, as kings can jump over a piece from a distance
+            row_step = 1 if final_pos[0] > initial_pos[0] else -1
+            col_step = 1 if final_pos[1] > initial_pos[1] else -1
+            row_to_remove = initial_pos[0] + row_step
+            column_to_remove = initial_pos[1] + col_step
+            while (row_to_remove, column_to_remove) != final_pos:
+                if self.grid[row_to_remove][column_to_remove] is not None:
+                    captured_piece = self.grid[row_to_remove][column_to_remove]
+                    self.remove_piece(captured_piece, game)
+                    break
+                row_to_remove += row_step
+                column_to_remove += col_step
         if final_pos[0] == 0 or final_pos[0] == self.number_of_rows -1:
-            self.grid[final_pos[0]][final_pos[1]].transform()
+            piece.transform(game)
+        return captured_piece
 
     def place_piece(self, piece):
         """
@@ -126,6 +149,8 @@ class Board:
         game.pieces_dict[piece.player].remove(piece)
         if self.grid[piece.position[0]][piece.position[1]] is None:
             raise Exception("There is no piece at that position")
+        for tracker in game.trackers:
+            tracker.remove_piece(game, piece)
 
 
         self.grid[piece.position[0]][piece.position[1]] = None
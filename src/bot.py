@@ -3,10 +3,36 @@ from src.player import Player
 from src.board import Board
 from src.game import Game
 from src.game_piece import GamePiece
+from src.adjudication import Adjudicator
 
+import json
 from math import inf
 # https://hobbylark.com/board-games/Checkers-Strategy-Tactics-How-To-Win - strategy source
 
+# The numbers the heuristics of CheckersBot depend on, as a single vector so
+# that they can be tuned (see spsa.py):
+# - *_priority - the filters of a non-jump move are applied from the highest
+#                priority to the lowest
+# - *_guard_row_* - rows of the back pieces on the first and the last column
+#                   that check_if_back_pieces keeps in place
+# - *_distance_weight, distance_power - how the distance from the end of a move
+#                                       to a piece is measured in aggressive_moves
+PARAMETER_NAMES = ["king_priority", "safety_priority", "aggression_priority", "back_priority",
+                   "left_guard_row_1", "left_guard_row_2", "right_guard_row_1",
+                   "right_guard_row_2", "row_distance_weight", "col_distance_weight",
+                   "distance_power"]
+DEFAULT_PARAMETERS = [4.0, 3.0, 2.0, 1.0, 1.0, 5.0, 0.0, 4.0, 1.0, 1.0, 2.0]
+
+
+def parameter_bounds(number_of_rows):
+    """
+    Gives the smallest and largest value of every parameter
+    :param number_of_rows: int: length of the vertical side of the board,
+                           which the guard rows have to be on
+    :return: list[tuple(float, float)]: bounds in the order of PARAMETER_NAMES
+    """
+    return [(0.0, 10.0)] * 4 + [(0.0, number_of_rows - 1.0)] * 4 + [(0.0, 4.0)] * 2 + [(0.5, 4.0)]
+
 
 class CheckersBot(Player):
     """
@@ -19,9 +45,21 @@ class CheckersBot(Player):
     3. Chose the longest jumps
     4. Move aggressively (closer to the enemy pieces but not such that they are attacked
     5. Don't move two back(flank) pieces if possible
+    The order of heuristics 1, 2, 4 and 5 for non-jump moves, the back pieces
+    and the measure of distance are set by the parameters.
     """
-    def __init__(self, name: str, color: str):
+    def __init__(self, name: str, color: str, parameters=None):
+        """
+        :param parameters: dict or list: values of the parameters by name, or
+                           as a list in the order of PARAMETER_NAMES.
+                           DEFAULT_PARAMETERS are used if not given.
+        """
         super().__init__(name=name, color=color)
+        if parameters is None:
+            parameters = DEFAULT_PARAMETERS
+        if isinstance(parameters, dict):
+            parameters = [parameters[name] for name in PARAMETER_NAMES]
+        self.parameters = list(parameters)
 
     def choose_move(self, board: Board, possible_moves: list):
         """
@@ -49,28 +87,21 @@ class CheckersBot(Player):
 
         else:
             # this logical block is responsible for choosing the best non-jump move
-            king_moves = self.check_if_can_king(valid_moves, board.number_of_cols)
-
-            if len(king_moves) != 0:
-                # checks if we can turn a pice into king with one of the moves
-                return king_moves[randint(0, len(king_moves)-1)]
-            safe_moves = self.check_if_danger(valid_moves, board)
-
-            # checks if it possible to make a move without loosing a piece
-            if len(safe_moves) != 0:
-                # if it is perform the most aggressive of the safe moves
-                valid_moves = self.aggressive_moves(safe_moves, board)
-            else:
-                # if not perform the most aggressive move which looses a piece
-                valid_moves = self.aggressive_moves(valid_moves, board)
-
-            non_defensive_moves = self.check_if_back_pieces(valid_moves, board.number_of_rows)
-
-            # checks if we can make a move without using two defensive pieces
-            if len(non_defensive_moves) == 0:
-                return valid_moves[randint(0, len(valid_moves)-1)]
-            else:
-                return non_defensive_moves[randint(0, len(non_defensive_moves)-1)]
+            filters = [
+                (self.parameters[0], lambda moves: self.check_if_can_king(moves, board.number_of_rows)),
+                # if no move is safe, a move which looses a piece is made
+                (self.parameters[1], lambda moves: self.check_if_danger(moves, board)),
+                (self.parameters[2], lambda moves: self.aggressive_moves(moves, board)),
+                # if every move uses a defensive piece, one of them is moved
+                (self.parameters[3], lambda moves: self.check_if_back_pieces(moves, board.number_of_cols)),
+            ]
+            filters.sort(key=lambda priority_and_filter: -priority_and_filter[0])
+            for _, move_filter in filters:
+                filtered_moves = move_filter(valid_moves)
+                # a filter that leaves no moves is skipped
+                if len(filtered_moves) != 0:
+                    valid_moves = filtered_moves
+            return valid_moves[randint(0, len(valid_moves)-1)]
 
     def aggressive_moves(self, valid_moves: list, board: Board):
         """
@@ -82,6 +113,8 @@ class CheckersBot(Player):
 
         best_moves = []
         lowest_distance = inf
+        row_weight, col_weight, power = self.parameters[8:11]
+        current_player = valid_moves[0][0].player
 
         for move in valid_moves:
 
@@ -90,33 +123,36 @@ class CheckersBot(Player):
 
             for row in board.grid:
                 for piece in row:
-                    if piece is None:
-                        pass
-                    else:
-                        # calculates sum of squared linear distnaces to every enemy pice
-                        cumulative_linear_distance += (coordinates_of_move[0] - piece.position[0])**2 + \
-                                                      (coordinates_of_move[1] - piece.position[1])**2
-
-                        if cumulative_linear_distance == lowest_distance:
-                            # if the distance is the same to enemy pieces, this move is one of the most aggressive
-                            best_moves.append(move)
-                        elif cumulative_linear_distance < lowest_distance:
-                            # if the distance is smaller than for other moves this move is the most aggressive
-                            best_moves.append(move)
+                    if piece is not None and piece.player != current_player:
+                        # calculates sum of weighted distances to every enemy piece
+                        squared_distance = row_weight * (coordinates_of_move[0] - piece.position[0])**2 + \
+                                           col_weight * (coordinates_of_move[1] - piece.position[1])**2
+                        cumulative_linear_distance += squared_distance ** (power / 2)
+
+            if cumulative_linear_distance == lowest_distance:
+                # if the distance is the same to enemy pieces, this move is one of the most aggressive
+                best_moves.append(move)
+            elif cumulative_linear_distance < lowest_distance:
+                # if the distance is smaller than for other moves this move is the most aggressive
+                best_moves = [move]
+                lowest_distance = cumulative_linear_distance
         return best_moves
 
-    def check_if_back_pieces(self, valid_moves: list, row_num: int):
+    def check_if_back_pieces(self, valid_moves: list, number_of_cols: int):
         """
         removes defensive pieces from the valid moves
         :param: valid_moves: list of valid moves
-        :param: row_num: int: length of the vertical side of the board
+        :param: number_of_cols: int: length of the horizontal side of the board
         :return: list[moves]: list of all moves that do not involve back pieces
         """
         best_moves = []
+        left_rows = [round(row) for row in self.parameters[4:6]]
+        right_rows = [round(row) for row in self.parameters[6:8]]
+        back_squares = [(row, 0) for row in left_rows] + [(row, number_of_cols-1) for row in right_rows]
         for move in valid_moves:
             if not move[0].is_king:
                 piece_position = move[0].position
-                if not (piece_position in [(1, 0), (5, 0), (0, row_num-1), (4, row_num-1)]):
+                if not (piece_position in back_squares):
                     best_moves.append(move)
         return best_moves
 
@@ -197,11 +233,36 @@ class CheckersBot(Player):
         best_moves = []
         for move in valid_moves:
             if not move[0].is_king:
-                if move[1][-1] in [0, number_of_rows-1]:
+                if move[1][-1][0] in [0, number_of_rows-1]:
                     best_moves.append(move)
         return best_moves
 
 
+def save_parameters(path, parameters, details=None):
+    """
+    Saves the parameters of a CheckersBot as a JSON file
+    :param path: str: path of the file
+    :param parameters: list: values in the order of PARAMETER_NAMES
+    :param details: dict: anything else to keep in the file, for example how
+                    the parameters were tuned
+    """
+    with open(path, "w") as file:
+        json.dump({"parameters": dict(zip(PARAMETER_NAMES, parameters)),
+                   "details": {} if details is None else details}, file, indent=2)
+
+
+def load_parameters(path):
+    """
+    Reads parameters saved by save_parameters
+    :param path: str: path of the file
+    :return: list: values in the order of PARAMETER_NAMES. Parameters missing
+             from the file have their default values.
+    """
+    with open(path) as file:
+        saved = json.load(file)["parameters"]
+    return [saved.get(name, default) for name, default in zip(PARAMETER_NAMES, DEFAULT_PARAMETERS)]
+
+
 class RandomBot(Player):
     """
     A bot that is able to make random moves, made for the tests
@@ -225,21 +286,30 @@ def main():
     player_1 = CheckersBot("Player 1", "white")
     player_2 = RandomBot("Player 2", "black")
     players = [player_1, player_2]
-    game = Game(players, 3, 8)
+    # games where the kings keep moving back and forth are ended with a draw
+    adjudicator = Adjudicator()
     clever_won = 0
     for i in range(100):
+            game = Game(players, 3, 8)
+            adjudicator.start(game, player_1)
             while True:
                 moves = game.get_possible_moves(players[0])
                 if len(moves) == 0:
                     break
                 the_move = player_1.choose_move(game.board, moves)
-                game.make_move(the_move)
+                delta = game.make_move(the_move)
+                if adjudicator.record_move(game, delta.was_king, delta.captured,
+                                           player_2) is not None:
+                    break
                 moves = game.get_possible_moves(game.players[1])
                 if len(moves) == 0:
                     clever_won += 1
                     break
                 the_move = player_2.choose_move(game.board, moves)
-                game.make_move(the_move)
+                delta = game.make_move(the_move)
+                if adjudicator.record_move(game, delta.was_king, delta.captured,
+                                           player_1) is not None:
+                    break
     print(clever_won/100)
 
 if __name__ == "__main__":
@@ -0,0 +1,250 @@
+"""
+This is a file that contains a hub that sends the moves of one game to
+many spectators.
+
+A spectator is first sent a snapshot of the position and then only the
+moves (deltas, see MoveDelta in game.py) as they are made. A move is turned
+into text once, however many spectators there are.
+
+Every spectator has a buffer of a fixed size. A spectator that reads too
+slowly and lets its buffer fill up is not sent the moves it missed; its
+buffer is dropped and it is sent a fresh snapshot instead, so that memory
+stays bounded however slow the spectators are.
+
+Messages are lines of text, with squares written as "row,col":
+
+    snapshot <ply> <rows> <cols> <side to move> [<row>,<col>,<side>,<king> ...]
+    delta <ply> <side> <promoted> <number captured> [<captured square> ...] <from> <to> [<to> ...]
+    end <result>
+
+The hub is not thread-safe: moves have to be published from the same thread
+(or event loop) the spectators read in.
+
+Example:
+>>> hub = BroadcastHub.for_game(game)
+>>> subscription = hub.subscribe()
+>>> game.make_move(move)
+>>> subscription.poll()
+['snapshot 1 8 8 1 ...']
+"""
+
+import asyncio
+from collections import deque
+
+from engine import format_position
+
+
+def format_delta(ply, side, delta):
+    """
+    Input:
+        ply (int) - number of moves made, this one included
+        side (int) - index of the player who made the move
+        delta (MoveDelta) - the move
+    Output:
+        (str) - the delta message
+    """
+    squares = [f"{row},{col}" for row, col in delta.captured_squares]
+    squares += [f"{row},{col}" for row, col in [delta.origin] + list(delta.path)]
+    return (f"delta {ply} {side} {int(delta.promoted)} {len(delta.captured_squares)} "
+            + " ".join(squares))
+
+
+class Subscription:
+    """
+    This class holds the messages a single spectator has not read yet.
+
+    Public Attributes:
+        - buffer_size (int) - most messages kept before the spectator is
+                              considered to be lagging
+        - lagging (bool) - whether the spectator has to be sent a snapshot
+                           before any more deltas
+        - closed (bool) - whether the game has ended and every message has
+                          been read
+    """
+
+    def __init__(self, hub, buffer_size, notify=None):
+        """
+        Input:
+            hub (BroadcastHub) - the hub the messages come from
+            buffer_size (int) - see above
+            notify (function) - called without arguments when there are new
+                                messages to read, or None
+        """
+        self.buffer_size = buffer_size
+        self.lagging = True
+        self.closed = False
+        self._hub = hub
+        self._messages = deque()
+        self._notify = notify
+
+    def push(self, message):
+        """
+        Adds a message, or marks the spectator as lagging if its buffer is full.
+        """
+        if self.lagging:
+            pass
+        elif len(self._messages) >= self.buffer_size:
+            self._messages.clear()
+            self.lagging = True
+        else:
+            self._messages.append(message)
+        self.notify()
+
+    def notify(self):
+        if self._notify is not None:
+            self._notify()
+
+    def poll(self):
+        """
+        Output:
+            list[str] - the messages not read yet; a single snapshot if the
+                        spectator has just joined or was lagging
+        """
+        if self.lagging:
+            self.lagging = False
+            self._messages.clear()
+            messages = [self._hub.snapshot_message()]
+        else:
+            messages = list(self._messages)
+            self._messages.clear()
+        if self._hub.result is not None:
+            messages.append(f"end {self._hub.result}")
+            self.closed = True
+        return messages
+
+    def close(self):
+        """
+        Stops receiving messages.
+        """
+        self._hub.unsubscribe(self)
+
+
+class BroadcastHub:
+    """
+    This class sends the moves of one game to all its subscriptions.
+
+    Public Attributes:
+        - ply (int) - number of moves made
+        - side (int) - index of the player to move
+        - buffer_size (int) - size of the buffer of every subscription
+        - subscriptions (list[Subscription]) - the spectators
+        - result (str) - how the game ended, or None while it goes on
+    """
+
+    def __init__(self, get_snapshot, ply=0, side=0, buffer_size=64):
+        """
+        Input:
+            get_snapshot (function) - returns the current position, as made
+                                      by Game.snapshot
+            ply (int) - number of moves made before the hub was created
+            side (int) - index of the player to move
+            buffer_size (int) - size of the buffer of every subscription
+        """
+        self.ply = ply
+        self.side = side
+        self.buffer_size = buffer_size
+        self.subscriptions = []
+        self.result = None
+        self._get_snapshot = get_snapshot
+        self._snapshot_message = None
+
+    @classmethod
+    def for_game(cls, game, buffer_size=64):
+        """
+        Creates a hub that follows the moves of a game as an observer (see
+        Game.add_observer).
+
+        Input:
+            game (Game) - a game that has not started yet
+            buffer_size (int) - size of the buffer of every subscription
+        Output:
+            (BroadcastHub)
+        """
+        hub = cls(game.snapshot, buffer_size=buffer_size)
+        game.add_observer(lambda game, delta: hub.publish(game.players.index(delta.player),
+                                                          delta))
+        return hub
+
+    def subscribe(self, notify=None):
+        """
+        Adds a spectator. The first message it reads is a snapshot.
+
+        Input:
+            notify (function) - see Subscription
+        Output:
+            (Subscription)
+        """
+        subscription = Subscription(self, self.buffer_size, notify)
+        self.subscriptions.append(subscription)
+        if notify is not None:
+            notify()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+
+    def snapshot_message(self):
+        """
+        Output:
+            (str) - the snapshot message of the current position. It is only
+                    made once per ply, however many spectators need it.
+        """
+        if self._snapshot_message is None:
+            position = format_position(self._get_snapshot(), self.side)
+            self._snapshot_message = f"snapshot {self.ply} " + position[len("position "):]
+        return self._snapshot_message
+
+    def publish(self, side, delta):
+        """
+        Sends a move to all the spectators.
+
+        Input:
+            side (int) - index of the player who made the move
+            delta (MoveDelta) - the move
+        """
+        self.ply += 1
+        self.side = 1 - side
+        self._snapshot_message = None
+        message = format_delta(self.ply, side, delta)
+        for subscription in self.subscriptions:
+            subscription.push(message)
+
+    def end(self, result):
+        """
+        Tells all the spectators that the game is over.
+
+        Input:
+            result (str) - how the game ended
+        """
+        self.result = result
+        for subscription in self.subscriptions:
+            subscription.notify()
+
+
+async def stream_to_writer(hub, writer, prefix=""):
+    """
+    Sends the messages of a new subscription to a socket until the game ends
+    or the spectator disconnects. While the socket is slow to accept data,
+    the subscription fills up and the spectator gets a snapshot instead of
+    the moves it missed.
+
+    Input:
+        hub (BroadcastHub) - the game to watch
+        writer (StreamWriter) - connection of the spectator
+        prefix (str) - text put before every message, for example to tell
+                       games watched over the same connection apart
+    """
+    ready = asyncio.Event()
+    subscription = hub.subscribe(ready.set)
+    try:
+        while not subscription.closed:
+            await ready.wait()
+            ready.clear()
+            for message in subscription.poll():
+                writer.write((prefix + message + "\n").encode())
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        subscription.close()
@@ -0,0 +1,167 @@
+"""
+This is a file that contains logic for saving the progress of long runs
+(tournaments, self-play) to disk, so that an interrupted run can carry on
+where it stopped instead of starting over.
+
+A run is made of numbered tasks, each a game or a pair of games. A task is
+fully described by the opening it starts from and the seed of the random
+choices of the bots, so a game that was being played when the run stopped
+is stored in that compact form and played again from its start. Together
+with the state of the random generator that makes the openings, this lets
+a resumed run play exactly the games the uninterrupted run would have.
+Bots that keep tables between games, or that think for a fixed time, may
+still choose other moves in a game that is played again.
+
+Checkpoints are JSON files. They are written to a temporary file first and
+then renamed, so a run that stops while one is written keeps the previous
+checkpoint.
+"""
+
+import json
+import os
+import random
+import time
+
+
+def rng_state(rng):
+    """
+    Input:
+        rng (random.Random) - a random generator
+    Output:
+        (list) - its state, in a form that can be saved as JSON
+    """
+    version, internal_state, gauss_next = rng.getstate()
+    return [version, list(internal_state), gauss_next]
+
+
+def set_rng_state(rng, state):
+    """
+    Input:
+        rng (random.Random) - a random generator
+        state (list) - a state made by rng_state
+    """
+    version, internal_state, gauss_next = state
+    rng.setstate((version, tuple(internal_state), gauss_next))
+
+
+class RunProgress:
+    """
+    This class keeps track of the tasks of a run: which were handed out,
+    which are finished and how the next ones will be made.
+
+    Public Attributes:
+        - rng (random.Random) - makes the openings and seeds of new tasks
+        - started (int) - number of tasks handed out
+        - pending (dict[int, list]) - the tasks handed out but not finished,
+                                      by their number, as [opening, seed]
+        - finished (list[list]) - [number, result] of every finished task, in
+                                  the order they finished
+    """
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.started = 0
+        self.pending = {}
+        self.finished = []
+
+    def new_task(self, make_opening):
+        """
+        Input:
+            make_opening (function) - called with rng, makes an opening
+        Output:
+            tuple(int, list, int) - number, opening and seed of the task
+        """
+        opening = make_opening(self.rng)
+        seed = self.rng.getrandbits(32)
+        index = self.started
+        self.started += 1
+        self.pending[index] = [opening, seed]
+        return index, opening, seed
+
+    def finish(self, index, result):
+        del self.pending[index]
+        self.finished.append([index, result])
+
+    def to_dict(self):
+        """
+        Output:
+            (dict) - JSON-serializable representation of the progress
+        """
+        return {
+            "rng": rng_state(self.rng),
+            "started": self.started,
+            "pending": [[index, opening, seed]
+                        for index, (opening, seed) in self.pending.items()],
+            "finished": self.finished,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Input:
+            data (dict) - representation made by to_dict
+        Output:
+            (RunProgress)
+        """
+        progress = cls()
+        set_rng_state(progress.rng, data["rng"])
+        progress.started = data["started"]
+        progress.pending = {index: [opening, seed] for index, opening, seed in data["pending"]}
+        progress.finished = data["finished"]
+        return progress
+
+
+class Checkpoint:
+    """
+    This class saves the progress of a run to a file, at most once every
+    interval seconds.
+
+    Public Attributes:
+        - path (str) - path of the checkpoint file
+        - interval (float) - least number of seconds between two saves
+    """
+
+    def __init__(self, path, interval=30.0):
+        self.path = path
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def load(self, parameters):
+        """
+        Input:
+            parameters (dict) - what the run is, for example the players and
+                                the size of the board
+        Output:
+            (RunProgress) - the saved progress, or None if there is no
+                            checkpoint yet
+        Raises:
+            ValueError - if the checkpoint was made by a run with other
+                         parameters
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as file:
+            data = json.load(file)
+        if data["parameters"] != json.loads(json.dumps(parameters)):
+            raise ValueError(f"The checkpoint {self.path} was made by another run: "
+                             f"{data['parameters']}")
+        return RunProgress.from_dict(data["progress"])
+
+    def due(self):
+        """
+        Output:
+            (bool) - whether interval seconds have passed since the last save
+        """
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, parameters, progress):
+        """
+        Input:
+            parameters (dict) - see load
+            progress (RunProgress) - the progress of the run
+        """
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as file:
+            json.dump({"parameters": parameters, "progress": progress.to_dict()}, file)
+        os.replace(temporary_path, self.path)
+        self._last_save = time.monotonic()
@@ -0,0 +1,37 @@
+import pytest
+
+from board import Board
+from game import Game
+from game_piece import GamePiece
+from player import Player
+from record import GameRecord
+from selfplay import play_game
+
+
+@pytest.fixture
+def make_game():
+    """Returns a function that creates a game on an empty 8x8 board with the given (position, player index, is king) pieces"""
+    def make(pieces):
+        player_1 = Player("Player 1", "white")
+        player_2 = Player("Player 2", "black")
+        players = [player_1, player_2]
+        game = Game(players, 0, 8)
+        game.board = Board(8, 8, players)
+        for position, index, is_king in pieces:
+            piece = GamePiece(position, players[index])
+            piece.is_king = is_king
+            game.board.place_piece(piece)
+            game.pieces_dict[players[index]].append(piece)
+        game.reset_trackers()
+        return game
+    return make
+
+
+@pytest.fixture
+def make_records():
+    """Returns a function that plays the records of games between random bots on a 4 x 6 board"""
+    def make(games):
+        return [GameRecord.from_dict(play_game("random-bot", "random-bot", [], 2, 6,
+                                               max_plies=40, seed=seed))
+                for seed in range(games)]
+    return make
@@ -0,0 +1,458 @@
+"""
+This is a file that contains logic for spreading tournaments and self-play
+over several machines.
+
+A coordinator keeps a queue of tasks (pairs of a tournament, games of
+self-play) and hands them out in batches to workers that connect to it over
+TCP. Workers ask for a batch, play it and send back the results, until the
+coordinator tells them that there is no more work. A worker that
+disconnects, or that sends nothing for too long, is considered dead, and the
+tasks of its unfinished batches are put back at the front of the queue for
+other workers.
+
+The coordinator is an Executor (see concurrent.futures), so Tournament.run
+and SelfPlay.run use it in the same way as a pool of processes. Only the
+functions in TASKS can be run, and their arguments and results have to be
+JSON-serializable, so players have to be given as types (see
+match.make_player). As a worker builds players from the types it is sent,
+it only accepts the types in WORKER_PLAYER_TYPES and "smart-bot:[<values>]";
+engines and files on the worker cannot be used.
+
+Workers prove that they may take part with a token that the coordinator
+and the workers are started with, and send one message per line:
+
+    HELLO <token>
+        The first message of every worker. The coordinator closes the
+        connection if the token is wrong.
+    WORK
+        Asks for a batch.
+    RESULT <batch_id> <JSON list of {"result": ...} or {"error": "..."}>
+        The results of a batch, in the order of its tasks.
+    ALIVE
+        Sent every few seconds, so that the coordinator knows the worker is
+        still there while it plays a long batch.
+
+and the coordinator answers:
+
+    BATCH <batch_id> <JSON list of [task name, [arguments]]>
+    DONE
+        There is no more work and the worker can stop.
+
+A RESULT with fewer results than its batch had tasks puts the tasks
+without a result back at the front of the queue.
+
+To run a tournament over several machines, start the coordinator on one of
+them, from the root of the repository (it only listens on 127.0.0.1 unless
+another --host is given):
+
+    python3 src/distributed.py coordinator --host 0.0.0.0 --port 8766 --token <secret> --player-a search-bot --player-b smart-bot
+
+and any number of workers on the others:
+
+    python3 src/distributed.py worker --host <coordinator address> --port 8766 --token <secret> --processes 4
+"""
+
+import asyncio
+import hmac
+import json
+import socket
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+
+import click
+
+from tournament import Tournament, play_pair
+from selfplay import SelfPlay, play_game, save_records
+from checkpoint import Checkpoint
+
+# Functions that workers can run, by the names they are sent with
+TASKS = {"pair": play_pair, "game": play_game}
+TASK_NAMES = {function: name for name, function in TASKS.items()}
+
+# Types of players (see match.make_player) that a worker agrees to create
+WORKER_PLAYER_TYPES = {"random-bot", "smart-bot", "search-bot", "parallel-search-bot"}
+
+
+def check_player_types(name, args):
+    """
+    Checks that a task only uses players that a worker agrees to create.
+    Both tasks take the types of the two players as their first arguments.
+
+    Input:
+        name (str) - name of the task in TASKS
+        args (list) - arguments of the task
+    Raises:
+        ValueError - if the task is unknown or a player type is not allowed
+    """
+    if name not in TASKS:
+        raise ValueError(f"unknown task {name!r}")
+    for spec in args[:2]:
+        if not isinstance(spec, str) or not (spec in WORKER_PLAYER_TYPES
+                                             or spec.startswith("smart-bot:[")):
+            raise ValueError(f"player type {spec!r} cannot be used by a worker")
+
+
+class _Task:
+    """
+    A task waiting in the queue of a Coordinator, or being played by a worker.
+    """
+
+    __slots__ = ("future", "name", "args")
+
+    def __init__(self, future, name, args):
+        self.future = future
+        self.name = name
+        self.args = args
+
+
+class Coordinator(Executor):
+    """
+    This class hands out tasks to workers over TCP. Its event loop runs in a
+    thread of its own, so submit can be called from any thread.
+
+    Public Attributes:
+        - host (str), port (int) - address the coordinator listens on
+        - batch_size (int) - largest number of tasks in a batch
+        - timeout (float) - seconds without any message after which a
+                            worker is considered dead
+        - token (str) - token the workers have to send in their HELLO
+        - workers (int) - number of workers connected
+    """
+
+    def __init__(self, host="127.0.0.1", port=8766, batch_size=4, timeout=60.0, token=""):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.token = token
+        self.workers = 0
+        self._queue = deque()
+        self._batch_ids = 0
+        self._loop = None
+        self._thread = None
+        self._server = None
+        self._available = None
+        self._connections = set()
+
+    def start(self):
+        """
+        Starts listening for workers.
+
+        Output:
+            (int) - the port the coordinator listens on, which is chosen by
+                    the system if port is 0
+        """
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(started,),
+                                        daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.port
+
+    def _run_loop(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._available = asyncio.Event()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self.handle_worker, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        started.set()
+        self._loop.run_forever()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Adds a task to the queue.
+
+        Input:
+            fn (function) - one of the functions in TASKS
+            args - its arguments, which have to be JSON-serializable
+        Output:
+            (Future) - the result of the task
+        """
+        if fn not in TASK_NAMES or kwargs:
+            raise ValueError(f"{fn} cannot be run by the workers of a coordinator")
+        check_player_types(TASK_NAMES[fn], args)
+        future = Future()
+        # Tuples are sent as lists, so they are turned into lists right away
+        task = _Task(future, TASK_NAMES[fn], json.loads(json.dumps(args)))
+        self._loop.call_soon_threadsafe(self._add_tasks, [task])
+        return future
+
+    def _add_tasks(self, tasks, front=False):
+        if front:
+            self._queue.extendleft(reversed(tasks))
+        else:
+            self._queue.extend(tasks)
+        self._available.set()
+
+    async def _take_batch(self):
+        """
+        Waits until there are tasks in the queue and takes a batch of them.
+        Tasks whose future was cancelled are thrown away.
+
+        Output:
+            list[_Task]
+        """
+        while True:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                task = self._queue.popleft()
+                if task.future.done():
+                    continue
+                # Tasks that come back from a dead worker are already running
+                if task.future.running() or task.future.set_running_or_notify_cancel():
+                    batch.append(task)
+            if batch:
+                return batch
+            self._available.clear()
+            await self._available.wait()
+
+    async def handle_worker(self, reader, writer):
+        """
+        Talks to a worker until it disconnects, then puts the tasks it did not
+        finish back into the queue.
+        """
+        try:
+            hello = await asyncio.wait_for(reader.readline(), self.timeout)
+        except (ConnectionError, asyncio.TimeoutError, ValueError):
+            hello = b""
+        words = hello.decode(errors="replace").split()
+        if words[:1] != ["HELLO"] or not hmac.compare_digest(
+                (words[1] if len(words) > 1 else "").encode(), self.token.encode()):
+            writer.close()
+            return
+
+        self.workers += 1
+        self._connections.add(writer)
+        batches = {}
+        sending = None
+        try:
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.timeout)
+                if not line:
+                    break
+                words = line.decode(errors="replace").split(maxsplit=2)
+                if words == []:
+                    continue
+                if words[0] == "WORK" and (sending is None or sending.done()):
+                    sending = asyncio.ensure_future(self._send_batch(writer, batches))
+                elif words[0] == "RESULT" and len(words) == 3:
+                    batch_id, results = int(words[1]), json.loads(words[2])
+                    # The batch stays in batches, so that it is queued again
+                    # when the connection is dropped below
+                    if not isinstance(results, list) or not all(
+                            isinstance(result, dict) and ("error" in result or "result" in result)
+                            for result in results):
+                        raise ValueError("a worker sent results that cannot be read")
+                    self._finish_batch(batches.pop(batch_id, []), results)
+        except (ConnectionError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            if sending is not None:
+                sending.cancel()
+            self.workers -= 1
+            self._connections.discard(writer)
+            unfinished = [task for batch in batches.values() for task in batch]
+            if unfinished:
+                self._add_tasks(unfinished, front=True)
+            writer.close()
+
+    async def _send_batch(self, writer, batches):
+        batch = await self._take_batch()
+        self._batch_ids += 1
+        batches[self._batch_ids] = batch
+        tasks = [[task.name, task.args] for task in batch]
+        writer.write(f"BATCH {self._batch_ids} {json.dumps(tasks)}\n".encode())
+        await writer.drain()
+
+    def _finish_batch(self, batch, results):
+        if len(results) < len(batch):
+            self._add_tasks(batch[len(results):], front=True)
+        for task, result in zip(batch, results):
+            if task.future.done():
+                continue
+            if "error" in result:
+                task.future.set_exception(Exception(f"A worker failed: {result['error']}"))
+            else:
+                task.future.set_result(result["result"])
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        """
+        Tells the workers to stop, closes the connections and stops the loop.
+        Tasks still in the queue are cancelled.
+        """
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if wait:
+            self._thread.join()
+            self._loop.close()
+        self._loop = None
+
+    async def _close(self):
+        self._server.close()
+        for task in self._queue:
+            task.future.cancel()
+        self._queue.clear()
+        for writer in list(self._connections):
+            try:
+                writer.write(b"DONE\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+            writer.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in handlers:
+            task.cancel()
+        await asyncio.gather(*handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+
+def _run_task(name, args):
+    """
+    Runs a single task and turns its result or its error into JSON.
+    """
+    try:
+        check_player_types(name, args)
+        return {"result": TASKS[name](*args)}
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+
+
+def run_worker(host, port, processes=1, heartbeat=10.0, token=""):
+    """
+    Plays the batches of a coordinator until it has no more work.
+
+    Input:
+        host (str), port (int) - address of the coordinator
+        token (str) - token of the coordinator, see Coordinator
+        processes (int) - number of processes the tasks of a batch are
+                          shared between; with 1 they run in this process
+        heartbeat (float) - seconds between ALIVE messages. It has to be
+                            shorter than the timeout of the coordinator.
+    Output:
+        (int) - number of tasks played
+    """
+    played = 0
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(line):
+        with lock:
+            connection.sendall((line + "\n").encode())
+
+    def keep_alive():
+        while not stopped.wait(heartbeat):
+            try:
+                send("ALIVE")
+            except OSError:
+                return
+
+    with socket.create_connection((host, port)) as connection:
+        stream = connection.makefile("r")
+        alive = threading.Thread(target=keep_alive, daemon=True)
+        alive.start()
+        try:
+            send(f"HELLO {token}")
+            while True:
+                send("WORK")
+                words = stream.readline().split(maxsplit=2)
+                if words[:1] != ["BATCH"]:
+                    break
+                tasks = json.loads(words[2])
+                if executor is None:
+                    results = [_run_task(name, args) for name, args in tasks]
+                else:
+                    results = list(executor.map(_run_task, *zip(*tasks)))
+                send(f"RESULT {words[1]} {json.dumps(results)}")
+                played += len(tasks)
+        except ConnectionError:
+            # The coordinator has stopped
+            pass
+        finally:
+            stopped.set()
+            if executor is not None:
+                executor.shutdown()
+    return played
+
+
+@click.group(name="checkers-distributed")
+def cmd():
+    """
+    Runs a coordinator or a worker.
+    """
+
+
+@cmd.command()
+@click.option('--host', default="127.0.0.1", help="Address to listen on")
+@click.option('--port', default=8766)
+@click.option('--mode', type=click.Choice(["tournament", "selfplay"]), default="tournament")
+@click.option('--player-a', default="search-bot", help="Type of the first player")
+@click.option('--player-b', default="smart-bot",
+              help="Type of the second player (its opponent in self-play)")
+@click.option('--games', default=100, help="Number of games of self-play")
+@click.option('--max-pairs', default=1000, help="Largest number of pairs of a tournament")
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--batch-size', default=4, help="Number of tasks handed out at once")
+@click.option('--workers', default=4, help="Number of workers expected to connect")
+@click.option('--output', default="games.jsonl", help="File the records of self-play are saved to")
+@click.option('--seed', default=None, type=int)
+@click.option('--token', default="", envvar="CHECKERS_TOKEN",
+              help="Token the workers have to send (or set CHECKERS_TOKEN)")
+@click.option('--checkpoint', 'checkpoint_path', default=None,
+              help="File the progress is saved to, and resumed from if it exists")
+def coordinator(host, port, mode, player_a, player_b, games, max_pairs, width,
+                rows_with_pieces, batch_size, workers, output, seed, token, checkpoint_path):
+    """
+    Hands out the games of a tournament or of self-play to workers.
+    """
+    executor = Coordinator(host, port, batch_size, token=token)
+    executor.start()
+    print(f"Waiting for workers on {host}:{executor.port}")
+    # Enough tasks are kept in the queue for every worker to have a batch
+    in_flight = workers * batch_size
+    checkpoint = None if checkpoint_path is None else Checkpoint(checkpoint_path)
+    try:
+        if mode == "tournament":
+            tournament = Tournament(player_a, player_b, rows_with_pieces, width,
+                                    max_pairs=max_pairs, workers=in_flight, seed=seed)
+            result = tournament.run(
+                lambda pair_scores, llr: print(f"\rPairs: {len(pair_scores)}  LLR: {llr:.2f}",
+                                               end="", flush=True),
+                executor, checkpoint)
+            print()
+            print(f"Elo difference: {result.elo:.1f} "
+                  f"[{result.elo_low:.1f}, {result.elo_high:.1f}], "
+                  f"accepted: {result.decision or 'none'}")
+        else:
+            self_play = SelfPlay(player_a, player_b, games, rows_with_pieces, width,
+                                 workers=in_flight, seed=seed)
+            records = self_play.run(lambda index, record: print(".", end="", flush=True),
+                                    executor, checkpoint)
+            print()
+            save_records(records, output)
+            print(f"Records saved to {output}")
+    finally:
+        executor.shutdown()
+
+
+@cmd.command()
+@click.option('--host', default="127.0.0.1", help="Address of the coordinator")
+@click.option('--port', default=8766)
+@click.option('--processes', default=1, help="Number of processes playing the games")
+@click.option('--token', default="", envvar="CHECKERS_TOKEN",
+              help="Token of the coordinator (or set CHECKERS_TOKEN)")
+def worker(host, port, processes, token):
+    """
+    Plays games for a coordinator until it has no more work.
+    """
+    played = run_worker(host, port, processes, token=token)
+    print(f"Played {played} tasks")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,397 @@
+"""
+This is a file that contains a text protocol for running bots in separate
+processes ("engines"), an engine that speaks it, and a Player that plays by
+asking an engine for its moves.
+
+The front end writes commands to the standard input of the engine, one per
+line, and reads its answers from its standard output. Squares are written
+as "row,col" (counting from 0).
+
+    engine
+        Answer: "id name <name>" followed by "ready"
+    isready
+        Answer: readyok. It is answered right away, even during a search
+    position <rows> <cols> <side> [<row>,<col>,<side>,<king> ...]
+        Sets up the position: the size of the board, the index of the player
+        to move and every piece on the board (king is 0 or 1).
+    go [depth <plies>] [movetime <ms>] [nodes <count>] [ponder]
+        Searches the position until one of the limits is reached, then
+        answers "bestmove <from> <to> [<to> ...]", or "bestmove none" if the
+        player to move has no moves. With ponder the search has no limits
+        and only ends with stop; it is used to fill the tables of the engine
+        while the opponent is thinking.
+    stop
+        Ends the current search early; its bestmove is sent right away.
+    quit
+        Ends the engine.
+
+To run the engine that comes with the game, run:
+
+    python3 src/engine.py --depth 6
+
+To play against it in the TUI, pass its command as a player type:
+
+    python3 src/tui.py --player-2-type "engine:python3 src/engine.py"
+"""
+
+import subprocess
+import sys
+import threading
+import time
+
+import click
+
+from game import Game
+from player import Player
+from search import Searcher
+from transposition import TranspositionTable
+
+DEFAULT_DEPTH = 6
+# Depth searched to when only a time or node limit is given
+UNLIMITED_DEPTH = 64
+
+
+def format_position(snapshot, side):
+    """
+    Input:
+        snapshot (tuple) - the position, made by Game.snapshot
+        side (int) - index of the player to move
+    Output:
+        (str) - the position command of the protocol
+    """
+    rows, cols, pieces = snapshot
+    words = ["position", str(rows), str(cols), str(side)]
+    words += [f"{row},{col},{index},{int(is_king)}" for row, col, index, is_king in pieces]
+    return " ".join(words)
+
+
+def parse_position(words):
+    """
+    Input:
+        words (list[str]) - the position command split into words
+    Output:
+        tuple(tuple, int) - the snapshot of the position and the index of the
+                            player to move
+    """
+    rows, cols, side = int(words[1]), int(words[2]), int(words[3])
+    pieces = []
+    for word in words[4:]:
+        row, col, index, is_king = (int(value) for value in word.split(","))
+        pieces.append((row, col, index, is_king == 1))
+    return (rows, cols, tuple(sorted(pieces))), side
+
+
+def format_move(origin, path):
+    return " ".join(f"{row},{col}" for row, col in [origin] + list(path))
+
+
+def parse_move(words):
+    """
+    Input:
+        words (list[str]) - the squares of a move
+    Output:
+        tuple(tuple(int, int), list[tuple(int, int)]) - the initial position of
+              the piece and its path
+    """
+    squares = [tuple(int(value) for value in word.split(",")) for word in words]
+    return squares[0], squares[1:]
+
+
+class EngineError(Exception):
+    """
+    Raised when an engine stops or answers with a move that is not legal.
+    """
+
+
+class SearchLimits:
+    """
+    A stop flag for a Searcher (see Searcher.stop) that is set by a stop
+    command, or once a time or node limit is reached.
+    """
+
+    def __init__(self, searcher, end_time=None, nodes=None):
+        """
+        Input:
+            searcher (Searcher) - the search that is limited
+            end_time (float) - time.time() at which to stop, or None
+            nodes (int) - number of nodes after which to stop, or None
+        """
+        self.searcher = searcher
+        self.end_time = end_time
+        self.nodes = nodes
+        self.stopped = threading.Event()
+
+    def is_set(self):
+        if self.stopped.is_set():
+            return True
+        if self.end_time is not None and time.time() >= self.end_time:
+            return True
+        return self.nodes is not None and self.searcher.nodes >= self.nodes
+
+    def set(self):
+        self.stopped.set()
+
+
+class Engine:
+    """
+    This class carries out the commands of the protocol with a Searcher.
+    Searches run in a thread, so that stop can be read while they run.
+
+    Public Attributes:
+        - name (str) - name the engine introduces itself with
+        - searcher (Searcher) - the search used to choose moves
+        - depth (int) - depth searched to when go gives no limits
+    """
+
+    def __init__(self, name="checkers-search", depth=DEFAULT_DEPTH,
+                 table_entries=1 << 18, output=None):
+        self.name = name
+        self.depth = depth
+        self.searcher = Searcher(table=TranspositionTable(table_entries))
+        self.players = [Player("Player 1", ""), Player("Player 2", "")]
+        self.game = None
+        self.side = 0
+        self._output = sys.stdout if output is None else output
+        self._output_lock = threading.Lock()
+        self._thread = None
+
+    def send(self, line):
+        with self._output_lock:
+            self._output.write(line + "\n")
+            self._output.flush()
+
+    def handle_command(self, line):
+        """
+        Carries out a single command.
+
+        Input:
+            line (str) - the command
+        Output:
+            False - if the engine should quit
+            True - otherwise
+        """
+        words = line.split()
+        if words == []:
+            return True
+        command = words[0]
+        if command == "quit":
+            self.stop()
+            return False
+        if command == "stop":
+            self.stop()
+        elif command == "engine":
+            self.send(f"id name {self.name}")
+            self.send("ready")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "position":
+            self.stop()
+            snapshot, self.side = parse_position(words)
+            self.game = Game.from_snapshot(snapshot, self.players)
+        elif command == "go":
+            self.stop()
+            self.go(words[1:])
+        return True
+
+    def go(self, options):
+        """
+        Starts a search of the current position in a thread.
+
+        Input:
+            options (list[str]) - the words after go
+        """
+        depth = None
+        end_time = None
+        nodes = None
+        index = 0
+        while index < len(options):
+            option = options[index]
+            if option == "ponder":
+                depth = UNLIMITED_DEPTH
+            elif option == "depth":
+                depth = int(options[index + 1])
+                index += 1
+            elif option == "movetime":
+                end_time = time.time() + int(options[index + 1]) / 1000
+                index += 1
+            elif option == "nodes":
+                nodes = int(options[index + 1])
+                index += 1
+            index += 1
+        if depth is None:
+            depth = self.depth if end_time is None and nodes is None else UNLIMITED_DEPTH
+
+        self.searcher.stop = SearchLimits(self.searcher, end_time, nodes)
+        self._thread = threading.Thread(target=self._search, args=(self.game, depth),
+                                        daemon=True)
+        self._thread.start()
+
+    def _search(self, game, depth):
+        if game is None:
+            self.send("bestmove none")
+            return
+        _, move = self.searcher.search(game, self.players[self.side], depth)
+        if move is None:
+            self.send("bestmove none")
+        else:
+            self.send("bestmove " + format_move(move[0].position, move[1]))
+
+    def stop(self):
+        """
+        Ends the current search, if there is one, and waits for its bestmove
+        to be sent.
+        """
+        if self._thread is not None:
+            self.searcher.stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def run(self, input_stream=None):
+        """
+        Reads commands until quit or the end of the input.
+        """
+        input_stream = sys.stdin if input_stream is None else input_stream
+        for line in input_stream:
+            if not self.handle_command(line):
+                return
+        self.stop()
+
+
+class EnginePlayer(Player):
+    """
+    A bot that chooses its moves by asking an engine running in another
+    process. While the opponent is thinking, the engine can ponder on the
+    position in its own process.
+    Public attributes:
+        name: str: name that is also a parameter of a parent class
+        color: color of the pieces of a given bot
+        command: list[str]: the command that starts the engine
+        depth: int: depth limit of a search, or None
+        movetime: int: time limit of a search in milliseconds, or None
+        nodes: int: node limit of a search, or None
+        ponder: bool: whether the engine searches while the opponent thinks
+    """
+    def __init__(self, name: str, color: str, command, depth=None, movetime=None,
+                 nodes=None, ponder=True):
+        super().__init__(name=name, color=color)
+        self.command = command
+        self.depth = depth
+        self.movetime = movetime
+        self.nodes = nodes
+        self.ponder = ponder
+        self._process = None
+        self._pondering = False
+
+    def _start(self):
+        self._process = subprocess.Popen(self.command, stdin=subprocess.PIPE,
+                                         stdout=subprocess.PIPE, text=True, bufsize=1)
+        self._send("engine")
+        while self._read() != ["ready"]:
+            pass
+
+    def _send(self, line):
+        self._process.stdin.write(line + "\n")
+        self._process.stdin.flush()
+
+    def _read(self):
+        line = self._process.stdout.readline()
+        if line == "":
+            raise EngineError(f"The engine {self.command} has stopped")
+        return line.split()
+
+    def _read_bestmove(self):
+        """
+        Output:
+            list[str] - the words of the move after bestmove
+        """
+        while True:
+            words = self._read()
+            if words[:1] == ["bestmove"]:
+                return words[1:]
+
+    def choose_move(self, board, possible_moves):
+        """
+        Chooses a move by asking the engine
+        :param board: Board class instance: current game_board, it has to
+                      know the players of the game
+        :param possible_moves: list of moves
+        :return: [GamePiece, list[tuple(int, int)]]: one of the possible moves
+        :raises EngineError: if the engine answers with a move that cannot be
+                             read or is not one of the possible moves. Only
+                             "bestmove none" makes the bot play the first
+                             possible move.
+        """
+        if self._process is None:
+            self._start()
+        if self._pondering:
+            self._send("stop")
+            self._read_bestmove()
+            self._pondering = False
+
+        game = Game.from_board(board)
+        side = board.players.index(self)
+        self._send(format_position(game.snapshot(), side))
+        limits = ["go"]
+        if self.depth is not None:
+            limits += ["depth", str(self.depth)]
+        if self.movetime is not None:
+            limits += ["movetime", str(self.movetime)]
+        if self.nodes is not None:
+            limits += ["nodes", str(self.nodes)]
+        self._send(" ".join(limits))
+        words = self._read_bestmove()
+
+        if words == ["none"]:
+            move = possible_moves[0]
+        else:
+            try:
+                origin, path = parse_move(words)
+            except (ValueError, IndexError):
+                raise EngineError(f"The engine {self.command} sent a move that cannot be "
+                                  f"read: {' '.join(words)}")
+            matching = [possible_move for possible_move in possible_moves
+                        if possible_move[0].position == origin
+                        and list(possible_move[1]) == path]
+            if matching == []:
+                raise EngineError(f"The engine {self.command} sent an illegal move: "
+                                  f"{' '.join(words)}")
+            move = matching[0]
+
+        if self.ponder:
+            # The engine thinks about the position after the move until it
+            # is asked for the next one
+            game.apply_move(game.players[side], move[0].position, move[1])
+            self._send(format_position(game.snapshot(), 1 - side))
+            self._send("go ponder")
+            self._pondering = True
+        return move
+
+    def close(self):
+        """
+        Stops the engine.
+        """
+        if self._process is not None:
+            try:
+                self._send("quit")
+                self._process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._process.wait()
+            self._process = None
+            self._pondering = False
+
+
+@click.command(name="checkers-engine")
+@click.option('--depth', default=DEFAULT_DEPTH,
+              help="Depth searched to when go gives no limits")
+@click.option('--table-entries', default=1 << 18,
+              help="Number of entries of the transposition table")
+def cmd(depth, table_entries):
+    """
+    Runs the engine on the standard input and output.
+    """
+    Engine(depth=depth, table_entries=table_entries).run()
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,371 @@
+"""
+This is a file that contains an evaluation of positions that is kept up to
+date incrementally while moves are made and taken back.
+
+The evaluation is a weighted sum of features of every piece:
+- men - 1 for every man
+- kings - 1 for every king
+- advancement - how many rows a man has moved towards the row where it
+                becomes a king
+- center - how close a piece is to the middle columns of the board
+- back_rank - 1 for every man still guarding its own back row, which keeps
+              the opponent from making kings
+- mobility - number of squares on the board the piece could step to, which
+             is lower for pieces stuck at the edges
+
+Every feature of a piece depends only on its square, its owner and whether
+it is a king, so the features of all the squares of a board size are
+computed once. An EvaluationAccumulator is added to a game as a tracker
+(see Game.add_tracker); it adds or subtracts the features of a single piece
+whenever the piece is moved, captured or made a king, so evaluating a
+position never rescans the board.
+
+Weights can also be learned (see td_training.py) and saved to a file, which
+bots load with load_weights. Such a file can hold a small neural network
+over the same features instead of a weighted sum.
+"""
+
+import json
+import math
+import os
+
+FEATURE_NAMES = ["men", "kings", "advancement", "center", "back_rank", "mobility"]
+
+# Weights files (see save_weights) start with these, so that a bot can tell
+# whether it is able to read them
+WEIGHTS_FORMAT = "checkers-evaluation-weights"
+WEIGHTS_VERSION = 1
+
+DEFAULT_WEIGHTS = {
+    "men": 100,
+    "kings": 175,
+    "advancement": 3,
+    "center": 2,
+    "back_rank": 8,
+    "mobility": 2,
+}
+
+
+def _square_features(number_of_rows, number_of_cols, row, col, player_index, is_king):
+    """
+    Computes the features of a single piece.
+
+    Input:
+        number_of_rows, number_of_cols (int) - size of the board
+        row, col (int) - position of the piece
+        player_index (int) - index of the owner in game.players
+        is_king (bool) - whether the piece is a king
+    Output:
+        list[int] - values of the features, in the order of FEATURE_NAMES
+    """
+    # Player 1 starts at the top and moves down the rows, player 2 moves up
+    direction = 1 if player_index % 2 == 0 else -1
+    home_row = 0 if direction == 1 else number_of_rows - 1
+    rows_advanced = abs(row - home_row)
+
+    half_width = (number_of_cols - 1) / 2
+    center = int(half_width - abs(col - half_width))
+
+    if is_king:
+        steps = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+    else:
+        steps = ((direction, 1), (direction, -1))
+    mobility = 0
+    for row_step, col_step in steps:
+        if 0 <= row + row_step < number_of_rows and 0 <= col + col_step < number_of_cols:
+            mobility += 1
+
+    return [
+        0 if is_king else 1,
+        1 if is_king else 0,
+        0 if is_king else rows_advanced,
+        center,
+        1 if not is_king and row == home_row else 0,
+        mobility,
+    ]
+
+
+_features_by_size = {}
+
+
+def get_square_features(number_of_rows, number_of_cols):
+    """
+    Input:
+        number_of_rows, number_of_cols (int) - size of the board
+    Output:
+        list - features of every kind of piece on every square, indexed as
+               [2 * player index + is king][row * number_of_cols + col].
+               Computed once per board size.
+    """
+    size = (number_of_rows, number_of_cols)
+    if size not in _features_by_size:
+        table = []
+        for kind in range(4):
+            table.append([_square_features(number_of_rows, number_of_cols,
+                                           row, col, kind // 2, kind % 2 == 1)
+                          for row in range(number_of_rows)
+                          for col in range(number_of_cols)])
+        _features_by_size[size] = table
+    return _features_by_size[size]
+
+
+class EvaluationAccumulator:
+    """
+    This class keeps the features of both players up to date as a tracker
+    of a game.
+
+    Public Attributes:
+        - weights (list[float]) - weight of every feature, in the order of
+                                  FEATURE_NAMES
+    """
+
+    def __init__(self, weights=None):
+        """
+        Input:
+            weights (dict or list) - weights of the features by name, or as a
+                                     list in the order of FEATURE_NAMES.
+                                     DEFAULT_WEIGHTS are used if not given.
+        """
+        if weights is None:
+            weights = DEFAULT_WEIGHTS
+        if isinstance(weights, dict):
+            weights = [weights[name] for name in FEATURE_NAMES]
+        self.weights = list(weights)
+        self._player_index = {}
+        self._features = [[0] * len(FEATURE_NAMES), [0] * len(FEATURE_NAMES)]
+        self._scores = [0, 0]
+        self._square_features = None
+        self._square_scores = None
+        self._number_of_cols = 0
+
+    def reset(self, game):
+        """
+        Reads the whole position of a game.
+
+        Input:
+            game (Game) - the game to evaluate
+        """
+        board = game.board
+        self._number_of_cols = board.number_of_cols
+        self._square_features = get_square_features(board.number_of_rows,
+                                                    board.number_of_cols)
+        self._square_scores = [[sum(weight * value for weight, value
+                                    in zip(self.weights, features))
+                                for features in kind]
+                               for kind in self._square_features]
+        self._player_index = {player: index % 2 for index, player
+                              in enumerate(game.players)}
+        self._features = [[0] * len(FEATURE_NAMES), [0] * len(FEATURE_NAMES)]
+        self._scores = [0, 0]
+        for player in game.players:
+            for piece in game.pieces_dict[player]:
+                self.add_piece(game, piece)
+
+    def add_piece(self, game, piece):
+        """
+        Adds the features of a piece on its current square.
+        """
+        self._update(piece, 1)
+
+    def remove_piece(self, game, piece):
+        """
+        Subtracts the features of a piece on its current square.
+        """
+        self._update(piece, -1)
+
+    def _update(self, piece, sign):
+        index = self._player_index[piece.player]
+        kind = 2 * index + (1 if piece.is_king else 0)
+        square = piece.position[0] * self._number_of_cols + piece.position[1]
+        features = self._features[index]
+        for feature, value in enumerate(self._square_features[kind][square]):
+            features[feature] += sign * value
+        self._scores[index] += sign * self._square_scores[kind][square]
+
+    def features(self, player):
+        """
+        Input:
+            player (Player) - the player from whose point of view the
+                              features are given
+        Output:
+            list[int] - the player's features minus the opponent's, in the
+                        order of FEATURE_NAMES
+        """
+        index = self._player_index[player]
+        own = self._features[index]
+        other = self._features[1 - index]
+        return [own[feature] - other[feature] for feature in range(len(own))]
+
+    def evaluate(self, game, player):
+        """
+        Evaluates the position in constant time. Has the same arguments as
+        search.material_evaluation, so it can be used by a Searcher.
+
+        Input:
+            game (Game) - the game the accumulator is tracking
+            player (Player) - the player from whose point of view the
+                              game is evaluated
+        Output:
+            (int) - the score of the position, positive if the player is ahead
+        """
+        index = self._player_index[player]
+        return round(self._scores[index] - self._scores[1 - index])
+
+
+class NetworkWeights:
+    """
+    This class holds a small neural network that evaluates positions from
+    the same features as the weighted sum: one hidden layer of tanh units
+    and a linear output. The network has no biases, so swapping the players
+    (which negates every feature) negates the score, as a negamax search
+    expects.
+
+    Public Attributes:
+        - input_scale (list[float]) - every feature is divided by its scale
+                                      before it goes into the network
+        - hidden (list[list[float]]) - weights of every hidden unit
+        - output (list[float]) - weight of every hidden unit in the output
+        - score_scale (float) - the output is multiplied by it to get a score
+    """
+
+    def __init__(self, input_scale, hidden, output, score_scale):
+        self.input_scale = list(input_scale)
+        self.hidden = [list(unit) for unit in hidden]
+        self.output = list(output)
+        self.score_scale = score_scale
+
+    def score(self, features):
+        """
+        Input:
+            features (list[int]) - a player's features minus the opponent's
+        Output:
+            (float) - the score of the position for the player
+        """
+        inputs = [value / scale for value, scale in zip(features, self.input_scale)]
+        total = 0.0
+        for unit, weight in zip(self.hidden, self.output):
+            total += weight * math.tanh(sum(w * value for w, value in zip(unit, inputs)))
+        return self.score_scale * total
+
+
+class NetworkAccumulator(EvaluationAccumulator):
+    """
+    This class keeps the features of both players up to date like an
+    EvaluationAccumulator, but scores them with a NetworkWeights.
+
+    Public Attributes:
+        - network (NetworkWeights) - the network that scores positions
+    """
+
+    def __init__(self, network):
+        super().__init__()
+        self.network = network
+
+    def evaluate(self, game, player):
+        return round(self.network.score(self.features(player)))
+
+
+def make_accumulator(weights=None):
+    """
+    Input:
+        weights (dict, list or NetworkWeights) - weights of the features, or
+                                                 a network, for example
+                                                 loaded by load_weights
+    Output:
+        (EvaluationAccumulator) - an accumulator that evaluates with them
+    """
+    if isinstance(weights, NetworkWeights):
+        return NetworkAccumulator(weights)
+    return EvaluationAccumulator(weights)
+
+
+def attach_evaluation(game, weights=None):
+    """
+    Creates an accumulator and adds it to the trackers of a game.
+
+    Input:
+        game (Game) - the game to evaluate
+        weights (dict, list or NetworkWeights) - weights of the features
+    Output:
+        (EvaluationAccumulator)
+    """
+    accumulator = make_accumulator(weights)
+    game.add_tracker(accumulator)
+    return accumulator
+
+
+def save_weights(path, weights, number_of_rows, number_of_cols, details=None):
+    """
+    Saves weights as a JSON file that bots can load with load_weights.
+    The file is written under another name first and then renamed, so a bot
+    never reads a half-written file.
+
+    Input:
+        path (str) - path of the file
+        weights (list or NetworkWeights) - weights of the features, in the
+                                           order of FEATURE_NAMES, or a network
+        number_of_rows, number_of_cols (int) - size of the board the weights
+                                               were made for
+        details (dict) - anything else to keep in the file, for example how
+                         the weights were trained
+    """
+    data = {
+        "format": WEIGHTS_FORMAT,
+        "version": WEIGHTS_VERSION,
+        "board": [number_of_rows, number_of_cols],
+        "features": FEATURE_NAMES,
+        "details": {} if details is None else details,
+    }
+    if isinstance(weights, NetworkWeights):
+        data["model"] = "network"
+        data["network"] = {"input_scale": weights.input_scale, "hidden": weights.hidden,
+                           "output": weights.output, "score_scale": weights.score_scale}
+    else:
+        data["model"] = "linear"
+        data["weights"] = list(weights)
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w") as file:
+        json.dump(data, file)
+    os.replace(temporary_path, path)
+
+
+def weights_board(path):
+    """
+    Input:
+        path (str) - path of a file made by save_weights
+    Output:
+        tuple(int, int) - number of rows and of columns of the board the
+                          weights were made for
+    """
+    with open(path) as file:
+        return tuple(json.load(file)["board"])
+
+
+def load_weights(path, number_of_rows=None, number_of_cols=None):
+    """
+    Input:
+        path (str) - path of a file made by save_weights
+        number_of_rows, number_of_cols (int) - if given, the size of the
+                                               board the weights have to be
+                                               made for
+    Output:
+        (list or NetworkWeights) - weights that can be given to a SearchBot
+    Raises:
+        ValueError - if the file is not a weights file, was made by a newer
+                     version or for another board
+    """
+    with open(path) as file:
+        data = json.load(file)
+    if data.get("format") != WEIGHTS_FORMAT:
+        raise ValueError(f"{path} is not a file of evaluation weights")
+    if data["version"] > WEIGHTS_VERSION:
+        raise ValueError(f"{path} was made by a newer version (version {data['version']})")
+    if data["features"] != FEATURE_NAMES:
+        raise ValueError(f"{path} uses other features: {data['features']}")
+    if number_of_rows is not None and data["board"] != [number_of_rows, number_of_cols]:
+        raise ValueError(f"{path} was made for a {data['board'][0]} x {data['board'][1]} board")
+    if data["model"] == "network":
+        network = data["network"]
+        return NetworkWeights(network["input_scale"], network["hidden"], network["output"],
+                              network["score_scale"])
+    return data["weights"]
@@ -1,5 +1,93 @@
 from board import Board
 from game_piece import GamePiece
+
+
+class MaterialCounter:
+    """
+    A tracker (see Game.add_tracker) that counts the men and the kings of
+    every player.
+
+    Public attributes of this class:
+    - men: dictionary of the number of men of every player.
+
+    - kings: dictionary of the number of kings of every player.
+    """
+
+    def __init__(self):
+        self.men = {}
+        self.kings = {}
+
+    def reset(self, game):
+        """
+        Counts the pieces of a game from scratch
+        :param game
+            the game to count the pieces of
+        """
+        self.men = {player: 0 for player in game.players}
+        self.kings = {player: 0 for player in game.players}
+        for player in game.players:
+            for piece in game.pieces_dict[player]:
+                self.add_piece(game, piece)
+
+    def add_piece(self, game, piece):
+        if piece.is_king:
+            self.kings[piece.player] += 1
+        else:
+            self.men[piece.player] += 1
+
+    def remove_piece(self, game, piece):
+        if piece.is_king:
+            self.kings[piece.player] -= 1
+        else:
+            self.men[piece.player] -= 1
+
+
+class MoveDelta:
+    """
+    A compact description of a move made with Game.make_move, so that
+    whatever follows the game can update itself without rescanning the board.
+
+    Public attributes of this class:
+    - player: the player who made the move.
+
+    - origin: (int, int) - the position of the piece before the move.
+
+    - path: list[(int, int)] - the squares the piece moved through.
+
+    - captured: list[GamePiece] - pieces captured by the move, in the order
+                they were captured (needed by Game.unmake_move).
+
+    - captured_squares: list[(int, int)] - the squares the captured pieces
+                were on.
+
+    - was_king: whether the piece was a king before the move.
+
+    - promoted: whether the piece became a king during the move.
+    """
+    __slots__ = ("player", "origin", "path", "captured", "captured_squares",
+                 "was_king", "promoted")
+
+    def __init__(self, player, origin, path, captured, was_king, promoted):
+        self.player = player
+        self.origin = origin
+        self.path = path
+        self.captured = captured
+        self.captured_squares = [piece.position for piece in captured]
+        self.was_king = was_king
+        self.promoted = promoted
+
+    def __repr__(self):
+        return (f"MoveDelta({self.origin} -> {self.path}, captured="
+                f"{self.captured_squares}, promoted={self.promoted})")
+
+
+class IllegalMoveError(Exception):
+    """
+    Raised by Game.apply_move when a move is not one of the legal moves of
+    the position.
+    """
+
+
 class Game:
     """
     This class represents a collection of functionality
@@ -16,14 +104,25 @@ class Game:
     - board: Board object created from the input data.
     
     - pieces_dict: dictionary of game pieces.
+
+    - trackers: objects that keep some information about the position up to
+                date as pieces are added, moved and removed, instead of
+                rescanning the board (see add_tracker).
+
+    - material: MaterialCounter that keeps the number of men and kings of
+                every player (see men_counts and king_counts).
     """
 
     def __init__(self, players, number_populated_rows, width=8):
         self.players = players
         self.number_populated_rows = number_populated_rows
         self.width = width
-        self.board = Board(number_populated_rows*2 + 2, width)
+        self.board = Board(number_populated_rows*2 + 2, width, players)
         self.pieces_dict = {}
+        self.trackers = []
+        # Legal moves of the players in the current position, by player
+        self._legal_moves = {}
+        self.observers = []
 
         # Setting up the pieces_dict
         for player in self.players:
@@ -32,6 +131,35 @@ class Game:
         # Setting the board with pieces
         self.__populate_board()
 
+        self.material = MaterialCounter()
+        self.add_tracker(self.material)
+
+    @property
+    def men_counts(self):
+        """
+        dict[Player, int] - number of men of every player
+        """
+        return self.material.men
+
+    @property
+    def king_counts(self):
+        """
+        dict[Player, int] - number of kings of every player
+        """
+        return self.material.kings
+
+    def reset_trackers(self):
+        """
+        Makes all the trackers read the position again. It has to be called
+        after pieces were placed or removed without the methods of the game,
+        for example when setting up a position by hand.
+        :returns
+            None
+        """
+        self._legal_moves = {}
+        for tracker in self.trackers:
+            tracker.reset(self)
+
     def get_possible_moves_for_piece(self, piece):
         """
         finds possible moves for a given piece
@@ -82,7 +210,7 @@ class Game:
             moves_formatted.append([piece, move])
         return moves_formatted
 
-    def get_all_jumps_moves (self, start_pos, piece, blocked_pos=[]):
+    def get_all_jumps_moves (self, start_pos, piece, blocked_pos=None):
         """
         finds all possible jumps for a given piece
         :param start_pos
@@ -95,6 +223,8 @@ class Game:
             either list[(int,int)] which is a list of tuples of coordinates, representing jumps,
             or None
         """
+        if blocked_pos is None:
+            blocked_pos = []
         player = piece.player
         direction = -1 if (self.players.index(player) % 2 == 0) else 1
         if piece.is_king:
@@ -153,6 +283,46 @@ class Game:
             list_to_return += self.get_possible_moves_for_piece(piece)
         return list_to_return
 
+    def get_legal_moves(self, player):
+        """
+        finds possible moves for a given player, indexed so that a move can be
+        looked up in constant time. The moves are only generated once per
+        position: the result is kept until make_move or unmake_move is called
+        :param player
+            Player for whom possible moves are found
+        :returns
+            dict[((int, int), tuple((int, int))), (piece, [(int, int)])] - the
+            moves of get_possible_moves by the initial position of the piece
+            and the path it takes
+        """
+        if player not in self._legal_moves:
+            legal_moves = {}
+            for move in self.get_possible_moves(player):
+                key = (tuple(move[0].position), tuple(tuple(square) for square in move[1]))
+                legal_moves[key] = move
+            self._legal_moves[player] = legal_moves
+        return self._legal_moves[player]
+
+    def apply_move(self, player, origin, path):
+        """
+        Checks that a move is legal and makes it. Nothing is changed if it is
+        not, so it is safe to use with moves from untrusted sources
+        :param player:
+            Player - the player making the move
+        :param origin:
+            (int, int) - the position of the piece to move
+        :param path:
+            list[(int, int)] - the squares the piece moves through
+        :returns
+            MoveDelta - the move that was made, as with make_move
+        :raises: IllegalMoveError if the move is not legal
+        """
+        key = (tuple(origin), tuple(tuple(square) for square in path))
+        move = self.get_legal_moves(player).get(key)
+        if move is None:
+            raise IllegalMoveError(f"{player} cannot move from {origin} along {path}")
+        return self.make_move(move)
+
     def get_all_jumps(self, player):
         """
         finds all possible jump-moves for a given player
@@ -192,16 +362,170 @@ class Game:
         """
         Moves a Game_Piece from initial position to final position on the grid
         removes a Piece from the board if the 'jump-move' was performed
-        :param initial_pos:
-            (int, int) - represents the coordinates of the piece as (row, col)
-        :param final_pos:
-            (int, int) - represents the coordinates of the piece as (row, col)
+        :param move:
+            [GamePiece, list[(int, int)]] - the piece and the path it takes
         :returns
-            None
+            MoveDelta - what the move changed. It is also passed to every
+            observer (see add_observer)
         """
+        if self._legal_moves:
+            self._legal_moves = {}
         piece = move[0]
         list_of_movements = move[1]
+        origin = piece.position
+        was_king = piece.is_king
+        captured = []
         for transposition in list_of_movements:
-            self.board.move_piece(piece.position, transposition, self)
+            captured_piece = self.board.move_piece(piece.position, transposition, self)
+            if captured_piece is not None:
+                captured.append(captured_piece)
+        delta = MoveDelta(piece.player, origin, list(list_of_movements), captured,
+                          was_king, piece.is_king and not was_king)
+        for observer in self.observers:
+            observer(self, delta)
+        return delta
 
+    def unmake_move(self, piece, initial_pos, was_king, captured):
+        """
+        Takes back a move made with make_move, so that a search can explore
+        a position without copying the game
+        :param piece:
+            GamePiece - the piece that was moved
+        :param initial_pos:
+            (int, int) - the position of the piece before the move
+        :param was_king:
+            bool - whether the piece was a king before the move
+        :param captured:
+            list[GamePiece] - the captured pieces of the MoveDelta returned
+            by make_move
+        :returns
+            None
+        """
+        if self._legal_moves:
+            self._legal_moves = {}
+        for tracker in self.trackers:
+            tracker.remove_piece(self, piece)
+        self.board.grid[piece.position[0]][piece.position[1]] = None
+        piece.position = initial_pos
+        piece.is_king = was_king
+        self.board.place_piece(piece)
+        for tracker in self.trackers:
+            tracker.add_piece(self, piece)
+        for captured_piece in reversed(captured):
+            self.board.place_piece(captured_piece)
+            self.pieces_dict[captured_piece.player].append(captured_piece)
+            for tracker in self.trackers:
+                tracker.add_piece(self, captured_piece)
+
+    def add_tracker(self, tracker):
+        """
+        Adds an object that follows the changes of the position. The tracker
+        needs three methods:
+            reset(game) - called once here, to read the whole position
+            add_piece(game, piece) - called when a piece appears on a square,
+                                     or becomes a king
+            remove_piece(game, piece) - called when a piece leaves a square,
+                                        or is about to become a king
+        A move is then reported as a removal followed by an addition, so a
+        tracker only has to know how a single piece on a single square
+        contributes to what it keeps.
+        :param tracker:
+            the object to add
+        :returns
+            None
+        """
+        tracker.reset(self)
+        self.trackers.append(tracker)
 
+    def add_observer(self, observer):
+        """
+        Subscribes a function to the moves of the game. It is called as
+        observer(game, delta) after every make_move, with the MoveDelta of the
+        move. Moves taken back with unmake_move are not reported, as they are
+        only used by searches on copies of the game.
+        :param observer:
+            the function to call
+        :returns
+            None
+        """
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        """
+        Stops calling a function added with add_observer.
+        :param observer:
+            the function to remove
+        :returns
+            None
+        """
+        self.observers.remove(observer)
+
+    def remove_tracker(self, tracker):
+        """
+        Stops telling a tracker about the changes of the position.
+        :param tracker:
+            a tracker added with add_tracker
+        :returns
+            None
+        """
+        self.trackers.remove(tracker)
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Creates a game with a copy of the position on the board, so that the
+        copy can be changed without affecting the original game
+        :param board:
+            Board - a board that knows its players
+        :returns
+            Game - a game with the same players and pieces
+        :raises: Exception if the board does not know its players
+        """
+        if board.players is None:
+            raise Exception("The board does not know the players playing on it")
+        pieces = []
+        for row in board.grid:
+            for piece in row:
+                if piece is not None:
+                    pieces.append((piece.position[0], piece.position[1],
+                                   board.players.index(piece.player), piece.is_king))
+        return cls.from_snapshot((board.number_of_rows, board.number_of_cols, tuple(pieces)),
+                                 board.players)
+
+    def snapshot(self):
+        """
+        Makes a compact copy of the position that can be saved or sent to
+        another process
+        :returns
+            tuple(int, int, tuple) - number of rows, number of columns and the
+            pieces as (row, col, index of the player, is king) sorted by position
+        """
+        pieces = []
+        for index, player in enumerate(self.players):
+            for piece in self.pieces_dict[player]:
+                pieces.append((piece.position[0], piece.position[1], index, piece.is_king))
+        pieces.sort()
+        return (self.board.number_of_rows, self.board.number_of_cols, tuple(pieces))
+
+    @classmethod
+    def from_snapshot(cls, snapshot, players):
+        """
+        Creates a game in the position saved with snapshot
+        :param snapshot:
+            tuple - a position made by snapshot
+        :param players:
+            list[Player] - players of the game, in the order of their turns
+        :returns
+            Game - a game in the saved position
+        """
+        number_of_rows, number_of_cols, pieces = snapshot
+        game = cls(players, 0, number_of_cols)
+        game.number_populated_rows = (number_of_rows - 2) // 2
+        game.board = Board(number_of_rows, number_of_cols, players)
+        for row, col, index, is_king in pieces:
+            piece = GamePiece((row, col), players[index])
+            piece.is_king = is_king
+            game.board.place_piece(piece)
+            game.pieces_dict[players[index]].append(piece)
+        game.reset_trackers()
+        return game
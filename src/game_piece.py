@@ -18,12 +18,21 @@ class GamePiece:
     def __repr__(self):
         return f"{self.player}"
 
-    def transform(self):
+    def transform(self, game=None):
         """
         Transforms a game piece into a king 
-        :param None
-            only self
+        :param game
+            the game the piece is in, so that its trackers are told about
+            the change. Can be omitted for pieces that are not in a game
         :returns
             None
         """
-        self.is_king = True
\ No newline at end of file
+        if self.is_king:
+            return
+        if game is not None:
+            for tracker in game.trackers:
+                tracker.remove_piece(game, self)
+        self.is_king = True
+        if game is not None:
+            for tracker in game.trackers:
+                tracker.add_piece(game, self)
@@ -29,8 +29,8 @@ import click
 from player import Player
 from board import Board
 from game_piece import GamePiece
-from bot import CheckersBot, RandomBot
 from game import Game
+from match import make_player
 from tui import is_bot
 
 WIDTH = 600
@@ -43,7 +43,6 @@ GREEN = (25, 176, 95)
 BLUE = (0, 120, 224)
 YELLOW = (245, 245, 44)
 BROWN = (166, 75, 0)
-SCREEN = pygame.display.set_mode((WIDTH, HEIGHT))
 
 
 def is_players_piece(surface, coordinates, player_color):
@@ -97,8 +96,8 @@ def draw_board(game, surface, game_piece = None) -> None:
 
     
     # Compute the row height and column width
-    row_height = HEIGHT // nrows + 1
-    column_width = WIDTH // ncols + 1
+    row_height = surface.get_height() // nrows + 1
+    column_width = surface.get_width() // ncols + 1
 
     # Draw the board
     board_squares = []
@@ -148,6 +147,14 @@ def draw_board(game, surface, game_piece = None) -> None:
                     color = RED
                 if piece.player.color == "Black":
                     color = BLACK
+                if piece.player.color not in ("Red", "Black"):
+                    # Players without a colour that pygame knows, like the
+                    # Player("Player 1", "") of the engine, are drawn red
+                    # and black in the order of their turns
+                    try:
+                        color = pygame.Color(piece.player.color)
+                    except ValueError:
+                        color = RED if piece.player is game.players[0] else BLACK
                 center = (j * column_width + column_width // 2, i * row_height + row_height // 2)
                 radius = row_height // 2 - 8
                 if not piece.is_king:
@@ -160,8 +167,10 @@ def draw_board(game, surface, game_piece = None) -> None:
                     radius = radius - 16
                     pygame.draw.circle(surface, color=color,
                                     center=center, radius=radius)
-                    
-    pygame.display.flip()
+
+    # Offscreen surfaces (see render.py) are not shown in a window
+    if surface is pygame.display.get_surface():
+        pygame.display.flip()
 
 def play_checkers(game):
     '''
@@ -173,8 +182,9 @@ def play_checkers(game):
     '''
     # Initialize Pygame
     pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Checkers")
-    draw_board(game, SCREEN)
+    draw_board(game, screen)
 
     # 
     current_player = game.players[0]
@@ -191,14 +201,14 @@ def play_checkers(game):
                 sys.exit()
         if not is_bot(current_player):
             if event.type == pygame.MOUSEMOTION:
-                    if is_players_piece(SCREEN, event.pos, current_player.color): 
+                    if is_players_piece(screen, event.pos, current_player.color): 
                         board_color = get_position(event.pos, game)
                         for piece in game.pieces_dict[current_player]:
                             if piece.position == board_color:
                                 selected = piece
                                 break
 
-                        draw_board(game, SCREEN, game_piece=selected)
+                        draw_board(game, screen, game_piece=selected)
                         pygame.display.update()
 
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -208,14 +218,14 @@ def play_checkers(game):
                             temp = current_player
                             current_player = next_player
                             next_player = temp
-                            draw_board(game, SCREEN)
+                            draw_board(game, screen)
         else:
             move = current_player.choose_move(game.board, game.get_possible_moves(current_player))
             game.make_move(move)
             temp = current_player
             current_player = next_player
             next_player = temp
-            draw_board(game, SCREEN)
+            draw_board(game, screen)
    
     print(f"{next_player} WON!")
     pygame.quit()
@@ -275,19 +285,8 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         width (int) - width of the board
         rows_with_pieces (int) - number of rows with pieces
     """
-    if player_1_type == "random-bot":
-        player_1 = RandomBot("random-bot-1","Red")
-    elif player_1_type == "smart-bot":
-        player_1 = CheckersBot("smart-bot-1","Red")
-    else:
-        player_1 = Player(player_1_type, "Red")
-
-    if player_2_type == "random-bot":
-        player_2 = RandomBot("random-bot-2","Black")
-    elif player_2_type == "smart-bot":
-        player_2 = CheckersBot("smart-bot-2","Black")
-    else:
-        player_2 = Player(player_2_type, "Black")
+    player_1 = make_player(player_1_type, 1, "Red")
+    player_2 = make_player(player_2_type, 2, "Black")
 
     players = [player_1, player_2]
     game = Game(players, rows_with_pieces, width)
@@ -0,0 +1,132 @@
+"""
+This is a file that contains logic for suggesting moves to a real player.
+
+Every legal move of the player is analysed in a separate process: the move
+is made and the best answer of the opponent is searched until a common
+deadline. Moves are then ranked by how good they are for the player. The
+processes are kept between hints, so only the first hint pays for starting
+them.
+"""
+
+import os
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+from game import Game
+from player import Player
+from search import Searcher, WIN_SCORE
+
+
+class Deadline:
+    """
+    A stop flag for a Searcher (see Searcher.stop) that is set once a given
+    time has passed.
+    """
+
+    def __init__(self, end_time):
+        """
+        Input:
+            end_time (float) - time.time() at which the search has to stop
+        """
+        self.end_time = end_time
+
+    def is_set(self):
+        return time.time() >= self.end_time
+
+
+def _analyse_move(snapshot, side, move, depth, end_time, quiescence_nodes):
+    """
+    Searches the position after a move, inside of a worker process.
+
+    Input:
+        snapshot (tuple) - the position before the move, made by Game.snapshot
+        side (int) - index of the player making the move
+        move (tuple) - the move as (initial position, path)
+        depth (int) - depth the move is searched to, the move itself included
+        end_time (float) - time.time() at which the search has to stop
+        quiescence_nodes (int) - node budget of a quiescence search
+    Output:
+        tuple(int, int) - score of the move for the player making it and the
+                          depth it was searched to (0 if the search did not
+                          finish a single iteration)
+    """
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = Game.from_snapshot(snapshot, players)
+    position, path = move
+    game.make_move([game.board.grid[position[0]][position[1]], path])
+
+    opponent = players[1 - side]
+    if game.get_possible_moves(opponent) == []:
+        return WIN_SCORE, depth
+    searcher = Searcher(quiescence_nodes=quiescence_nodes, stop=Deadline(end_time))
+    score, _ = searcher.search(game, opponent, max(depth - 1, 1))
+    return -score, searcher.completed_depth + 1 if searcher.completed_depth else 0
+
+
+def _shut_down(executor):
+    executor.shutdown(cancel_futures=True)
+
+
+class HintAnalyser:
+    """
+    This class ranks the moves of a player using a pool of processes.
+
+    Public Attributes:
+        - depth (int) - number of plies every move is searched to
+        - seconds (float) - time budget of a hint
+        - processes (int) - number of processes analysing moves
+        - quiescence_nodes (int) - node budget of a quiescence search
+    """
+
+    def __init__(self, depth=4, seconds=2.0, processes=None, quiescence_nodes=1000):
+        self.depth = depth
+        self.seconds = seconds
+        self.processes = os.cpu_count() if processes is None else processes
+        self.quiescence_nodes = quiescence_nodes
+        self._executor = None
+        self._finalizer = None
+
+    def analyse(self, game, player):
+        """
+        Scores every legal move of the player.
+
+        Input:
+            game (Game) - the game that is being played
+            player (Player) - the player whose turn it is
+        Output:
+            list[tuple(int, int, [GamePiece, list[tuple(int,int)]])] - score,
+                  searched depth and move, best move first. Moves that could
+                  not be searched in time come last, with a depth of 0.
+        """
+        moves = game.get_possible_moves(player)
+        if moves == []:
+            return []
+        if self._executor is None:
+            # The processes are only started once the first hint is asked for
+            self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            self._finalizer = weakref.finalize(self, _shut_down, self._executor)
+
+        snapshot = game.snapshot()
+        side = game.players.index(player)
+        end_time = time.time() + self.seconds
+        futures = [self._executor.submit(_analyse_move, snapshot, side,
+                                         (move[0].position, list(move[1])),
+                                         self.depth, end_time, self.quiescence_nodes)
+                   for move in moves]
+
+        ranking = []
+        for move, future in zip(moves, futures):
+            score, depth = future.result()
+            ranking.append((score, depth, move))
+        ranking.sort(key=lambda entry: (entry[1] > 0, entry[0]), reverse=True)
+        return ranking
+
+    def close(self):
+        """
+        Stops the processes.
+        """
+        if self._finalizer is not None:
+            self._finalizer()
+            self._executor = None
+            self._finalizer = None
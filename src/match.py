@@ -0,0 +1,265 @@
+"""
+This is a file that contains logic for playing games between bots without
+any user interface, as fast as the bots can choose their moves.
+
+The same player objects are used for every game, so bots that keep some
+state between moves (search tables, helper processes) only set it up once.
+"""
+
+import json
+import shlex
+import time
+
+from game import Game
+from player import Player
+from adjudication import Adjudicator
+from bot import CheckersBot, RandomBot, load_parameters
+from search import SearchBot
+from parallel_search import ParallelSearchBot
+from engine import EnginePlayer
+from evaluation import load_weights, weights_board
+
+
+class MatchResult:
+    """
+    This class describes how a single game ended.
+
+    Public Attributes:
+        - winner (int) - index of the player that won, or None for a draw
+        - plies (int) - number of moves made in the game
+        - reason (str) - why the game was ended by adjudication, or None if
+                         a player had no moves left
+    """
+
+    def __init__(self, winner, plies, reason=None):
+        self.winner = winner
+        self.plies = plies
+        self.reason = reason
+
+
+def play_match(players, rows_with_pieces, width=8, adjudicator=None, record=None,
+               opening=None):
+    """
+    Plays a single game between two bots.
+
+    Input:
+        players (list[Player]) - the bots, the first one moves first
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        adjudicator (Adjudicator) - ends games that would never finish. A new
+                                    one with the default rules if not given.
+        record (GameRecord) - if given, the moves of the game are added to it
+        opening (list[tuple(tuple(int,int), list[tuple(int,int)])]) - moves
+                    made before the bots start playing, as (initial position
+                    of the piece, path), see random_opening
+    Output:
+        (MatchResult)
+    """
+    if adjudicator is None:
+        adjudicator = Adjudicator()
+    game = Game(players, rows_with_pieces, width)
+    if record is not None:
+        game.add_observer(record.add_delta)
+    turn = 0
+    for origin, path in opening or []:
+        game.apply_move(players[turn % 2], origin, path)
+        turn += 1
+    current_player = players[turn % 2]
+    adjudicator.start(game, current_player)
+
+    while True:
+        possible_moves = game.get_possible_moves(current_player)
+        if possible_moves == []:
+            result = MatchResult((turn + 1) % 2, turn)
+            break
+
+        move = current_player.choose_move(game.board, possible_moves)
+        delta = game.make_move(move)
+
+        turn += 1
+        current_player = players[turn % 2]
+        verdict = adjudicator.record_move(game, delta.was_king, delta.captured,
+                                          current_player)
+        if verdict is not None:
+            winner, reason = verdict
+            result = MatchResult(None if winner is None else players.index(winner),
+                                 turn, reason)
+            break
+
+    if record is not None:
+        record.result = result.winner
+    return result
+
+
+def random_opening(rows_with_pieces, width, plies, rng):
+    """
+    Chooses random moves to start a game with, so that a series of games
+    between deterministic bots is not the same game over and over.
+
+    Input:
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        plies (int) - number of moves of the opening
+        rng (random.Random) - the source of randomness
+    Output:
+        list[tuple(tuple(int,int), list[tuple(int,int)])] - the moves, as
+              (initial position of the piece, path). It is shorter than
+              plies if a player runs out of moves.
+    """
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = Game(players, rows_with_pieces, width)
+    opening = []
+    for ply in range(plies):
+        possible_moves = game.get_possible_moves(players[ply % 2])
+        if possible_moves == []:
+            break
+        move = possible_moves[rng.randrange(len(possible_moves))]
+        opening.append((move[0].position, list(move[1])))
+        game.make_move(move)
+    # The opening should not leave the game already decided. Without its
+    # last move, the player who made it is to move, so they have a move.
+    if opening and game.get_possible_moves(players[len(opening) % 2]) == []:
+        opening.pop()
+    return opening
+
+
+class MatchStats:
+    """
+    This class sums up the results of a series of games.
+
+    Public Attributes:
+        - games (int) - number of games played
+        - wins (list[int]) - number of games won by every player
+        - draws (int) - number of games that ended with a draw
+        - plies (int) - number of moves made in all the games
+        - seconds (float) - time it took to play the games
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = [0, 0]
+        self.draws = 0
+        self.plies = 0
+        self.seconds = 0.0
+
+    def add(self, result):
+        """
+        Input:
+            result (MatchResult) - the result of one more game
+        """
+        self.games += 1
+        self.plies += result.plies
+        if result.winner is None:
+            self.draws += 1
+        else:
+            self.wins[result.winner] += 1
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def average_plies(self):
+        return self.plies / self.games if self.games > 0 else 0.0
+
+
+def play_matches(players, games, rows_with_pieces, width=8, adjudicator=None):
+    """
+    Plays a series of games between the same two bots.
+
+    Input:
+        players (list[Player]) - the bots, the first one moves first
+        games (int) - number of games to play
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        adjudicator (Adjudicator) - the rules used to end games that would
+                                    never finish
+    Output:
+        (MatchStats)
+    """
+    if adjudicator is None:
+        adjudicator = Adjudicator()
+    stats = MatchStats()
+    start = time.perf_counter()
+    for _ in range(games):
+        stats.add(play_match(players, rows_with_pieces, width, adjudicator))
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def parse_parameters(text):
+    """
+    Input:
+        text (str) - a JSON list of the parameters of a CheckersBot, in the
+                     order of bot.PARAMETER_NAMES, or the path of a file made
+                     by bot.save_parameters
+    Output:
+        list[float] - the parameters
+    """
+    if text.startswith("["):
+        return json.loads(text)
+    return load_parameters(text)
+
+
+def make_player(player_type, number, color):
+    """
+    Creates a player from the value of a --player-N-type flag.
+
+    Input:
+        player_type (str) - a bot type, "engine:<command>" for an engine
+                            started with the command (see engine.py),
+                            "search-bot:<path>" for a search-bot with the
+                            weights in a file (see evaluation.load_weights),
+                            "smart-bot:<path>" or "smart-bot:[<values>]" for
+                            a smart-bot with other parameters (see
+                            parse_parameters), or the name of a real player
+        number (int) - number of the player, used in the names of bots
+        color (str) - colour of the pieces of the player
+    Output:
+        (Player)
+    """
+    if player_type == "random-bot":
+        return RandomBot(f"random-bot-{number}", color)
+    elif player_type == "smart-bot":
+        return CheckersBot(f"smart-bot-{number}", color)
+    elif player_type.startswith("smart-bot:"):
+        return CheckersBot(f"smart-bot-{number}", color,
+                           parse_parameters(player_type[len("smart-bot:"):]))
+    elif player_type == "search-bot":
+        return SearchBot(f"search-bot-{number}", color)
+    elif player_type.startswith("search-bot:"):
+        path = player_type[len("search-bot:"):]
+        return SearchBot(f"search-bot-{number}", color, weights=load_weights(path),
+                         weights_board=weights_board(path))
+    elif player_type == "parallel-search-bot":
+        return ParallelSearchBot(f"parallel-search-bot-{number}", color)
+    elif player_type.startswith("engine:"):
+        return EnginePlayer(f"engine-{number}", color,
+                            shlex.split(player_type[len("engine:"):]))
+    return Player(player_type, color)
+
+
+# Players created by cached_player, so that every process only makes them once
+_cached_players = {}
+
+
+def cached_player(spec, label):
+    """
+    Gives the same player every time it is asked for the same one, so that
+    bots running in worker processes keep their tables between tasks.
+
+    Input:
+        spec (str or function) - a player type (see make_player), or a
+                                 function that creates a Player
+        label (str) - tells two players of the same type apart, for example
+                      "A" and "B"
+    Output:
+        (Player)
+    """
+    key = (spec, label)
+    if key not in _cached_players:
+        if callable(spec):
+            _cached_players[key] = spec()
+        else:
+            _cached_players[key] = make_player(spec, label, "")
+    return _cached_players[key]
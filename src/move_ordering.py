@@ -0,0 +1,239 @@
+"""
+This is a file that contains move-ordering heuristics for searches built on
+Game.get_possible_moves.
+
+Alpha-beta search prunes the most when the best move is searched first.
+MoveOrderer puts moves in the following order:
+1. The move that was best in an earlier search of the position
+2. Jumps, the ones that capture the most pieces first
+3. Moves that turn a piece into a king
+4. Killer moves - quiet moves that caused a cutoff at the same ply
+5. Other quiet moves, by their score in the history table
+
+Any object with the order, cutoff and new_search methods of MoveOrderer can
+be given to a Searcher, for example NoOrdering to turn ordering off.
+"""
+
+
+def move_key(move):
+    """
+    Input:
+        move ([GamePiece, list[tuple(int,int)]]) - a move in a format used by Game
+    Output:
+        tuple - a hashable key of the move: (initial position, path)
+    """
+    return (move[0].position, tuple(move[1]))
+
+
+def is_jump(move):
+    """
+    Input:
+        move ([GamePiece, list[tuple(int,int)]]) - a move in a format used by Game
+    Output:
+        True - if the move is a jump
+        False - otherwise
+    """
+    return abs(move[0].position[0] - move[1][0][0]) >= 2
+
+
+def capture_count(move):
+    """
+    Input:
+        move ([GamePiece, list[tuple(int,int)]]) - a move in a format used by Game
+    Output:
+        (int) - number of pieces the move captures
+    """
+    return len(move[1]) if is_jump(move) else 0
+
+
+def is_promotion(move, number_of_rows):
+    """
+    Input:
+        move ([GamePiece, list[tuple(int,int)]]) - a move in a format used by Game
+        number_of_rows (int) - length of the vertical side of the board
+    Output:
+        True - if the move turns a piece into a king
+        False - otherwise
+    """
+    if move[0].is_king:
+        return False
+    for position in move[1]:
+        if position[0] == 0 or position[0] == number_of_rows - 1:
+            return True
+    return False
+
+
+class KillerMoves:
+    """
+    This class remembers, for every ply, the last few quiet moves that caused
+    a beta cutoff. Sibling positions often have the same refutation.
+
+    Public Attributes:
+        - slots (int) - number of killer moves kept per ply
+    """
+
+    def __init__(self, slots=2):
+        self.slots = slots
+        self._killers = []
+
+    def add(self, ply, move):
+        """
+        Input:
+            ply (int) - distance from the root of the search
+            move ([GamePiece, list[tuple(int,int)]]) - the move that caused a cutoff
+        """
+        while len(self._killers) <= ply:
+            self._killers.append([])
+        killers = self._killers[ply]
+        key = move_key(move)
+        if key in killers:
+            return
+        killers.insert(0, key)
+        del killers[self.slots:]
+
+    def rank(self, ply, move):
+        """
+        Input:
+            ply (int) - distance from the root of the search
+            move ([GamePiece, list[tuple(int,int)]]) - a move to check
+        Output:
+            (int) - 0 for the newest killer move of the ply, 1 for the next
+                    one and so on, or None if the move is not a killer move
+        """
+        if ply >= len(self._killers):
+            return None
+        key = move_key(move)
+        killers = self._killers[ply]
+        return killers.index(key) if key in killers else None
+
+    def clear(self):
+        self._killers = []
+
+
+class HistoryTable:
+    """
+    This class scores quiet moves by how often they caused cutoffs anywhere in
+    the tree (a butterfly table indexed by the initial and the final position
+    of the piece). Deeper cutoffs count for more.
+    """
+
+    def __init__(self):
+        self._scores = {}
+
+    def add(self, move, depth):
+        """
+        Input:
+            move ([GamePiece, list[tuple(int,int)]]) - the move that caused a cutoff
+            depth (int) - remaining depth at which the cutoff happened
+        """
+        key = (move[0].position, move[1][-1])
+        self._scores[key] = self._scores.get(key, 0) + depth * depth
+
+    def score(self, move):
+        """
+        Input:
+            move ([GamePiece, list[tuple(int,int)]]) - a move to score
+        Output:
+            (int) - the history score of the move
+        """
+        return self._scores.get((move[0].position, move[1][-1]), 0)
+
+    def age(self):
+        """
+        Halves all the scores, so that old searches count for less than
+        the current one.
+        """
+        for key in self._scores:
+            self._scores[key] //= 2
+
+    def clear(self):
+        self._scores = {}
+
+
+class MoveOrderer:
+    """
+    This class orders moves for an alpha-beta search with the heuristics
+    described at the top of the file.
+
+    Public Attributes:
+        - killers (KillerMoves) - killer moves, or None to not use them
+        - history (HistoryTable) - history table, or None to not use it
+    """
+
+    def __init__(self, use_killers=True, use_history=True, killer_slots=2):
+        self.killers = KillerMoves(killer_slots) if use_killers else None
+        self.history = HistoryTable() if use_history else None
+
+    def new_search(self):
+        """
+        Prepares the orderer for a search from a new root position.
+        """
+        if self.killers is not None:
+            self.killers.clear()
+        if self.history is not None:
+            self.history.age()
+
+    def order(self, moves, ply, board, best_move=None):
+        """
+        Sorts moves so that the most promising ones come first.
+
+        Input:
+            moves (list) - moves in a format used by Game
+            ply (int) - distance from the root of the search
+            board (Board) - the board the moves are made on
+            best_move (tuple) - key (see move_key) of a move to search first
+        Output:
+            (list) - the same moves in a new order
+        """
+        if len(moves) < 2:
+            return moves
+
+        def priority(move):
+            if best_move is not None and move_key(move) == best_move:
+                return (0, 0)
+            captures = capture_count(move)
+            if captures > 0:
+                return (1, -captures)
+            if is_promotion(move, board.number_of_rows):
+                return (2, 0)
+            if self.killers is not None:
+                rank = self.killers.rank(ply, move)
+                if rank is not None:
+                    return (3, rank)
+            if self.history is not None:
+                return (4, -self.history.score(move))
+            return (4, 0)
+
+        return sorted(moves, key=priority)
+
+    def cutoff(self, move, ply, depth):
+        """
+        Records a move that caused a beta cutoff. Only quiet moves are
+        recorded, as jumps are ordered first anyway.
+
+        Input:
+            move ([GamePiece, list[tuple(int,int)]]) - the move
+            ply (int) - distance from the root of the search
+            depth (int) - remaining depth at which the cutoff happened
+        """
+        if is_jump(move):
+            return
+        if self.killers is not None:
+            self.killers.add(ply, move)
+        if self.history is not None:
+            self.history.add(move, depth)
+
+
+class NoOrdering:
+    """
+    An orderer that keeps moves in the order they were generated in.
+    """
+
+    def new_search(self):
+        pass
+
+    def order(self, moves, ply, board, best_move=None):
+        return moves
+
+    def cutoff(self, move, ply, depth):
+        pass
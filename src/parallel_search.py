@@ -0,0 +1,250 @@
+"""
+This is a file that contains a search that uses several processes at once
+(the "Lazy SMP" approach).
+
+All the processes search the same root position independently, but they
+share one transposition table kept in multiprocessing.shared_memory. A
+position searched by one process is then found in the table by the others,
+so together they finish the search sooner than one process would. Helper
+processes search to slightly different depths so that they do not all
+follow exactly the same path through the tree.
+
+The table is written without locks; see transposition.py for how torn
+entries are detected.
+"""
+
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from game import Game
+from player import Player
+from search import Searcher, find_matching_move
+from transposition import TranspositionTable
+
+# The start of the shared memory block is reserved for the stop flag
+CONTROL_BYTES = 64
+
+
+class SharedFlag:
+    """
+    A flag kept in a byte of shared memory, that can be set by one process
+    and read by others. It has the same methods as threading.Event that
+    a Searcher needs.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def is_set(self):
+        return self._buffer[0] != 0
+
+    def set(self):
+        self._buffer[0] = 1
+
+    def clear(self):
+        self._buffer[0] = 0
+
+    def release(self):
+        self._buffer.release()
+
+
+class SharedSearchMemory:
+    """
+    This class holds a block of shared memory with a stop flag and a
+    transposition table in it.
+
+    Public Attributes:
+        - name (str) - name other processes can attach to the block with
+        - entries (int) - number of entries of the table
+        - flag (SharedFlag) - flag that tells the searches to stop
+        - table (TranspositionTable) - the shared table
+    """
+
+    def __init__(self, entries, name=None):
+        """
+        Input:
+            entries (int) - number of entries of the table
+            name (str) - name of an existing block to attach to. If not given,
+                         a new block is created and this object owns it.
+        """
+        size = CONTROL_BYTES + TranspositionTable.bytes_needed(entries)
+        self._owner = name is None
+        if self._owner:
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        self.name = self._memory.name
+        self.entries = entries
+        self.flag = SharedFlag(self._memory.buf[:CONTROL_BYTES])
+        self._table_buffer = self._memory.buf[CONTROL_BYTES:]
+        self.table = TranspositionTable(entries, self._table_buffer)
+
+    def close(self):
+        """
+        Detaches from the block, and frees it if this object created it.
+        """
+        self.table.release()
+        self._table_buffer.release()
+        self.flag.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+# Blocks that a helper process has attached to, by name, so that a helper
+# attaches only once however many searches it runs
+_attached_memory = {}
+
+
+def _helper_search(memory_name, entries, snapshot, side, depth, quiescence_nodes,
+                   weights):
+    """
+    Runs a search inside of a helper process, until it finishes or the
+    stop flag is set.
+
+    Input:
+        memory_name (str) - name of the shared memory block
+        entries (int) - number of entries of the shared table
+        snapshot (tuple) - the root position, made by Game.snapshot
+        side (int) - index of the player to move
+        depth (int) - depth to search to
+        quiescence_nodes (int) - node budget of a quiescence search
+        weights (dict) - weights of the evaluation
+    Output:
+        tuple(int, int, tuple) - depth of the last finished iteration, its
+              score and its best move as (initial position, path)
+    """
+    if memory_name not in _attached_memory:
+        _attached_memory[memory_name] = SharedSearchMemory(entries, memory_name)
+    memory = _attached_memory[memory_name]
+
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = Game.from_snapshot(snapshot, players)
+    searcher = Searcher(quiescence_nodes=quiescence_nodes, table=memory.table,
+                        stop=memory.flag, weights=weights)
+    score, move = searcher.search(game, players[side], depth)
+    if move is None:
+        return searcher.completed_depth, score, None
+    return searcher.completed_depth, score, (move[0].position, list(move[1]))
+
+
+def _shut_down(executor, memory):
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+    memory.close()
+
+
+class ParallelSearcher:
+    """
+    This class runs a search in this process together with helper processes
+    that share its transposition table. The pool of helpers and the table
+    are kept between searches.
+
+    Public Attributes:
+        - workers (int) - number of processes searching, this one included
+        - memory (SharedSearchMemory) - the shared stop flag and table
+        - searcher (Searcher) - the search that runs in this process
+        - completed_depth (int) - depth of the result of the last search
+    """
+
+    def __init__(self, workers=None, table_entries=1 << 18, quiescence_nodes=1000,
+                 weights=None):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.quiescence_nodes = quiescence_nodes
+        self.weights = weights
+        self.memory = SharedSearchMemory(table_entries)
+        self.searcher = Searcher(quiescence_nodes=quiescence_nodes,
+                                 table=self.memory.table, weights=weights)
+        self.completed_depth = 0
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers - 1)
+        self._finalizer = weakref.finalize(self, _shut_down, self._executor,
+                                           self.memory)
+
+    def search(self, game, player, depth):
+        """
+        Finds the best move for the player. Takes the same arguments and
+        returns the same result as Searcher.search.
+        """
+        snapshot = game.snapshot()
+        side = game.players.index(player)
+        self.memory.flag.clear()
+
+        helpers = []
+        if self._executor is not None:
+            for index in range(1, self.workers):
+                helpers.append(self._executor.submit(
+                    _helper_search, self.memory.name, self.memory.entries,
+                    snapshot, side, depth + index % 2, self.quiescence_nodes,
+                    self.weights))
+
+        score, move = self.searcher.search(game, player, depth)
+        self.completed_depth = self.searcher.completed_depth
+        self.memory.flag.set()
+
+        # A helper may have finished a deeper search before it was stopped
+        for helper in helpers:
+            helper_depth, helper_score, helper_move = helper.result()
+            if helper_depth > self.completed_depth and helper_move is not None:
+                piece = game.board.grid[helper_move[0][0]][helper_move[0][1]]
+                possible_moves = game.get_possible_moves(player)
+                move = find_matching_move(possible_moves, [piece, helper_move[1]])
+                score = helper_score
+                self.completed_depth = helper_depth
+        return score, move
+
+    def close(self):
+        """
+        Stops the helper processes and frees the shared memory.
+        """
+        self._finalizer()
+
+
+class ParallelSearchBot(Player):
+    """
+    A bot that chooses its moves with a search spread over several processes.
+    Public attributes:
+        name: str: name that is also a parameter of a parent class
+        color: color of the pieces of a given bot
+        depth: int: number of plies searched before the quiescence search
+        workers: int: number of processes searching, None for one per CPU
+    """
+    def __init__(self, name: str, color: str, depth=6, workers=None,
+                 table_entries=1 << 18, quiescence_nodes=1000, weights=None):
+        super().__init__(name=name, color=color)
+        self.depth = depth
+        self.workers = workers
+        self.table_entries = table_entries
+        self.quiescence_nodes = quiescence_nodes
+        self.weights = weights
+        self._searcher = None
+
+    def choose_move(self, board, possible_moves):
+        """
+        Chooses the move with the best score found by the search
+        :param board: Board class instance: current game_board, it has to
+                      know the players of the game
+        :param possible_moves: list of moves
+        :return: [GamePiece, list[tuple(int, int)]]: one of the possible moves
+        """
+        if len(possible_moves) == 1:
+            return possible_moves[0]
+        if self._searcher is None:
+            # The processes are only started once the bot is first asked to move
+            self._searcher = ParallelSearcher(self.workers, self.table_entries,
+                                              self.quiescence_nodes, self.weights)
+
+        game = Game.from_board(board)
+        _, best_move = self._searcher.search(game, self, self.depth)
+        return find_matching_move(possible_moves, best_move)
+
+    def close(self):
+        """
+        Stops the processes of the bot.
+        """
+        if self._searcher is not None:
+            self._searcher.close()
+            self._searcher = None
@@ -0,0 +1,146 @@
+"""
+This is a file that contains a transposition table kept in a file on disk,
+so that search results survive between runs.
+
+The file is memory-mapped, so looking up a position costs the same as with
+a table in memory, and several processes can open the same file at once
+(writes go through the same lock-free scheme as the shared table, see
+transposition.py). Positions are keyed by their Zobrist hash, which also
+includes the size of the board, so one file can hold results of all board
+sizes.
+
+The size of the file is fixed when it is created. The header of the file
+counts the runs that opened it, and every entry is marked with the run
+that stored it (see TranspositionTable.generation). Within a run, an entry
+is only replaced by a search that is at least as deep, as deep results are
+the most expensive ones to compute again, but entries of other positions
+stored by earlier runs always make way for the results of the current one.
+
+Scores depend on the evaluation and on how deep captures are searched, so
+a fingerprint of these settings (see settings_fingerprint) is kept in the
+header too. A file with another fingerprint, or that is not a cache, is
+replaced with an empty cache. New files are written under another name
+and then renamed, so a process that has the old file open keeps reading it
+and is never left with a truncated file.
+
+Example:
+>>> cache = PersistentCache("analysis.cache", max_bytes=64 * 1024 * 1024)
+>>> searcher = Searcher(table=cache)
+>>> ...
+>>> cache.close()
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from transposition import TranspositionTable, GENERATIONS
+
+MAGIC = b"CKRSTT02"
+# Magic, number of entries, fingerprint and number of runs
+HEADER_FORMAT = "<8sQQQ"
+HEADER_BYTES = 64
+_RUNS_OFFSET = struct.calcsize("<8sQQ")
+
+
+def settings_fingerprint(settings):
+    """
+    Input:
+        settings - anything JSON-serializable (objects are serialized with
+                   their attributes) that the scores of a search depend on
+    Output:
+        (int) - a 64-bit fingerprint of the settings
+    """
+    text = json.dumps(settings, sort_keys=True, default=vars)
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+class PersistentCache(TranspositionTable):
+    """
+    This class is a transposition table stored in a memory-mapped file.
+
+    Public Attributes:
+        - path (str) - path of the file
+        - entries (int) - number of entries the file can hold
+        - fingerprint (int) - fingerprint of the settings of the search
+                              that stores its results in the cache
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, fingerprint=0):
+        """
+        Opens the cache file, or creates it if it does not exist. A file
+        that is not a cache, that is larger than max_bytes or that was made
+        with another fingerprint is replaced with an empty cache.
+
+        Input:
+            path (str) - path of the file
+            max_bytes (int) - largest size the file may have
+            fingerprint (int) - see settings_fingerprint
+        """
+        self.path = path
+        self.fingerprint = fingerprint
+        entries = self._read_entries(path, max_bytes, fingerprint)
+        if entries is None:
+            entries = (max_bytes - HEADER_BYTES) // TranspositionTable.bytes_needed(1)
+            if entries < 1:
+                raise Exception("The cache must be large enough for one entry")
+            self._create(path, entries, fingerprint)
+
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(),
+                              HEADER_BYTES + TranspositionTable.bytes_needed(entries))
+        # Every run gets a new generation
+        runs = struct.unpack_from("<Q", self._map, _RUNS_OFFSET)[0] + 1
+        struct.pack_into("<Q", self._map, _RUNS_OFFSET, runs)
+        self._table_buffer = memoryview(self._map)[HEADER_BYTES:]
+        super().__init__(entries, self._table_buffer, depth_preferred=True)
+        self.generation = runs % GENERATIONS
+
+    @staticmethod
+    def _read_entries(path, max_bytes, fingerprint):
+        """
+        Output:
+            (int) - number of entries of an existing usable cache file, or None
+        """
+        if not os.path.exists(path):
+            return None
+        size = os.path.getsize(path)
+        if size < HEADER_BYTES or size > max_bytes:
+            return None
+        with open(path, "rb") as file:
+            magic, entries, file_fingerprint, _ = struct.unpack(
+                HEADER_FORMAT, file.read(struct.calcsize(HEADER_FORMAT)))
+        if magic != MAGIC or size != HEADER_BYTES + TranspositionTable.bytes_needed(entries) \
+                or file_fingerprint != fingerprint:
+            return None
+        return entries
+
+    @staticmethod
+    def _create(path, entries, fingerprint):
+        """
+        Writes an empty cache file with room for the given number of entries.
+        """
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            header = struct.pack(HEADER_FORMAT, MAGIC, entries, fingerprint, 0)
+            file.write(header + bytes(HEADER_BYTES - len(header)))
+            file.truncate(HEADER_BYTES + TranspositionTable.bytes_needed(entries))
+        os.replace(temporary_path, path)
+
+    def flush(self):
+        """
+        Writes the changes to the disk without closing the file.
+        """
+        self._map.flush()
+
+    def close(self):
+        """
+        Writes the changes to the disk and closes the file.
+        """
+        self.release()
+        self._table_buffer.release()
+        self._map.flush()
+        self._map.close()
+        self._file.close()
@@ -0,0 +1,119 @@
+"""
+This is a file that contains logic for letting a search bot think while its
+opponent, a real player, is choosing a move.
+
+A Ponderer searches the position after every move the real player can make,
+in a background thread. The results go into the transposition table of the
+bot, so once the real player has moved, the bot finds the position it has to
+answer already searched (or partly searched) in its table and answers
+without searching it again.
+
+The thread spends most of its time while the main thread is waiting for the
+user to type something in, so it does not slow the interface down.
+
+Example:
+>>> ponderer = Ponderer(bot)
+>>> ponderer.start(game, human)
+>>> move = tui.get_player_move(human, game)
+>>> ponderer.stop()
+"""
+
+import threading
+
+from game import Game
+from search import Searcher, SearchBot
+
+
+def can_ponder(player):
+    """
+    Input:
+        player (Player) - a player of the game
+    Output:
+        True - if the player is a bot that can use the results of pondering
+        False - otherwise
+    """
+    return isinstance(player, SearchBot) and player.searcher.table is not None
+
+
+class Ponderer:
+    """
+    This class searches the answers of a bot to all the moves of its opponent
+    in a background thread.
+
+    Public Attributes:
+        - bot (SearchBot) - the bot that the answers are searched for
+        - searcher (Searcher) - the search used in the thread. It shares the
+                                transposition table of the bot.
+        - positions (int) - number of positions after a move of the opponent
+                            searched to the full depth of the bot during the
+                            last pondering
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.searcher = Searcher(quiescence_nodes=bot.searcher.quiescence_nodes,
+                                 table=bot.searcher.table, stop=threading.Event(),
+                                 weights=bot.searcher.weights)
+        self.positions = 0
+        self._thread = None
+
+    def start(self, game, opponent):
+        """
+        Starts pondering on the position before a move of the opponent.
+        The game itself is not changed; the thread works on copies of it.
+
+        Input:
+            game (Game) - the game that is being played
+            opponent (Player) - the player who is about to move
+        """
+        self.stop()
+        snapshot = game.snapshot()
+        moves = [(move[0].position, list(move[1]))
+                 for move in game.get_possible_moves(opponent)]
+        self.positions = 0
+        self.searcher.stop.clear()
+        self._thread = threading.Thread(target=self._ponder,
+                                        args=(snapshot, game.players, moves),
+                                        daemon=True)
+        self._thread.start()
+
+    def _ponder(self, snapshot, players, moves):
+        """
+        Searches the answers to all the moves one ply deeper at a time, so
+        that every move gets at least a shallow answer if the opponent moves
+        quickly.
+        """
+        games = []
+        for position, path in moves:
+            game = Game.from_snapshot(snapshot, players)
+            game.make_move([game.board.grid[position[0]][position[1]], path])
+            games.append(game)
+
+        for depth in range(1, self.bot.depth + 1):
+            for game in games:
+                self.searcher.search(game, self.bot, depth)
+                if self.searcher.stop.is_set():
+                    return
+                if depth == self.bot.depth:
+                    self.positions += 1
+
+    def wait(self, timeout=None):
+        """
+        Waits until the answers to all the moves are searched.
+
+        Input:
+            timeout (float) - longest time to wait in seconds, None to wait
+                              for as long as it takes
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self):
+        """
+        Stops pondering. It has to be called before the bot searches with
+        the same table itself.
+        """
+        if self._thread is not None:
+            self.searcher.stop.set()
+            self._thread.join()
+            self._thread = None
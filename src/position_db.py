@@ -0,0 +1,337 @@
+"""
+This is a file that contains a database of the positions of recorded games
+(see record.py and selfplay.py), so that questions like "what is played
+from this position and how well does it score" are answered with a single
+indexed query instead of replaying every game.
+
+The database is a SQLite file with two tables:
+- positions - for every position: how many games went through it, and how
+              many of them the player to move won, drew and lost
+- moves - for every move made from a position: the same counts, and the
+          hash of the position the move leads to
+
+Positions are keyed by their Zobrist hash (see zobrist.py) together with
+the number of rows and columns of the board. Both tables are stored in the
+order of their keys (WITHOUT ROWID), and the moves also have an index by
+the number of games that holds every column, so listing the continuations
+of a position from the most played one never reads the table itself.
+
+A position or a move that is repeated within a game (for example when
+kings move back and forth) is counted once for that game. Records are
+added in batches: the counts of a whole batch are summed up in memory first and written in a single transaction, with one statement per
+distinct position and move.
+
+To add the records of self-play and list the moves from the starting
+position, run the following from the root of the repository:
+
+    python3 src/position_db.py ingest --database positions.db games.jsonl
+    python3 src/position_db.py query --database positions.db --width 8 --rows-with-pieces 3
+"""
+
+import sqlite3
+
+import click
+
+from player import Player
+from record import GameRecord
+from selfplay import load_records
+from zobrist import get_keys, hash_game, update_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    hash INTEGER NOT NULL,
+    number_of_rows INTEGER NOT NULL,
+    number_of_cols INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (hash, number_of_rows, number_of_cols)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS moves (
+    hash INTEGER NOT NULL,
+    number_of_rows INTEGER NOT NULL,
+    number_of_cols INTEGER NOT NULL,
+    move TEXT NOT NULL,
+    next_hash INTEGER NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    PRIMARY KEY (hash, number_of_rows, number_of_cols, move)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS moves_by_games ON moves (
+    hash, number_of_rows, number_of_cols, games DESC, move, next_hash, wins, draws, losses
+);
+"""
+
+ADD_POSITION = """
+INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (hash, number_of_rows, number_of_cols) DO UPDATE SET
+    games = games + excluded.games, wins = wins + excluded.wins,
+    draws = draws + excluded.draws, losses = losses + excluded.losses
+"""
+
+ADD_MOVE = """
+INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (hash, number_of_rows, number_of_cols, move) DO UPDATE SET
+    games = games + excluded.games, wins = wins + excluded.wins,
+    draws = draws + excluded.draws, losses = losses + excluded.losses
+"""
+
+# Answered from the moves_by_games index alone
+CONTINUATIONS = """
+SELECT move, next_hash, games, wins, draws, losses FROM moves INDEXED BY moves_by_games
+WHERE hash = ? AND number_of_rows = ? AND number_of_cols = ? AND games >= ?
+ORDER BY games DESC, move
+"""
+
+
+def to_signed(position_hash):
+    """
+    Input:
+        position_hash (int) - 64-bit hash of a position
+    Output:
+        (int) - the same bits as a signed integer, which SQLite can store
+    """
+    return position_hash - (1 << 64) if position_hash >= 1 << 63 else position_hash
+
+
+def move_text(origin, path):
+    """
+    Input:
+        origin (tuple(int,int)) - square the piece starts on
+        path (list[tuple(int,int)]) - squares the piece moves through
+    Output:
+        (str) - the move as "row,col row,col ...", like in the protocol of
+                server.py
+    """
+    return " ".join(f"{row},{col}" for row, col in [origin] + list(path))
+
+
+class MoveStatistics:
+    """
+    This class holds what the database knows about a move from a position.
+
+    Public Attributes:
+        - move (str) - the move, see move_text
+        - next_hash (int) - hash of the position the move leads to
+        - games (int) - number of games the move was made in
+        - wins, draws, losses (int) - results of these games for the player
+                                      who made the move
+    """
+
+    def __init__(self, move, next_hash, games, wins, draws, losses):
+        self.move = move
+        self.next_hash = next_hash
+        self.games = games
+        self.wins = wins
+        self.draws = draws
+        self.losses = losses
+
+    def win_rate(self):
+        """
+        Output:
+            (float) - share of the games won by the player who made the
+                      move, with draws counted as half a win
+        """
+        return (self.wins + 0.5 * self.draws) / self.games
+
+
+class PositionDatabase:
+    """
+    This class adds recorded games to a database of positions and answers
+    queries about them.
+
+    Public Attributes:
+        - path (str) - path of the database file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def add_records(self, records, batch_size=1000):
+        """
+        Adds every position and move of the records.
+
+        Input:
+            records (iterable of GameRecord) - the games
+            batch_size (int) - number of records written per transaction
+        Output:
+            (int) - number of records added
+        """
+        added = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) == batch_size:
+                added += self._add_batch(batch)
+                batch = []
+        if batch:
+            added += self._add_batch(batch)
+        return added
+
+    def _add_batch(self, records):
+        positions = {}
+        moves = {}
+        for record in records:
+            players = [Player("Player 1", ""), Player("Player 2", "")]
+            game = record.new_game(players)
+            geometry = (game.board.number_of_rows, game.board.number_of_cols)
+            keys = get_keys(*geometry)
+            position_hash = hash_game(game, players[0])
+            # Positions and moves of this game that were already counted
+            counted = set()
+            for ply, (origin, path) in enumerate(record.moves):
+                player_index = ply % 2
+                if record.result is None:
+                    result = (0, 1, 0)
+                elif record.result == player_index:
+                    result = (1, 0, 0)
+                else:
+                    result = (0, 0, 1)
+
+                piece = game.board.grid[origin[0]][origin[1]]
+                was_king = piece.is_king
+                captured = game.apply_move(players[player_index], origin, path).captured
+                next_hash = update_hash(position_hash, keys, game, piece, tuple(origin),
+                                        was_king, captured)
+
+                key = (to_signed(position_hash),) + geometry
+                move_key = (key, move_text(origin, path), to_signed(next_hash))
+                if key not in counted:
+                    counted.add(key)
+                    _add_counts(positions, key, result)
+                if move_key not in counted:
+                    counted.add(move_key)
+                    _add_counts(moves, move_key, result)
+                position_hash = next_hash
+
+        with self._connection:
+            self._connection.executemany(
+                ADD_POSITION, [key + tuple(counts) for key, counts in positions.items()])
+            self._connection.executemany(
+                ADD_MOVE, [key + (move, next_hash) + tuple(counts)
+                           for (key, move, next_hash), counts in moves.items()])
+        return len(records)
+
+    def position(self, position_hash, number_of_rows, number_of_cols):
+        """
+        Input:
+            position_hash (int) - hash of the position, see zobrist.hash_game
+            number_of_rows, number_of_cols (int) - size of the board
+        Output:
+            tuple(int, int, int, int) - number of games through the position,
+                  and how many of them the player to move won, drew and lost.
+                  All 0 for a position that is not in the database.
+        """
+        row = self._connection.execute(
+            "SELECT games, wins, draws, losses FROM positions "
+            "WHERE hash = ? AND number_of_rows = ? AND number_of_cols = ?",
+            (to_signed(position_hash), number_of_rows, number_of_cols)).fetchone()
+        return (0, 0, 0, 0) if row is None else row
+
+    def continuations(self, position_hash, number_of_rows, number_of_cols, min_games=1):
+        """
+        Input:
+            position_hash (int) - hash of the position, see zobrist.hash_game
+            number_of_rows, number_of_cols (int) - size of the board
+            min_games (int) - moves made in fewer games are left out
+        Output:
+            list[MoveStatistics] - every move made from the position, from the
+                                   most played one
+        """
+        rows = self._connection.execute(
+            CONTINUATIONS, (to_signed(position_hash), number_of_rows, number_of_cols, min_games))
+        return [MoveStatistics(move, next_hash % (1 << 64), games, wins, draws, losses)
+                for move, next_hash, games, wins, draws, losses in rows]
+
+    def close(self):
+        self._connection.close()
+
+
+def _add_counts(table, key, result):
+    counts = table.get(key)
+    if counts is None:
+        counts = table[key] = [0, 0, 0, 0]
+    counts[0] += 1
+    for index, value in enumerate(result):
+        counts[index + 1] += value
+
+
+def parse_moves(text):
+    """
+    Input:
+        text (str) - moves separated by ";", each as in move_text
+    Output:
+        list[tuple(tuple(int,int), list[tuple(int,int)])] - the moves, as
+              in GameRecord.moves
+    """
+    moves = []
+    for move in text.split(";"):
+        if not move.strip():
+            continue
+        squares = [tuple(int(value) for value in square.split(","))
+                   for square in move.split()]
+        moves.append((squares[0], squares[1:]))
+    return moves
+
+
+@click.group(name="checkers-positions")
+def cmd():
+    """
+    Adds games to a database of positions or queries it.
+    """
+
+
+@cmd.command()
+@click.option('--database', default="positions.db", help="File of the database")
+@click.option('--batch-size', default=1000, help="Number of records added per transaction")
+@click.argument('paths', nargs=-1)
+def ingest(database, batch_size, paths):
+    """
+    Adds the records in files made by selfplay.py.
+    """
+    position_database = PositionDatabase(database)
+    for path in paths:
+        added = position_database.add_records(load_records(path), batch_size)
+        print(f"{added} records added from {path}")
+    position_database.close()
+
+
+@cmd.command()
+@click.option('--database', default="positions.db", help="File of the database")
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--moves', default="",
+              help='Moves from the starting position, for example "2,1 3,2; 5,0 4,1"')
+def query(database, width, rows_with_pieces, moves):
+    """
+    Lists the moves made from a position with their results.
+    """
+    record = GameRecord(width, rows_with_pieces)
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = record.new_game(players)
+    played = parse_moves(moves)
+    for ply, (origin, path) in enumerate(played):
+        game.apply_move(players[ply % 2], origin, path)
+    position_hash = hash_game(game, players[len(played) % 2])
+
+    position_database = PositionDatabase(database)
+    size = (game.board.number_of_rows, game.board.number_of_cols)
+    games, wins, draws, losses = position_database.position(position_hash, *size)
+    print(f"{games} games: {wins} won, {draws} drawn, {losses} lost by the player to move")
+    for statistics in position_database.continuations(position_hash, *size):
+        print(f"{statistics.move:<20} {statistics.games:>8} games "
+              f"{100 * statistics.win_rate():6.1f}% score")
+    position_database.close()
+
+
+if __name__ == "__main__":
+    cmd()
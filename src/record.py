@@ -0,0 +1,208 @@
+"""
+This is a file that contains logic for recording played games, so that
+they can be saved to disk and replayed later (rendering, analysis, etc.)
+"""
+
+import json
+
+from game import Game
+from player import Player
+
+
+class GameRecord:
+    """
+    This class stores everything needed to replay a game: the size of the
+    board and the list of moves that were made.
+
+    Public Attributes:
+        - width (int) - width of the board
+        - rows_with_pieces (int) - number of rows populated with pieces
+        - moves (list[tuple(tuple(int,int), list[tuple(int,int)])]) - moves
+                    as (initial position of the piece, path of the piece)
+        - result (int) - index of the player that won, or None if the game
+                    ended with a draw or has not finished yet
+    """
+
+    def __init__(self, width, rows_with_pieces, moves=None, result=None):
+        self.width = width
+        self.rows_with_pieces = rows_with_pieces
+        self.moves = [] if moves is None else moves
+        self.result = result
+
+    @classmethod
+    def for_game(cls, game):
+        """
+        Creates an empty record for a game that has not started yet.
+
+        Input:
+            game (Game) - the game that is going to be recorded
+        Output:
+            (GameRecord)
+        """
+        return cls(game.width, game.number_populated_rows)
+
+    def add_move(self, move):
+        """
+        Records a move. It has to be called before the move is made,
+        as the piece changes its position once the move is made.
+
+        Input:
+            move ([GamePiece, list[tuple(int,int)]]) - a move in a format
+                                                       used by Game
+        """
+        self.moves.append((tuple(move[0].position), list(move[1])))
+
+    def add_delta(self, game, delta):
+        """
+        Records a move that was already made. It can be added to a game as an
+        observer (see Game.add_observer), so that every move is recorded.
+
+        Input:
+            game (Game) - the game the move was made in
+            delta (MoveDelta) - the move, as returned by Game.make_move
+        """
+        self.moves.append((tuple(delta.origin), list(delta.path)))
+
+    def new_game(self, players=None):
+        """
+        Creates a game in the starting position of the record.
+
+        Input:
+            players (list[Player]) - players of the game. If not given,
+                                     two generic players are created
+        Output:
+            (Game)
+        """
+        if players is None:
+            players = [Player("Player 1", "Red"), Player("Player 2", "Black")]
+        return Game(players, self.rows_with_pieces, self.width)
+
+    def replay(self, players=None):
+        """
+        Replays the record move by move. The same game object is yielded
+        after every ply, so it should not be stored by the caller.
+
+        Input:
+            players (list[Player]) - players of the game
+        Output:
+            generator of (Game) - the game before the first move and after
+                                  every move made
+        """
+        game = self.new_game(players)
+        yield game
+        for origin, path in self.moves:
+            piece = game.board.grid[origin[0]][origin[1]]
+            game.make_move([piece, list(path)])
+            yield game
+
+    def to_dict(self):
+        """
+        Output:
+            (dict) - JSON-serializable representation of the record
+        """
+        return {
+            "width": self.width,
+            "rows_with_pieces": self.rows_with_pieces,
+            "moves": [[list(origin), [list(pos) for pos in path]]
+                      for origin, path in self.moves],
+            "result": self.result,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Input:
+            data (dict) - representation created by to_dict
+        Output:
+            (GameRecord)
+        """
+        moves = [(tuple(origin), [tuple(pos) for pos in path])
+                 for origin, path in data["moves"]]
+        return cls(data["width"], data["rows_with_pieces"], moves,
+                   data.get("result"))
+
+    def save(self, path):
+        """
+        Saves the record as a JSON file.
+
+        Input:
+            path (str) - path of the file
+        """
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file)
+
+
+class KeyframeIndex:
+    """
+    This class allows to get the position after any ply of a recorded game
+    without replaying it from the start. A snapshot of the position (see
+    Game.snapshot) is kept every `interval` plies, and a position is rebuilt
+    from the nearest keyframe before it, so at most interval - 1 moves have
+    to be made.
+
+    Public Attributes:
+        - record (GameRecord) - the game that is indexed
+        - interval (int) - number of plies between two keyframes
+        - players (list[Player]) - players of the rebuilt games
+        - keyframes (list[tuple]) - snapshots of the positions after
+                                    0, interval, 2 * interval, ... plies
+    """
+
+    def __init__(self, record, interval=16, players=None):
+        """
+        Replays the record once to take the keyframes.
+
+        Input:
+            record (GameRecord) - the game to index
+            interval (int) - number of plies between two keyframes
+            players (list[Player]) - players of the game
+        """
+        if interval < 1:
+            raise Exception("The interval between keyframes must be at least 1")
+        self.record = record
+        self.interval = interval
+        self.keyframes = []
+        game = None
+        for ply, game in enumerate(record.replay(players)):
+            if ply % interval == 0:
+                self.keyframes.append(game.snapshot())
+        self.players = game.players
+
+    @property
+    def plies(self):
+        """
+        Output:
+            (int) - number of plies of the game
+        """
+        return len(self.record.moves)
+
+    def position(self, ply):
+        """
+        Rebuilds the position after a given number of plies.
+
+        Input:
+            ply (int) - number of moves made, from 0 to plies
+        Output:
+            (Game) - a new game in that position
+        """
+        if not 0 <= ply <= self.plies:
+            raise Exception(f"The game only has {self.plies} plies")
+        keyframe = ply // self.interval
+        game = Game.from_snapshot(self.keyframes[keyframe], self.players)
+        for origin, path in self.record.moves[keyframe * self.interval:ply]:
+            piece = game.board.grid[origin[0]][origin[1]]
+            game.make_move([piece, list(path)])
+        return game
+
+
+def load_record(path):
+    """
+    Loads a record that was saved with GameRecord.save
+
+    Input:
+        path (str) - path of the file
+    Output:
+        (GameRecord)
+    """
+    with open(path) as file:
+        return GameRecord.from_dict(json.load(file))
@@ -0,0 +1,189 @@
+"""
+This is a file that contains logic for rendering recorded games into
+images without opening a window, so that it can be run on machines
+without a display.
+
+Every ply of a game is drawn with gui.draw_board onto an offscreen
+pygame.Surface. The frames can be saved as a sequence of PNG files or
+as a single sprite sheet. Many games can be rendered at once across a
+pool of processes.
+
+To render a few recorded games into sprite sheets, run the following from
+the root of the repository:
+python3 src/render.py --out-dir thumbnails --sheet game_1.json game_2.json
+"""
+
+import os
+
+# The dummy driver lets pygame work on machines without a display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+
+import click
+import pygame
+
+from gui import draw_board, WIDTH, HEIGHT
+from record import GameRecord, load_record
+
+
+def render_frames(record, size=None):
+    """
+    Draws every position of a recorded game.
+
+    Input:
+        record (GameRecord) - the game to draw
+        size (tuple(int, int)) - size of a frame in pixels as (width, height).
+                                 If not given, the size of the GUI window is
+                                 used.
+    Output:
+        list[pygame.Surface] - the starting position followed by the position
+                               after every move
+    """
+    frames = []
+    for game in record.replay():
+        surface = pygame.Surface((WIDTH, HEIGHT))
+        draw_board(game, surface)
+        if size is not None and size != (WIDTH, HEIGHT):
+            # The pieces are drawn with fixed margins, so small frames are
+            # drawn at full size and scaled down afterwards
+            surface = pygame.transform.smoothscale(surface, size)
+        frames.append(surface)
+    return frames
+
+
+def make_sprite_sheet(frames, columns=None):
+    """
+    Puts frames of the same size into one surface, row by row.
+
+    Input:
+        frames (list[pygame.Surface]) - the frames of a game
+        columns (int) - number of frames in a row of the sheet. If not given,
+                        the sheet is made as close to a square as possible
+    Output:
+        (pygame.Surface)
+    """
+    if columns is None:
+        columns = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    frame_width, frame_height = frames[0].get_size()
+    sheet = pygame.Surface((frame_width * columns, frame_height * rows))
+    sheet.fill((255, 255, 255))
+    for index, frame in enumerate(frames):
+        row, col = divmod(index, columns)
+        sheet.blit(frame, (col * frame_width, row * frame_height))
+    return sheet
+
+
+def save_frames(record, out_dir, prefix="frame", size=None):
+    """
+    Saves every position of a recorded game as a separate PNG file.
+
+    Input:
+        record (GameRecord) - the game to draw
+        out_dir (str) - directory to save the files to
+        prefix (str) - beginning of the names of the files
+        size (tuple(int, int)) - size of a frame in pixels
+    Output:
+        list[str] - paths of the saved files in the order of the plies
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for ply, frame in enumerate(render_frames(record, size)):
+        path = os.path.join(out_dir, f"{prefix}_{ply:04d}.png")
+        pygame.image.save(frame, path)
+        paths.append(path)
+    return paths
+
+
+def save_sprite_sheet(record, path, size=None, columns=None):
+    """
+    Saves all positions of a recorded game as a single PNG sprite sheet.
+
+    Input:
+        record (GameRecord) - the game to draw
+        path (str) - path of the file
+        size (tuple(int, int)) - size of a frame in pixels
+        columns (int) - number of frames in a row of the sheet
+    Output:
+        (str) - path of the saved file
+    """
+    pygame.image.save(make_sprite_sheet(render_frames(record, size), columns),
+                      path)
+    return path
+
+
+def _render_job(job):
+    """
+    Renders a single game inside of a worker process.
+
+    Input:
+        job (tuple) - (record or path to a record, output directory, name,
+                       whether to make a sprite sheet, size of a frame)
+    Output:
+        list[str] - paths of the saved files
+    """
+    record, out_dir, name, sheet, size = job
+    if not isinstance(record, GameRecord):
+        record = load_record(record)
+    if sheet:
+        os.makedirs(out_dir, exist_ok=True)
+        return [save_sprite_sheet(record, os.path.join(out_dir, f"{name}.png"),
+                                  size)]
+    return save_frames(record, os.path.join(out_dir, name), size=size)
+
+
+def render_games(records, out_dir, sheet=False, size=None, processes=None):
+    """
+    Renders many games across a pool of processes.
+
+    Input:
+        records (list) - GameRecord objects or paths to saved records
+        out_dir (str) - directory to save the images to. Every game gets
+                        its own sub-directory of frames, or its own sheet
+        sheet (bool) - if True, one sprite sheet is saved per game,
+                       otherwise a sequence of frames
+        size (tuple(int, int)) - size of a frame in pixels
+        processes (int) - number of worker processes. If not given, one
+                          process per CPU is used
+    Output:
+        list[list[str]] - paths of the saved files for every game
+    """
+    jobs = []
+    for index, record in enumerate(records):
+        if isinstance(record, GameRecord):
+            name = f"game_{index:05d}"
+        else:
+            name = os.path.splitext(os.path.basename(record))[0]
+        jobs.append((record, out_dir, name, sheet, size))
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # Small chunks keep all the workers busy when games differ in length
+        return list(executor.map(_render_job, jobs, chunksize=4))
+
+
+@click.command(name="checkers-render")
+@click.argument("records", nargs=-1, required=True)
+@click.option('--out-dir', default="frames")
+@click.option('--sheet', is_flag=True, default=False)
+@click.option('--size', default=None, type=int)
+@click.option('--processes', default=None, type=int)
+def cmd(records, out_dir, sheet, size, processes):
+    """
+    This is the command line interface for rendering recorded games.
+
+    Input:
+        records (list[str]) - paths to the saved records
+        out_dir (str) - directory to save the images to
+        sheet (bool) - whether to save a sprite sheet instead of frames
+        size (int) - width and height of a frame in pixels
+        processes (int) - number of worker processes
+    """
+    frame_size = None if size is None else (size, size)
+    results = render_games(records, out_dir, sheet, frame_size, processes)
+    print(f"Rendered {len(results)} games into {out_dir}")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,504 @@
+"""
+This is a file that contains a bot that looks ahead by searching the game
+tree with alpha-beta pruning.
+
+Captures are compulsory in checkers, so a position where the side to move
+can jump is in the middle of an exchange and its static evaluation is
+misleading. Instead of evaluating such positions when the depth runs out,
+the search is extended over capture-only moves (quiescence search) until
+a quiet position is reached or its own node budget is spent.
+
+The search deepens one ply at a time, and the moves are ordered by a
+pluggable orderer (see move_ordering.py) so that earlier iterations make
+later ones prune more. Results are kept in a transposition table (see
+transposition.py), so positions reached by different move orders, and by
+earlier iterations or moves, are not searched again.
+"""
+
+from game import Game
+from player import Player
+from move_ordering import MoveOrderer, move_key
+from transposition import (TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND,
+                           NO_MOVE)
+from zobrist import get_keys, hash_game, update_hash
+from persistent_cache import PersistentCache, settings_fingerprint
+from evaluation import FEATURE_NAMES, DEFAULT_WEIGHTS, make_accumulator
+
+WIN_SCORE = 1000000
+MAX_PLY = 1000
+MAN_VALUE = 100
+KING_VALUE = 175
+
+
+def material_evaluation(game, player):
+    """
+    Evaluates a position by counting the material of both players.
+
+    Input:
+        game (Game) - the game to evaluate
+        player (Player) - the player from whose point of view the game is
+                          evaluated
+    Output:
+        (int) - the score of the position, positive if the player is ahead
+    """
+    score = 0
+    for owner in game.players:
+        material = MAN_VALUE * game.men_counts[owner] + KING_VALUE * game.king_counts[owner]
+        score += material if owner is player else -material
+    return score
+
+
+def search_fingerprint(quiescence_nodes=1000, weights=None):
+    """
+    Input:
+        quiescence_nodes (int), weights - the settings of a Searcher that
+                                          uses the incremental evaluation
+    Output:
+        (int) - fingerprint of the settings for a PersistentCache, so that
+                a cache is never shared by searches that score differently
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+    if isinstance(weights, dict):
+        weights = [weights[name] for name in FEATURE_NAMES]
+    return settings_fingerprint({"quiescence_nodes": quiescence_nodes, "weights": weights})
+
+
+def get_opponent(game, player):
+    """
+    Input:
+        game (Game) - the game that is played
+        player (Player) - one of the players of the game
+    Output:
+        (Player) - the player who moves after the given one
+    """
+    index = game.players.index(player)
+    return game.players[(index + 1) % len(game.players)]
+
+
+def has_any_move(game, player):
+    """
+    Checks if the player can make a non-jump move, stopping at the first one
+    found rather than listing all of them.
+
+    Input:
+        game (Game) - the game that is played
+        player (Player) - the player to check
+    Output:
+        True - if the player has a move
+        False - otherwise
+    """
+    for piece in game.pieces_dict[player]:
+        if game.get_possible_moves_for_piece(piece) != []:
+            return True
+    return False
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside of a search when it is asked to stop before it is finished.
+    """
+
+
+def score_to_table(score, ply):
+    """
+    Converts a win or loss score from "plies from the root" to "plies from
+    this position", so that it stays correct when the position is reached
+    at another ply.
+    """
+    if score > WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score < -WIN_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """
+    Reverses score_to_table.
+    """
+    if score > WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score < -WIN_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+def move_squares(move, number_of_cols):
+    """
+    Input:
+        move ([GamePiece, list[tuple(int,int)]]) - a move in a format used by Game
+        number_of_cols (int) - width of the board
+    Output:
+        tuple(int, int) - indices (plus one) of the squares the move starts
+                          and ends on, as kept in a transposition table
+    """
+    initial_pos = move[0].position
+    final_pos = move[1][-1]
+    return (initial_pos[0] * number_of_cols + initial_pos[1] + 1,
+            final_pos[0] * number_of_cols + final_pos[1] + 1)
+
+
+def find_move_by_squares(moves, squares, number_of_cols):
+    """
+    Input:
+        moves (list) - moves in a format used by Game
+        squares (tuple(int, int)) - squares made by move_squares
+        number_of_cols (int) - width of the board
+    Output:
+        the first move that starts and ends on the squares, or None
+    """
+    for move in moves:
+        if move_squares(move, number_of_cols) == squares:
+            return move
+    return None
+
+
+class Searcher:
+    """
+    This class searches the game tree of a Game with alpha-beta pruning and
+    a quiescence extension over forced captures.
+
+    Public Attributes:
+        - evaluate (function) - function(game, player) -> int that scores
+                                quiet positions. If None, an incremental
+                                evaluation (see evaluation.py) is added to
+                                the game for the time of a search.
+        - weights (dict, list or NetworkWeights) - weights of the incremental
+                           evaluation, None for the default ones
+        - quiescence_nodes (int) - maximum number of nodes a single
+                                   quiescence search is allowed to visit
+        - orderer (MoveOrderer) - decides in which order moves are searched
+        - table (TranspositionTable) - table to save and reuse results of
+                                       searched positions in, or None
+        - stop - an object with an is_set() method (like threading.Event);
+                 once it is set, the search returns the result of the last
+                 finished iteration. None if the search is never stopped.
+        - nodes (int) - number of nodes visited during the last search
+        - completed_depth (int) - depth of the last finished iteration
+    """
+
+    def __init__(self, evaluate=None, quiescence_nodes=1000,
+                 orderer=None, table=None, stop=None, weights=None):
+        self.evaluate = evaluate
+        self.weights = weights
+        self.quiescence_nodes = quiescence_nodes
+        self.orderer = MoveOrderer() if orderer is None else orderer
+        self.table = table
+        self.stop = stop
+        self.nodes = 0
+        self.completed_depth = 0
+        self._quiescence_left = 0
+        self._hash = 0
+        self._keys = None
+        self._evaluate = evaluate
+
+    def search(self, game, player, depth):
+        """
+        Finds the best move for the player. The game is changed during the
+        search, but it is restored to the initial position before returning.
+
+        Input:
+            game (Game) - the game to search
+            player (Player) - the player whose turn it is
+            depth (int) - number of plies to look ahead before the
+                          quiescence search starts
+        Output:
+            tuple(int, [GamePiece, list[tuple(int,int)]]) - score of the best
+                  move and the move itself. The move is None if the player
+                  has no moves.
+        """
+        self.nodes = 0
+        self.completed_depth = 0
+        self.orderer.new_search()
+        moves = game.get_possible_moves(player)
+        if moves == []:
+            return -WIN_SCORE, None
+
+        if self.table is not None:
+            self._keys = get_keys(game.board.number_of_rows, game.board.number_of_cols)
+            self._hash = hash_game(game, player)
+            # The position may have already been searched deep enough,
+            # by an earlier move, another process or an earlier run
+            entry = self.table.probe(self._hash)
+            if entry is not None and entry[0] >= depth and entry[2] == EXACT:
+                table_move = find_move_by_squares(moves, entry[3:],
+                                                  game.board.number_of_cols)
+                if table_move is not None:
+                    self.completed_depth = entry[0]
+                    return entry[1], table_move
+
+        accumulator = None
+        self._evaluate = self.evaluate
+        if self.evaluate is None:
+            accumulator = make_accumulator(self.weights)
+            game.add_tracker(accumulator)
+            self._evaluate = accumulator.evaluate
+
+        best_score = -WIN_SCORE
+        best_move = moves[0]
+        try:
+            for current_depth in range(1, depth + 1):
+                best_score, best_move = self._search_root(game, player, moves,
+                                                          current_depth,
+                                                          move_key(best_move))
+                self.completed_depth = current_depth
+        except SearchStopped:
+            # The unfinished iteration is thrown away
+            pass
+        finally:
+            if accumulator is not None:
+                game.remove_tracker(accumulator)
+        return best_score, best_move
+
+    def _search_root(self, game, player, moves, depth, best_move):
+        """
+        Searches all the moves of the root position to a given depth, starting
+        from the best move of the previous iteration.
+
+        Output:
+            tuple(int, [GamePiece, list[tuple(int,int)]]) - the best score
+                  and the move
+        """
+        opponent = get_opponent(game, player)
+        alpha = -WIN_SCORE - 1
+        beta = WIN_SCORE + 1
+        moves = self.orderer.order(moves, 0, game.board, best_move)
+        best = moves[0]
+        for move in moves:
+            score = self._search_move(game, move, opponent, depth - 1,
+                                      -beta, -alpha, 1)
+            if score > alpha:
+                alpha = score
+                best = move
+        if self.table is not None:
+            self.table.store(self._hash, depth, alpha, EXACT,
+                             *move_squares(best, game.board.number_of_cols))
+        return alpha, best
+
+    def _search_move(self, game, move, opponent, depth, alpha, beta, ply):
+        """
+        Makes a move, searches the resulting position and takes the move back.
+        The alpha and beta bounds are given from the point of view of the
+        opponent, who moves in the resulting position.
+
+        Output:
+            (int) - score of the move from the point of view of the player
+                    who made it
+        """
+        piece = move[0]
+        initial_pos = piece.position
+        was_king = piece.is_king
+        parent_hash = self._hash
+        captured = game.make_move(move).captured
+        try:
+            if self.table is not None:
+                self._hash = update_hash(parent_hash, self._keys, game, piece,
+                                         initial_pos, was_king, captured)
+            if depth <= 0:
+                self._quiescence_left = self.quiescence_nodes
+                return -self._quiescence(game, opponent, alpha, beta, ply)
+            return -self._alpha_beta(game, opponent, depth, alpha, beta, ply)
+        finally:
+            self._hash = parent_hash
+            game.unmake_move(piece, initial_pos, was_king, captured)
+
+    def _check_stop(self):
+        """
+        Counts a visited node and stops the search if it was asked to.
+        The stop flag is only read every 1024 nodes, as reading it from
+        another thread or process is slow.
+        """
+        self.nodes += 1
+        if self.stop is not None and self.nodes % 1024 == 0 and self.stop.is_set():
+            raise SearchStopped()
+
+    def _alpha_beta(self, game, player, depth, alpha, beta, ply):
+        """
+        Searches a position with the player to move (negamax form).
+
+        Input:
+            game (Game) - the game to search
+            player (Player) - the player to move
+            depth (int) - remaining depth in plies, at least 1
+            alpha (int) - score the player is already guaranteed
+            beta (int) - score the opponent is already guaranteed
+            ply (int) - distance from the root, used to prefer faster wins
+        Output:
+            (int) - score of the position for the player to move
+        """
+        self._check_stop()
+        number_of_cols = game.board.number_of_cols
+
+        table_squares = None
+        if self.table is not None:
+            entry = self.table.probe(self._hash)
+            if entry is not None:
+                entry_depth, entry_score, bound, from_square, to_square = entry
+                if entry_depth >= depth:
+                    entry_score = score_from_table(entry_score, ply)
+                    if bound == EXACT:
+                        return entry_score
+                    if bound == LOWER_BOUND and entry_score >= beta:
+                        return entry_score
+                    if bound == UPPER_BOUND and entry_score <= alpha:
+                        return entry_score
+                if from_square != NO_MOVE:
+                    table_squares = (from_square, to_square)
+
+        moves = game.get_possible_moves(player)
+        if moves == []:
+            return -WIN_SCORE + ply
+
+        best_key = None
+        if table_squares is not None:
+            table_move = find_move_by_squares(moves, table_squares, number_of_cols)
+            if table_move is not None:
+                best_key = move_key(table_move)
+
+        opponent = get_opponent(game, player)
+        best_move = None
+        for move in self.orderer.order(moves, ply, game.board, best_key):
+            score = self._search_move(game, move, opponent, depth - 1,
+                                      -beta, -alpha, ply + 1)
+            if score >= beta:
+                self.orderer.cutoff(move, ply, depth)
+                if self.table is not None:
+                    self.table.store(self._hash, depth, score_to_table(score, ply),
+                                     LOWER_BOUND, *move_squares(move, number_of_cols))
+                return score
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        if self.table is not None:
+            if best_move is None:
+                self.table.store(self._hash, depth, score_to_table(alpha, ply),
+                                 UPPER_BOUND)
+            else:
+                self.table.store(self._hash, depth, score_to_table(alpha, ply),
+                                 EXACT, *move_squares(best_move, number_of_cols))
+        return alpha
+
+    def _quiescence(self, game, player, alpha, beta, ply):
+        """
+        Searches only capture moves until the position is quiet. As captures
+        are compulsory, the player cannot decline them, so the static
+        evaluation is only used once there are no captures left or the node
+        budget has run out.
+
+        Output:
+            (int) - score of the position for the player to move
+        """
+        self._check_stop()
+        self._quiescence_left -= 1
+
+        jumps = game.get_all_jumps(player)
+        if jumps == []:
+            if not has_any_move(game, player):
+                return -WIN_SCORE + ply
+            return self._evaluate(game, player)
+        if self._quiescence_left <= 0:
+            return self._evaluate(game, player)
+
+        opponent = get_opponent(game, player)
+        best = -WIN_SCORE - 1
+        for move in self.orderer.order(jumps, ply, game.board):
+            piece = move[0]
+            initial_pos = piece.position
+            was_king = piece.is_king
+            captured = game.make_move(move).captured
+            try:
+                score = -self._quiescence(game, opponent, -beta,
+                                          -max(alpha, best), ply + 1)
+            finally:
+                game.unmake_move(piece, initial_pos, was_king, captured)
+            if score >= beta:
+                return score
+            if score > best:
+                best = score
+        return best
+
+
+class SearchBot(Player):
+    """
+    A bot that chooses its moves by searching the game tree.
+    Public attributes:
+        name: str: name that is also a parameter of a parent class
+        color: color of the pieces of a given bot
+        depth: int: number of plies searched before the quiescence search
+        searcher: Searcher: the search that is used to choose moves
+        weights_board: tuple(int, int): size of the board the weights were
+                       made for, or None if they work on any board
+    """
+    def __init__(self, name: str, color: str, depth=4, quiescence_nodes=1000,
+                 table_entries=1 << 16, cache_path=None,
+                 cache_bytes=64 * 1024 * 1024, weights=None, weights_board=None):
+        """
+        :param table_entries: size of the transposition table kept in memory
+        :param cache_path: path of a file to keep the transposition table in
+                           between runs (see persistent_cache.py). If given,
+                           table_entries is not used.
+        :param cache_bytes: largest size of the cache file
+        :param weights: weights of the evaluation (see evaluation.py), None
+                        for the default ones
+        :param weights_board: size of the board the weights were made for
+                              (see evaluation.weights_board). Playing on
+                              another board raises a ValueError.
+        """
+        super().__init__(name=name, color=color)
+        self.depth = depth
+        self.weights_board = None if weights_board is None else tuple(weights_board)
+        if cache_path is None:
+            table = TranspositionTable(table_entries)
+        else:
+            table = PersistentCache(cache_path, cache_bytes,
+                                    search_fingerprint(quiescence_nodes, weights))
+        self.searcher = Searcher(quiescence_nodes=quiescence_nodes, table=table,
+                                 weights=weights)
+
+    def choose_move(self, board, possible_moves):
+        """
+        Chooses the move with the best score found by the search
+        :param board: Board class instance: current game_board, it has to
+                      know the players of the game
+        :param possible_moves: list of moves
+        :return: [GamePiece, list[tuple(int, int)]]: one of the possible moves
+        """
+        size = (board.number_of_rows, board.number_of_cols)
+        if self.weights_board is not None and size != self.weights_board:
+            raise ValueError(f"the weights of {self.name} were made for a "
+                             f"{self.weights_board[0]} x {self.weights_board[1]} board, "
+                             f"not for a {size[0]} x {size[1]} one")
+        if len(possible_moves) == 1:
+            return possible_moves[0]
+
+        # The search is made on a copy, so the real pieces are never moved
+        game = Game.from_board(board)
+        _, best_move = self.searcher.search(game, self, self.depth)
+        return find_matching_move(possible_moves, best_move)
+
+    def close(self):
+        """
+        Saves the cache file of the bot, if it has one.
+        """
+        if isinstance(self.searcher.table, PersistentCache):
+            self.searcher.table.close()
+
+
+def find_matching_move(possible_moves, move):
+    """
+    Finds a move of the real game that corresponds to a move found on a copy
+    of the game.
+
+    Input:
+        possible_moves (list) - moves of the real game
+        move ([GamePiece, list[tuple(int,int)]]) - a move of the copy
+    Output:
+        one of the possible moves, the first one if none matches
+    """
+    for possible_move in possible_moves:
+        if possible_move[0].position == move[0].position and \
+                list(possible_move[1]) == list(move[1]):
+            return possible_move
+    return possible_moves[0]
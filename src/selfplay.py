@@ -0,0 +1,206 @@
+"""
+This is a file that contains logic for playing many games between bots to
+collect their records, for example to learn from them.
+
+Every game starts from a random opening (see match.random_opening), so that
+deterministic bots do not play the same game over and over. Games are played
+in parallel by a pool of processes, or by the workers of a Coordinator (see
+distributed.py).
+
+To play 100 games of search-bot against itself and save their records, run
+the following from the root of the repository:
+
+    python3 src/selfplay.py --player search-bot --games 100 --output games.jsonl
+
+Every line of the output file is a record, as made by GameRecord.to_dict.
+"""
+
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import click
+
+from adjudication import Adjudicator
+from match import play_match, random_opening, cached_player
+from record import GameRecord
+from tournament import spec_name
+from checkpoint import Checkpoint, RunProgress
+
+
+def play_game(spec_a, spec_b, opening, rows_with_pieces, width, max_plies=None, seed=None):
+    """
+    Plays and records a single game.
+
+    Input:
+        spec_a, spec_b (str or function) - the players, see match.cached_player.
+                                           spec_a moves first.
+        opening (list) - the moves the game starts with
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        max_plies (int) - number of moves after which a game is decided by
+                          material, or None
+        seed (int) - seed of the random choices of the bots, or None
+    Output:
+        (dict) - the record of the game, as made by GameRecord.to_dict
+    """
+    if seed is not None:
+        random.seed(seed)
+    players = [cached_player(spec_a, "A"), cached_player(spec_b, "B")]
+    record = GameRecord(width, rows_with_pieces)
+    play_match(players, rows_with_pieces, width, Adjudicator(adjudicate_after=max_plies),
+               record, opening)
+    return record.to_dict()
+
+
+class SelfPlay:
+    """
+    This class plays a number of recorded games between two players, which
+    may be of the same type.
+
+    Public Attributes:
+        - spec_a, spec_b (str or function) - the players, see
+                                             tournament.Tournament
+        - games (int) - number of games to play
+        - rows_with_pieces (int), width (int) - size of the board
+        - opening_plies (int) - number of random moves of every opening
+        - max_plies (int) - number of moves after which a game is decided by
+                            material, or None
+        - workers (int) - number of processes playing games
+        - seed (int) - seed of the random openings and of the random choices
+                       of the bots
+    """
+
+    def __init__(self, spec_a, spec_b=None, games=100, rows_with_pieces=3, width=8,
+                 opening_plies=4, max_plies=200, workers=None, seed=None):
+        self.spec_a = spec_a
+        self.spec_b = spec_a if spec_b is None else spec_b
+        self.games = games
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.opening_plies = opening_plies
+        self.max_plies = max_plies
+        self.workers = os.cpu_count() if workers is None else workers
+        self.seed = seed
+
+    def parameters(self):
+        """
+        Output:
+            (dict) - what the self-play is, see Tournament.parameters
+        """
+        return {"run": "selfplay", "player_a": spec_name(self.spec_a),
+                "player_b": spec_name(self.spec_b), "rows_with_pieces": self.rows_with_pieces,
+                "width": self.width, "opening_plies": self.opening_plies,
+                "max_plies": self.max_plies, "seed": self.seed}
+
+    def make_opening(self, rng):
+        return random_opening(self.rows_with_pieces, self.width, self.opening_plies, rng)
+
+    def run(self, on_game=None, executor=None, checkpoint=None):
+        """
+        Plays all the games.
+
+        Input:
+            on_game (function) - called as on_game(index, record) after every
+                                 finished game, in the order they finish
+            executor (Executor) - runs the games, see Tournament.run
+            checkpoint (Checkpoint) - see Tournament.run. The records of the
+                                      finished games are saved in it.
+        Output:
+            list[GameRecord] - the records, in the order the games were started
+        """
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return self.run(on_game, executor, checkpoint)
+
+        progress = None if checkpoint is None else checkpoint.load(self.parameters())
+        if progress is None:
+            progress = RunProgress(self.seed)
+        records = {index: GameRecord.from_dict(record) for index, record in progress.finished}
+        running = {}
+
+        def submit(index, opening, seed):
+            future = executor.submit(play_game, self.spec_a, self.spec_b, opening,
+                                     self.rows_with_pieces, self.width, self.max_plies, seed)
+            running[future] = index
+
+        for index, (opening, seed) in progress.pending.items():
+            submit(index, opening, seed)
+        try:
+            while progress.started < self.games or running:
+                while progress.started < self.games and len(running) < 2 * self.workers:
+                    submit(*progress.new_task(self.make_opening))
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = running.pop(future)
+                    record = future.result()
+                    progress.finish(index, record)
+                    records[index] = GameRecord.from_dict(record)
+                    if on_game is not None:
+                        on_game(index, records[index])
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(self.parameters(), progress)
+        finally:
+            if checkpoint is not None:
+                checkpoint.save(self.parameters(), progress)
+        return [records[index] for index in range(self.games)]
+
+
+def save_records(records, path):
+    """
+    Saves records as a JSON lines file, one record per line.
+
+    Input:
+        records (list[GameRecord]) - the records
+        path (str) - path of the file
+    """
+    with open(path, "w") as file:
+        for record in records:
+            file.write(json.dumps(record.to_dict()) + "\n")
+
+
+def load_records(path):
+    """
+    Input:
+        path (str) - path of a file made by save_records
+    Output:
+        list[GameRecord] - the records in the file
+    """
+    with open(path) as file:
+        return [GameRecord.from_dict(json.loads(line)) for line in file if line.strip()]
+
+
+@click.command(name="checkers-selfplay")
+@click.option('--player', default="search-bot", help="Type of the player that moves first")
+@click.option('--opponent', default=None, help="Type of its opponent, the same if not given")
+@click.option('--games', default=100)
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--workers', default=None, type=int)
+@click.option('--seed', default=None, type=int)
+@click.option('--output', default="games.jsonl", help="File the records are saved to")
+@click.option('--checkpoint', 'checkpoint_path', default=None,
+              help="File the progress is saved to, and resumed from if it exists")
+def cmd(player, opponent, games, width, rows_with_pieces, workers, seed, output,
+        checkpoint_path):
+    """
+    Plays the games and saves their records.
+    """
+    self_play = SelfPlay(player, opponent, games, rows_with_pieces, width,
+                         workers=workers, seed=seed)
+    finished = []
+
+    def show_progress(index, record):
+        finished.append(index)
+        print(f"\rGames: {len(finished)}/{games}", end="", flush=True)
+
+    checkpoint = None if checkpoint_path is None else Checkpoint(checkpoint_path)
+    records = self_play.run(show_progress, checkpoint=checkpoint)
+    print()
+    save_records(records, output)
+    print(f"Records saved to {output}")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,399 @@
+"""
+This is a file that contains a server that hosts many games at once for
+clients connecting over TCP.
+
+Clients send and receive one command per line, with squares written as
+"row,col" (counting from 0):
+
+    CREATE <width> <rows_with_pieces> [<opponent>]
+        Creates a game in which the client moves first. The board can have
+        at most MAX_BOARD_SIZE rows and columns. The opponent is "human"
+        (the default) or a bot type: random-bot, smart-bot or search-bot.
+        Answer: CREATED <game_id> 0
+    JOIN <game_id>
+        Takes the second seat of a game waiting for a human opponent.
+        Answer: JOINED <game_id> 1
+    MOVE <game_id> <from> <to> [<to> ...]
+        Makes a move: the square of the piece and the squares of its path.
+    BOARD <game_id>
+        Answer: BOARD <game_id> <side to move> <rows> <cols> followed by
+        "row,col,side,king" for every piece.
+    WATCH <game_id>
+        Streams the game to a spectator, see broadcast.py. Every message
+        is sent as WATCH <game_id> <message>.
+
+Both players of a game are sent every move as it is made, and the end of
+the game:
+
+    MOVED <game_id> <side> <from> <to> [<to> ...]
+    OVER <game_id> <winning side, or "draw">
+
+Wrong commands are answered with ERROR <message>. A line longer than the
+limit of the stream is answered with an ERROR and the client is
+disconnected. A bot that fails to choose a move loses its game.
+
+Bots choose their moves in a pool of processes, so a slow search never
+blocks the other games. To keep the memory of a game small, between moves
+it is only kept as a snapshot of its position (see Game.snapshot) and a
+Game is rebuilt for the time a move is made.
+
+To run the server, run the following from the root of the repository:
+
+    python3 src/server.py --port 8765
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from game import Game, IllegalMoveError
+from player import Player
+from bot import CheckersBot, RandomBot
+from search import SearchBot
+from broadcast import BroadcastHub, stream_to_writer
+
+BOT_TYPES = {
+    "random-bot": RandomBot,
+    "smart-bot": CheckersBot,
+    "search-bot": SearchBot,
+}
+
+# Largest number of rows and of columns of a board. Boards always have two
+# rows without pieces, so rows_with_pieces can be at most
+# (MAX_BOARD_SIZE - 2) // 2.
+MAX_BOARD_SIZE = 26
+
+# Games are only rebuilt for the time of a move, so they can all share the
+# same two players
+PLAYERS = [Player("Player 1", ""), Player("Player 2", "")]
+
+
+class ProtocolError(Exception):
+    """
+    Raised when a command of a client cannot be carried out. The message is
+    sent back to the client.
+    """
+
+
+def format_square(square):
+    return f"{square[0]},{square[1]}"
+
+
+def parse_square(text):
+    """
+    Input:
+        text (str) - a square written as "row,col"
+    Output:
+        tuple(int, int)
+    """
+    try:
+        row, col = text.split(",")
+        return int(row), int(col)
+    except ValueError:
+        raise ProtocolError(f"{text} is not a square")
+
+
+# Bots created inside of a worker process, by type and side, so that their
+# tables are kept between moves
+_worker_bots = {}
+
+
+def _choose_bot_move(snapshot, side, bot_type):
+    """
+    Chooses the move of a bot, inside of a worker process.
+
+    Input:
+        snapshot (tuple) - the position, made by Game.snapshot
+        side (int) - index of the bot in the game
+        bot_type (str) - one of BOT_TYPES
+    Output:
+        tuple(tuple(int, int), list[tuple(int, int)]) - the initial position
+              of the piece and its path
+    """
+    if (bot_type, side) not in _worker_bots:
+        _worker_bots[(bot_type, side)] = BOT_TYPES[bot_type](bot_type, "")
+    bot = _worker_bots[(bot_type, side)]
+    players = list(PLAYERS)
+    players[side] = bot
+    game = Game.from_snapshot(snapshot, players)
+    move = bot.choose_move(game.board, game.get_possible_moves(bot))
+    return move[0].position, list(move[1])
+
+
+class ServerGame:
+    """
+    This class is the state the server keeps about one game.
+
+    Public Attributes:
+        - game_id (int) - number of the game
+        - snapshot (tuple) - the current position, made by Game.snapshot
+        - side (int) - index of the player to move
+        - ply (int) - number of moves made
+        - seats (list) - for every player, the StreamWriter of its client,
+                         the type of the bot playing it, or None if nobody
+                         has joined yet
+    """
+    __slots__ = ("game_id", "snapshot", "side", "ply", "seats")
+
+    def __init__(self, game_id, snapshot, seats):
+        self.game_id = game_id
+        self.snapshot = snapshot
+        self.side = 0
+        self.ply = 0
+        self.seats = seats
+
+
+class GameServer:
+    """
+    This class keeps all the games of the server and carries out the
+    commands of its clients.
+
+    Public Attributes:
+        - games (dict[int, ServerGame]) - games that have not finished yet
+        - hubs (dict[int, BroadcastHub]) - spectators of the games that
+                                           are being watched
+        - max_plies (int) - number of moves after which a game is drawn
+        - processes (int) - number of processes bots choose their moves in
+    """
+
+    def __init__(self, processes=None, max_plies=400):
+        self.games = {}
+        self.hubs = {}
+        self.max_plies = max_plies
+        self.processes = processes
+        self._next_id = 1
+        # Turns of bots being played, kept so that they are not garbage
+        # collected while they run
+        self._bot_turns = set()
+        self._executor = None
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8765):
+        """
+        Starts accepting clients.
+
+        Output:
+            (int) - the port the server listens on, useful when port is 0
+        """
+        self._executor = ProcessPoolExecutor(max_workers=self.processes)
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops accepting clients and stops the bot processes.
+        """
+        self._server.close()
+        await self._server.wait_closed()
+        self._executor.shutdown(cancel_futures=True)
+
+    async def handle_client(self, reader, writer):
+        """
+        Reads the commands of a client until it disconnects. The client loses
+        all the games it has not finished.
+        """
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line is longer than the limit of the stream
+                    writer.write(b"ERROR the line is too long\n")
+                    break
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if words == []:
+                    continue
+                try:
+                    self.handle_command(writer, words)
+                except ProtocolError as error:
+                    writer.write(f"ERROR {error}\n".encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for server_game in list(self.games.values()):
+                if writer in server_game.seats:
+                    self.finish(server_game, 1 - server_game.seats.index(writer))
+            writer.close()
+
+    def handle_command(self, writer, words):
+        """
+        Carries out a single command of a client.
+
+        Input:
+            writer (StreamWriter) - connection of the client
+            words (list[str]) - the command split into words
+        """
+        command = words[0].upper()
+        if command == "CREATE" and len(words) in (3, 4):
+            self.create_game(writer, words)
+        elif command == "JOIN" and len(words) == 2:
+            server_game = self.get_game(words[1])
+            if server_game.seats[1] is not None:
+                raise ProtocolError(f"game {server_game.game_id} is full")
+            server_game.seats[1] = writer
+            writer.write(f"JOINED {server_game.game_id} 1\n".encode())
+        elif command == "MOVE" and len(words) >= 4:
+            server_game = self.get_game(words[1])
+            if server_game.seats[server_game.side] is not writer:
+                raise ProtocolError("it is not your turn")
+            if server_game.seats[1] is None:
+                raise ProtocolError("the opponent has not joined yet")
+            squares = [parse_square(word) for word in words[2:]]
+            self.make_move(server_game, squares[0], squares[1:])
+        elif command == "BOARD" and len(words) == 2:
+            server_game = self.get_game(words[1])
+            rows, cols, pieces = server_game.snapshot
+            pieces = " ".join(f"{row},{col},{side},{int(is_king)}"
+                              for row, col, side, is_king in pieces)
+            writer.write(f"BOARD {server_game.game_id} {server_game.side} "
+                         f"{rows} {cols} {pieces}\n".encode())
+        elif command == "WATCH" and len(words) == 2:
+            self.watch_game(writer, self.get_game(words[1]))
+        else:
+            raise ProtocolError(f"unknown command {' '.join(words)}")
+
+    def get_game(self, text):
+        try:
+            return self.games[int(text)]
+        except (ValueError, KeyError):
+            raise ProtocolError(f"there is no game {text}")
+
+    def create_game(self, writer, words):
+        """
+        Carries out a CREATE command.
+        """
+        try:
+            width, rows_with_pieces = int(words[1]), int(words[2])
+        except ValueError:
+            raise ProtocolError("the size of the board must be given as integers")
+        if width < 2 or rows_with_pieces < 1:
+            raise ProtocolError("the board is too small")
+        if width > MAX_BOARD_SIZE or 2 * rows_with_pieces + 2 > MAX_BOARD_SIZE:
+            raise ProtocolError(f"the board can have at most {MAX_BOARD_SIZE} rows and columns")
+        opponent = words[3] if len(words) == 4 else "human"
+        if opponent != "human" and opponent not in BOT_TYPES:
+            raise ProtocolError(f"unknown opponent {opponent}")
+
+        game = Game(PLAYERS, rows_with_pieces, width)
+        server_game = ServerGame(self._next_id, game.snapshot(),
+                                 [writer, None if opponent == "human" else opponent])
+        self._next_id += 1
+        self.games[server_game.game_id] = server_game
+        writer.write(f"CREATED {server_game.game_id} 0\n".encode())
+
+    def watch_game(self, writer, server_game):
+        """
+        Starts streaming a game to a spectator.
+        """
+        if server_game.game_id not in self.hubs:
+            self.hubs[server_game.game_id] = BroadcastHub(
+                lambda: server_game.snapshot, server_game.ply, server_game.side)
+        asyncio.get_running_loop().create_task(stream_to_writer(
+            self.hubs[server_game.game_id], writer, f"WATCH {server_game.game_id} "))
+
+    def make_move(self, server_game, origin, path):
+        """
+        Checks a move, makes it, and tells both players about it.
+
+        Input:
+            server_game (ServerGame) - the game
+            origin (tuple(int, int)) - square of the piece to move
+            path (list[tuple(int, int)]) - squares the piece moves through
+        """
+        game = Game.from_snapshot(server_game.snapshot, PLAYERS)
+        try:
+            delta = game.apply_move(PLAYERS[server_game.side], origin, path)
+        except IllegalMoveError:
+            raise ProtocolError("illegal move")
+
+        server_game.snapshot = game.snapshot()
+        server_game.ply += 1
+        self.send(server_game, f"MOVED {server_game.game_id} {server_game.side} "
+                  + " ".join(format_square(square) for square in [origin] + path))
+        if server_game.game_id in self.hubs:
+            self.hubs[server_game.game_id].publish(server_game.side, delta)
+        server_game.side = 1 - server_game.side
+
+        if game.get_legal_moves(PLAYERS[server_game.side]) == {}:
+            self.finish(server_game, 1 - server_game.side)
+        elif server_game.ply >= self.max_plies:
+            self.finish(server_game, None)
+        elif isinstance(server_game.seats[server_game.side], str):
+            turn = asyncio.get_running_loop().create_task(self.play_bot_turn(server_game))
+            self._bot_turns.add(turn)
+            turn.add_done_callback(lambda turn: self._end_bot_turn(turn, server_game))
+
+    async def play_bot_turn(self, server_game):
+        """
+        Lets the bot of the player to move choose its move in the pool of
+        processes, and makes it.
+        """
+        side = server_game.side
+        origin, path = await asyncio.get_running_loop().run_in_executor(
+            self._executor, _choose_bot_move, server_game.snapshot, side,
+            server_game.seats[side])
+        if self.games.get(server_game.game_id) is server_game:
+            self.make_move(server_game, origin, path)
+
+    def _end_bot_turn(self, turn, server_game):
+        """
+        Forgets a finished turn of a bot. If the bot failed to choose a
+        legal move, it loses the game.
+        """
+        self._bot_turns.discard(turn)
+        if turn.cancelled() or turn.exception() is None:
+            return
+        if self.games.get(server_game.game_id) is server_game:
+            self.finish(server_game, 1 - server_game.side)
+
+    def finish(self, server_game, winner):
+        """
+        Ends a game and forgets it.
+
+        Input:
+            server_game (ServerGame) - the game
+            winner (int) - index of the winning player, or None for a draw
+        """
+        result = "draw" if winner is None else str(winner)
+        self.send(server_game, f"OVER {server_game.game_id} {result}")
+        del self.games[server_game.game_id]
+        if server_game.game_id in self.hubs:
+            self.hubs.pop(server_game.game_id).end(result)
+
+    def send(self, server_game, message):
+        """
+        Sends a line to the clients playing a game.
+        """
+        for seat in server_game.seats:
+            if isinstance(seat, asyncio.StreamWriter) and not seat.is_closing():
+                seat.write((message + "\n").encode())
+
+
+@click.command(name="checkers-server")
+@click.option('--host', default="127.0.0.1")
+@click.option('--port', default=8765)
+@click.option('--processes', default=None, type=int,
+              help="Number of processes bots choose their moves in")
+def cmd(host, port, processes):
+    """
+    Runs the server until it is interrupted.
+    """
+    async def run():
+        server = GameServer(processes)
+        port_used = await server.start(host, port)
+        print(f"Serving games on {host}:{port_used}")
+        await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,205 @@
+"""
+This is a file that contains a tuner for the parameters of CheckersBot (see
+PARAMETER_NAMES in bot.py) that works by letting bots play each other.
+
+It uses simultaneous perturbation stochastic approximation (SPSA): every
+iteration, all the parameters are moved by the same small step, each in a
+random direction, once up and once down. The two bots play a few pairs of
+games, and the parameters are moved towards the bot that scored better, in
+proportion to how much better. As the results of games are noisy, several
+random directions are tried in every iteration, and all their games are
+played at once in parallel processes. The steps get smaller as the tuning
+goes on.
+
+Parameters are scaled by the width of their bounds (see
+bot.parameter_bounds), so that a priority and a distance power move by
+similar amounts. The guard rows are kept on the rows of the board.
+
+To tune the parameters for a 10 x 10 board, run the following from the root
+of the repository:
+
+    python3 src/spsa.py --width 10 --rows-with-pieces 4 --iterations 200 --output smart-bot.json
+
+and play with them with the player type smart-bot:smart-bot.json.
+"""
+
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+from bot import PARAMETER_NAMES, DEFAULT_PARAMETERS, parameter_bounds, save_parameters
+from match import random_opening
+from tournament import play_pair
+
+
+def parameters_spec(parameters):
+    """
+    Input:
+        parameters (list[float]) - parameters of a CheckersBot
+    Output:
+        (str) - a player type for a smart-bot with them, see match.make_player
+    """
+    return "smart-bot:" + json.dumps([round(value, 4) for value in parameters])
+
+
+class SPSATuner:
+    """
+    This class tunes the parameters of CheckersBot with SPSA.
+
+    Public Attributes:
+        - parameters (list[float]) - the current parameters
+        - rows_with_pieces (int), width (int) - size of the board
+        - directions (int) - number of random directions tried per iteration
+        - pairs (int) - number of pairs of games played per direction
+        - step (float) - size of the first step of the parameters towards
+                         the better bot, as a share of their bounds
+        - perturbation (float) - how far the two bots of the first iteration
+                                 are from the parameters, as a share of
+                                 their bounds
+        - stability (float) - iterations that keep the first steps small;
+                              about a tenth of all the iterations
+        - opening_plies (int) - number of random moves every game starts with
+        - max_plies (int) - number of moves after which a game is decided by
+                            material
+        - workers (int) - number of processes playing games
+        - iterations (int) - number of iterations done so far
+        - bounds (list[tuple(float, float)]) - smallest and largest value of
+                                               every parameter on the board
+    """
+
+    def __init__(self, parameters=None, rows_with_pieces=3, width=8, directions=4, pairs=2,
+                 step=0.01, perturbation=0.1, stability=10, opening_plies=4, max_plies=200,
+                 workers=None, seed=None):
+        self.parameters = list(DEFAULT_PARAMETERS if parameters is None else parameters)
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.directions = directions
+        self.pairs = pairs
+        self.step = step
+        self.perturbation = perturbation
+        self.stability = stability
+        self.opening_plies = opening_plies
+        self.max_plies = max_plies
+        self.workers = os.cpu_count() if workers is None else workers
+        self.iterations = 0
+        self.bounds = parameter_bounds(2 * rows_with_pieces + 2)
+        self.parameters = self.clip(self.parameters)
+        self.random = random.Random(seed)
+
+    def clip(self, parameters):
+        """
+        Input:
+            parameters (list[float]) - any parameters
+        Output:
+            list[float] - the parameters moved inside of their bounds
+        """
+        return [min(max(value, low), high)
+                for value, (low, high) in zip(parameters, self.bounds)]
+
+    def gains(self):
+        """
+        Output:
+            tuple(float, float) - the step and the perturbation of the current
+                                  iteration, with the usual SPSA decay
+        """
+        step = self.step * (1 + self.stability) ** 0.602 / \
+            (self.iterations + 1 + self.stability) ** 0.602
+        perturbation = self.perturbation / (self.iterations + 1) ** 0.101
+        return step, perturbation
+
+    def iterate(self, executor):
+        """
+        Plays the games of a single iteration and moves the parameters.
+
+        Input:
+            executor (Executor) - plays the pairs of games
+        Output:
+            (float) - the average score of the bots moved up, from 0 to 1
+        """
+        step, perturbation = self.gains()
+        widths = [high - low for low, high in self.bounds]
+        tries = []
+        for _ in range(self.directions):
+            direction = [self.random.choice((-1, 1)) for _ in self.parameters]
+            shift = [perturbation * width * sign for width, sign in zip(widths, direction)]
+            plus = self.clip([value + change for value, change in zip(self.parameters, shift)])
+            minus = self.clip([value - change for value, change in zip(self.parameters, shift)])
+            futures = []
+            for _ in range(self.pairs):
+                opening = random_opening(self.rows_with_pieces, self.width,
+                                         self.opening_plies, self.random)
+                futures.append(executor.submit(play_pair, parameters_spec(plus),
+                                               parameters_spec(minus), opening,
+                                               self.rows_with_pieces, self.width,
+                                               self.max_plies, self.random.getrandbits(32)))
+            tries.append((direction, futures))
+
+        gradient = [0.0] * len(self.parameters)
+        scores = []
+        for direction, futures in tries:
+            score = sum(future.result()[0] for future in futures) / len(futures)
+            scores.append(score)
+            # Above 0 if the bot moved up scored better than the one moved down
+            difference = 2 * score - 1
+            for index, sign in enumerate(direction):
+                gradient[index] += difference / (2 * perturbation * sign) / len(tries)
+        self.parameters = self.clip([value + step * change * width
+                                     for value, change, width
+                                     in zip(self.parameters, gradient, widths)])
+        self.iterations += 1
+        return sum(scores) / len(scores)
+
+    def tune(self, iterations, output=None, on_iteration=None):
+        """
+        Input:
+            iterations (int) - number of iterations to make
+            output (str) - file the parameters are saved to after every
+                           iteration (see bot.save_parameters), or None
+            on_iteration (function) - called as on_iteration(tuner, score)
+                                      after every iteration
+        Output:
+            list[float] - the tuned parameters
+        """
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(iterations):
+                score = self.iterate(executor)
+                if output is not None:
+                    save_parameters(output, self.parameters, {
+                        "tuner": "spsa", "iterations": self.iterations,
+                        "width": self.width, "rows_with_pieces": self.rows_with_pieces})
+                if on_iteration is not None:
+                    on_iteration(self, score)
+        return self.parameters
+
+
+@click.command(name="checkers-spsa")
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--iterations', default=100)
+@click.option('--directions', default=4, help="Number of random directions tried per iteration")
+@click.option('--pairs', default=2, help="Number of pairs of games played per direction")
+@click.option('--workers', default=None, type=int)
+@click.option('--seed', default=None, type=int)
+@click.option('--output', default="smart-bot.json", help="File the parameters are saved to")
+def cmd(width, rows_with_pieces, iterations, directions, pairs, workers, seed, output):
+    """
+    Tunes the parameters and saves them.
+    """
+    tuner = SPSATuner(rows_with_pieces=rows_with_pieces, width=width, directions=directions,
+                      pairs=pairs, stability=max(1, iterations // 10), workers=workers,
+                      seed=seed)
+
+    def show_progress(tuner, score):
+        print(f"Iteration {tuner.iterations}: score of the bots moved up {score:.2f}")
+
+    parameters = tuner.tune(iterations, output, show_progress)
+    for name, value in zip(PARAMETER_NAMES, parameters):
+        print(f"{name}: {value:.3f}")
+    print(f"Parameters saved to {output}. Play with them with the player type smart-bot:{output}")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,361 @@
+"""
+This is a file that contains a trainer that learns the weights of the
+evaluation (see evaluation.py) for one size of the board from games the bot
+plays against itself.
+
+The evaluation is either a weighted sum of the features or a small neural
+network over them. Its output, put through tanh, is read as the expected
+result of the game for the player to move: 1 for a win, -1 for a loss. The
+trainer repeats:
+
+1. Play a number of games in parallel worker processes, with search-bots
+   that use the current weights. Every worker sends back the features of
+   every position of its games and the result.
+2. For every position, compute the TD(lambda) target: a mix of what the
+   current weights say about the following positions and of the real
+   result, where lambda sets how much the result counts the further away
+   it is. Positions alternate between the players, so values of the next
+   position are negated.
+3. Move the weights towards the targets with gradient descent on shuffled
+   minibatches of the stacked feature matrices.
+
+After every iteration the weights are saved to a file (see
+evaluation.save_weights), which bots load with the "search-bot:<path>"
+player type, and which the workers of the next iteration load.
+
+NumPy is needed for training, but not for playing with the trained weights.
+
+To train a network for a 10 x 10 board, run the following from the root of
+the repository:
+
+    python3 src/td_training.py --width 10 --rows-with-pieces 4 --model network --output weights.json
+"""
+
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+import numpy as np
+
+from adjudication import Adjudicator
+from evaluation import (FEATURE_NAMES, DEFAULT_WEIGHTS, NetworkWeights, get_square_features,
+                        attach_evaluation, save_weights, load_weights)
+from game import Game
+from match import play_match, random_opening
+from player import Player
+from record import GameRecord
+from search import SearchBot
+
+# The output of the weights is multiplied by it to get the scores a search
+# works with
+SCORE_SCALE = 1000
+
+# Bots of the worker process, made again when the weights file changes
+_training_bots = {}
+
+
+def feature_scale(game):
+    """
+    Input:
+        game (Game) - a game in its starting position
+    Output:
+        (numpy.ndarray) - size of every feature of a player in the starting
+                          position, so that features of all sizes of boards
+                          are roughly between -1 and 1 once divided by it
+    """
+    board = game.board
+    square_features = get_square_features(board.number_of_rows, board.number_of_cols)[0]
+    scale = np.zeros(len(FEATURE_NAMES))
+    for piece in game.pieces_dict[game.players[0]]:
+        row, col = piece.position
+        scale += np.abs(square_features[row * board.number_of_cols + col])
+    return np.maximum(scale, 1.0)
+
+
+def _get_bots(weights_path, iteration, depth):
+    key = (weights_path, iteration, depth)
+    if key not in _training_bots:
+        _training_bots.clear()
+        weights = load_weights(weights_path)
+        _training_bots[key] = [SearchBot(f"td-bot-{number}", "", depth=depth,
+                                         table_entries=1 << 12, weights=weights)
+                               for number in (1, 2)]
+    return _training_bots[key]
+
+
+def play_training_game(weights_path, iteration, opening, rows_with_pieces, width, depth,
+                       max_plies=None, seed=None):
+    """
+    Plays a game between two search-bots inside of a worker process.
+
+    Input:
+        weights_path (str) - file of the weights the bots use
+        iteration (int) - iteration the weights are from, so that the bots
+                          load the file again once it is changed
+        opening (list) - the moves the game starts with
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        depth (int) - depth the bots search to
+        max_plies (int) - number of moves after which a game is decided by
+                          material, or None
+        seed (int) - seed of the random choices of the bots, or None
+    Output:
+        tuple(list[list[int]], int) - features of every position, including
+              the last one, from the point of view of the player to move,
+              and the index of the winner, or None for a draw
+    """
+    if seed is not None:
+        random.seed(seed)
+    players = _get_bots(weights_path, iteration, depth)
+    record = GameRecord(width, rows_with_pieces)
+    play_match(players, rows_with_pieces, width, Adjudicator(adjudicate_after=max_plies),
+               record, opening)
+
+    replay_players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = record.new_game(replay_players)
+    accumulator = attach_evaluation(game)
+    features = [accumulator.features(replay_players[0])]
+    for ply, (origin, path) in enumerate(record.moves):
+        game.apply_move(replay_players[ply % 2], origin, path)
+        features.append(accumulator.features(replay_players[(ply + 1) % 2]))
+    return features, record.result
+
+
+def td_targets(values, final_result, td_lambda):
+    """
+    Computes the TD(lambda) targets of the positions of a game.
+
+    Input:
+        values (numpy.ndarray) - values of the positions before every move,
+                                 each from the point of view of the player
+                                 to move
+        final_result (float) - result of the game for the player to move in
+                               the last position: 1, 0 or -1
+        td_lambda (float) - from 0, where only the value of the next position
+                            counts, to 1, where only the result counts
+    Output:
+        (numpy.ndarray) - the target of every position
+    """
+    targets = np.empty(len(values))
+    next_value = next_target = final_result
+    for ply in range(len(values) - 1, -1, -1):
+        # The next position is seen by the other player
+        targets[ply] = -((1 - td_lambda) * next_value + td_lambda * next_target)
+        next_value = values[ply]
+        next_target = targets[ply]
+    return targets
+
+
+class TDTrainer:
+    """
+    This class learns the weights of the evaluation from self-play with
+    TD(lambda).
+
+    Public Attributes:
+        - rows_with_pieces (int), width (int) - size of the board
+        - model (str) - "linear" for a weighted sum of the features, or
+                        "network" for a network with one hidden layer
+        - hidden_units (int) - size of the hidden layer of a network
+        - td_lambda (float) - see td_targets
+        - learning_rate (float) - size of the steps of gradient descent
+        - batch_size (int) - number of positions in a minibatch
+        - games_per_iteration (int) - number of games played between updates
+        - depth (int) - depth the bots search to during self-play
+        - opening_plies (int) - number of random moves every game starts with
+        - max_plies (int) - number of moves after which a game is decided by
+                            material
+        - workers (int) - number of processes playing games
+        - iterations (int) - number of iterations trained so far
+        - games (int) - number of games trained on so far
+        - scale (numpy.ndarray) - see feature_scale
+        - linear (numpy.ndarray) - weights of a linear model
+        - hidden, output (numpy.ndarray) - weights of a network
+    """
+
+    def __init__(self, rows_with_pieces=3, width=8, model="linear", hidden_units=16,
+                 td_lambda=0.7, learning_rate=0.05, batch_size=256,
+                 games_per_iteration=32, depth=1, opening_plies=6, max_plies=150,
+                 workers=None, seed=None):
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.model = model
+        self.hidden_units = hidden_units
+        self.td_lambda = td_lambda
+        self.learning_rate = learning_rate
+        self.batch_size = batch_size
+        self.games_per_iteration = games_per_iteration
+        self.depth = depth
+        self.opening_plies = opening_plies
+        self.max_plies = max_plies
+        self.workers = workers
+        self.iterations = 0
+        self.games = 0
+        self.random = random.Random(seed)
+        self.numpy_random = np.random.default_rng(seed)
+
+        game = Game([Player("Player 1", ""), Player("Player 2", "")], rows_with_pieces, width)
+        self.number_of_rows = game.board.number_of_rows
+        self.scale = feature_scale(game)
+        # The linear model starts from the default weights, so that the
+        # first games are not random
+        default = np.array([DEFAULT_WEIGHTS[name] for name in FEATURE_NAMES], dtype=float)
+        self.linear = default * self.scale / SCORE_SCALE
+        self.hidden = self.numpy_random.normal(0, 1 / np.sqrt(len(FEATURE_NAMES)),
+                                               (hidden_units, len(FEATURE_NAMES)))
+        self.output = self.numpy_random.normal(0, 1 / np.sqrt(hidden_units), hidden_units)
+
+    def forward(self, features):
+        """
+        Input:
+            features (numpy.ndarray) - a matrix with the features of a position
+                                       in every row
+        Output:
+            tuple(numpy.ndarray, numpy.ndarray) - the value of every position,
+                  and the outputs of the hidden layer (None for a linear model)
+        """
+        inputs = features / self.scale
+        if self.model == "linear":
+            return np.tanh(inputs @ self.linear), None
+        hidden = np.tanh(inputs @ self.hidden.T)
+        return np.tanh(hidden @ self.output), hidden
+
+    def update(self, features, targets):
+        """
+        Takes one step of gradient descent on the squared error of a minibatch.
+
+        Input:
+            features (numpy.ndarray) - features of the positions, one per row
+            targets (numpy.ndarray) - the target of every position
+        Output:
+            (float) - the mean squared error before the step
+        """
+        values, hidden = self.forward(features)
+        errors = values - targets
+        # Derivative of the loss by the output of the model, before tanh
+        gradient = errors * (1 - values ** 2) / len(targets)
+        inputs = features / self.scale
+        if self.model == "linear":
+            self.linear -= self.learning_rate * (inputs.T @ gradient)
+        else:
+            hidden_gradient = np.outer(gradient, self.output) * (1 - hidden ** 2)
+            self.output -= self.learning_rate * (hidden.T @ gradient)
+            self.hidden -= self.learning_rate * (hidden_gradient.T @ inputs)
+        return float(np.mean(errors ** 2))
+
+    def weights(self):
+        """
+        Output:
+            (list or NetworkWeights) - the weights in the form a search uses,
+                                       see evaluation.load_weights
+        """
+        if self.model == "linear":
+            return list(SCORE_SCALE * self.linear / self.scale)
+        return NetworkWeights(self.scale.tolist(), self.hidden.tolist(),
+                              self.output.tolist(), SCORE_SCALE)
+
+    def save(self, path):
+        """
+        Saves the weights, see evaluation.save_weights.
+        """
+        save_weights(path, self.weights(), self.number_of_rows, self.width, {
+            "trainer": "td-lambda", "td_lambda": self.td_lambda,
+            "iterations": self.iterations, "games": self.games})
+
+    def make_targets(self, games):
+        """
+        Input:
+            games (list[tuple]) - games made by play_training_game
+        Output:
+            tuple(numpy.ndarray, numpy.ndarray) - the features of all the
+                  positions, one per row, and their targets
+        """
+        all_features = []
+        all_targets = []
+        for features, winner in games:
+            features = np.array(features, dtype=float)
+            last_side = (len(features) - 1) % 2
+            final_result = 0.0 if winner is None else (1.0 if winner == last_side else -1.0)
+            values, _ = self.forward(features[:-1])
+            all_features.append(features)
+            all_targets.append(td_targets(values, final_result, self.td_lambda))
+            all_targets.append([final_result])
+        return np.concatenate(all_features), np.concatenate(all_targets)
+
+    def train_iteration(self, weights_path, executor):
+        """
+        Plays the games of an iteration with the weights in weights_path and
+        learns from them.
+
+        Input:
+            weights_path (str) - file the current weights are saved to
+            executor (Executor) - plays the games
+        Output:
+            (float) - mean squared error of the minibatches
+        """
+        self.save(weights_path)
+        tasks = []
+        for _ in range(self.games_per_iteration):
+            opening = random_opening(self.rows_with_pieces, self.width, self.opening_plies,
+                                     self.random)
+            tasks.append((weights_path, self.iterations, opening, self.rows_with_pieces,
+                          self.width, self.depth, self.max_plies, self.random.getrandbits(32)))
+        games = list(executor.map(play_training_game, *zip(*tasks)))
+
+        features, targets = self.make_targets(games)
+        order = self.numpy_random.permutation(len(targets))
+        errors = []
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            errors.append(self.update(features[batch], targets[batch]))
+        self.iterations += 1
+        self.games += len(games)
+        self.save(weights_path)
+        return float(np.mean(errors))
+
+    def train(self, iterations, weights_path, on_iteration=None):
+        """
+        Input:
+            iterations (int) - number of iterations to train
+            weights_path (str) - file the weights are saved to after every
+                                 iteration
+            on_iteration (function) - called as on_iteration(trainer, error)
+                                      after every iteration
+        """
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for _ in range(iterations):
+                error = self.train_iteration(weights_path, executor)
+                if on_iteration is not None:
+                    on_iteration(self, error)
+
+
+@click.command(name="checkers-td-train")
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--model', type=click.Choice(["linear", "network"]), default="linear")
+@click.option('--hidden-units', default=16, help="Size of the hidden layer of a network")
+@click.option('--iterations', default=20)
+@click.option('--games-per-iteration', default=32)
+@click.option('--td-lambda', default=0.7)
+@click.option('--learning-rate', default=0.05)
+@click.option('--depth', default=1, help="Depth the bots search to during self-play")
+@click.option('--workers', default=None, type=int)
+@click.option('--seed', default=None, type=int)
+@click.option('--output', default="weights.json", help="File the weights are saved to")
+def cmd(width, rows_with_pieces, model, hidden_units, iterations, games_per_iteration,
+        td_lambda, learning_rate, depth, workers, seed, output):
+    """
+    Trains the weights and saves them.
+    """
+    trainer = TDTrainer(rows_with_pieces, width, model, hidden_units, td_lambda,
+                        learning_rate, games_per_iteration=games_per_iteration,
+                        depth=depth, workers=workers, seed=seed)
+
+    def show_progress(trainer, error):
+        print(f"Iteration {trainer.iterations}: {trainer.games} games, error {error:.4f}")
+
+    trainer.train(iterations, output, show_progress)
+    print(f"Weights saved to {output}. Play with them with the player type search-bot:{output}")
+
+
+if __name__ == "__main__":
+    cmd()
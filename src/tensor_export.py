@@ -0,0 +1,254 @@
+"""
+This is a file that contains an exporter that turns recorded games (see
+record.py and selfplay.py) into NumPy arrays that a trainer can read
+without parsing any Python objects.
+
+Every position before a move of a game becomes one sample:
+- planes - a uint8 array of shape (5, number of rows, number of cols), in
+           the order of PLANE_NAMES: men and kings of the player to move,
+           men and kings of the opponent, and a plane that is 1 everywhere
+           if the first player is to move
+- results - the result of the game for the player to move: 1 for a win,
+            0 for a draw and -1 for a loss
+- moves - the index of the move that was made, see move_index
+
+Samples are written in chunks of a fixed number of positions, as three .npy
+files per chunk (planes-00000.npy, results-00000.npy, moves-00000.npy, ...),
+and a manifest.json that describes them. The files can be opened with
+np.load(path, mmap_mode='r'), so a trainer reads the positions straight
+from the disk without copying them (see load_chunks).
+
+To export the records of self-play (see selfplay.py), run the following
+from the root of the repository:
+
+    python3 src/tensor_export.py --input games.jsonl --output tensors
+
+Records can also be exported while they are played, by passing
+TensorWriter.on_game as the on_game of SelfPlay.run.
+"""
+
+import json
+import os
+
+import click
+import numpy as np
+
+from player import Player
+from selfplay import load_records
+
+PLANE_NAMES = ["own_men", "own_kings", "enemy_men", "enemy_kings", "side_to_move"]
+
+# The manifest (see TensorWriter.close) starts with these, so that a trainer
+# can tell whether it is able to read the chunks
+TENSORS_FORMAT = "checkers-training-tensors"
+TENSORS_VERSION = 1
+
+ARRAY_NAMES = ["planes", "results", "moves"]
+
+
+def move_index(origin, path, number_of_rows, number_of_cols):
+    """
+    Input:
+        origin (tuple(int,int)) - square the piece starts on
+        path (list[tuple(int,int)]) - squares the piece moves through
+        number_of_rows, number_of_cols (int) - size of the board
+    Output:
+        (int) - origin square * number of squares + last square of the path,
+                where squares are numbered row by row. Jumps that start and
+                end on the same squares share an index.
+    """
+    squares = number_of_rows * number_of_cols
+    last = path[-1]
+    return ((origin[0] * number_of_cols + origin[1]) * squares
+            + last[0] * number_of_cols + last[1])
+
+
+def fill_planes(game, player_index, planes):
+    """
+    Writes the planes of a position.
+
+    Input:
+        game (Game) - the position
+        player_index (int) - index of the player to move in game.players
+        planes (numpy.ndarray) - array of shape (5, number of rows, number of
+                                 cols) that is filled, see PLANE_NAMES
+    """
+    planes.fill(0)
+    for index, player in enumerate(game.players):
+        offset = 0 if index == player_index else 2
+        for piece in game.pieces_dict[player]:
+            row, col = piece.position
+            planes[offset + (1 if piece.is_king else 0), row, col] = 1
+    if player_index == 0:
+        planes[4] = 1
+
+
+class TensorWriter:
+    """
+    This class writes the positions of recorded games in chunks of .npy
+    files. All the records have to be of the same size of the board.
+
+    Public Attributes:
+        - directory (str) - the directory the files are written to
+        - number_of_rows, number_of_cols (int) - size of the board, known
+                                                 from the first record
+        - chunk_size (int) - number of positions in every chunk but the last
+        - chunks (list[int]) - number of positions in every written chunk
+    """
+
+    def __init__(self, directory, chunk_size=65536):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.number_of_rows = None
+        self.number_of_cols = None
+        self.chunks = []
+        self._board = None
+        self._filled = 0
+        self._planes = None
+        self._results = np.zeros(chunk_size, dtype=np.int8)
+        self._moves = np.zeros(chunk_size, dtype=np.int32)
+        os.makedirs(directory, exist_ok=True)
+
+    def add_record(self, record):
+        """
+        Adds every position of a record.
+
+        Input:
+            record (GameRecord) - the game
+        Raises:
+            ValueError - if the record is of another size of the board
+        """
+        players = [Player("Player 1", ""), Player("Player 2", "")]
+        game = record.new_game(players)
+        board = (game.board.number_of_rows, game.board.number_of_cols)
+        if self._board is None:
+            self._board = board
+            self.number_of_rows, self.number_of_cols = board
+            self._planes = np.zeros((self.chunk_size, len(PLANE_NAMES)) + board, dtype=np.uint8)
+        elif board != self._board:
+            raise ValueError(f"a record of a {board[0]} x {board[1]} board cannot be added to "
+                             f"positions of a {self._board[0]} x {self._board[1]} board")
+
+        for ply, (origin, path) in enumerate(record.moves):
+            player_index = ply % 2
+            fill_planes(game, player_index, self._planes[self._filled])
+            if record.result is None:
+                self._results[self._filled] = 0
+            else:
+                self._results[self._filled] = 1 if record.result == player_index else -1
+            self._moves[self._filled] = move_index(origin, path, *board)
+            self._filled += 1
+            if self._filled == self.chunk_size:
+                self.flush()
+            game.apply_move(players[player_index], origin, path)
+
+    def on_game(self, index, record):
+        """
+        Adds a record, with the arguments of the on_game of SelfPlay.run.
+        """
+        self.add_record(record)
+
+    def flush(self):
+        """
+        Writes the positions added since the last chunk as a new chunk.
+        """
+        if self._filled == 0:
+            return
+        number = len(self.chunks)
+        arrays = [self._planes, self._results, self._moves]
+        for name, array in zip(ARRAY_NAMES, arrays):
+            np.save(chunk_path(self.directory, name, number), array[:self._filled])
+        self.chunks.append(self._filled)
+        self._filled = 0
+
+    def close(self):
+        """
+        Writes the last chunk and the manifest. The manifest is written
+        under another name first and then renamed, so a trainer never reads
+        a half-written one.
+
+        Raises:
+            ValueError - if no positions were added
+        """
+        self.flush()
+        if self.chunks == []:
+            raise ValueError(f"no positions were added to {self.directory}")
+        manifest = {
+            "format": TENSORS_FORMAT,
+            "version": TENSORS_VERSION,
+            "board": [self.number_of_rows, self.number_of_cols],
+            "planes": PLANE_NAMES,
+            "chunks": self.chunks,
+        }
+        path = os.path.join(self.directory, "manifest.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(manifest, file)
+        os.replace(path + ".tmp", path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # An error while adding the records is not hidden by the error of
+        # closing a writer without positions
+        if exc_type is None or self.chunks or self._filled:
+            self.close()
+
+
+def chunk_path(directory, name, number):
+    """
+    Input:
+        directory (str) - the directory of the chunks
+        name (str) - one of ARRAY_NAMES
+        number (int) - number of the chunk, from 0
+    Output:
+        (str) - path of the file of the array in the chunk
+    """
+    return os.path.join(directory, f"{name}-{number:05d}.npy")
+
+
+def load_chunks(directory):
+    """
+    Opens the chunks written by a TensorWriter without reading them into
+    memory.
+
+    Input:
+        directory (str) - the directory of the chunks
+    Output:
+        list[tuple(numpy.memmap, numpy.memmap, numpy.memmap)] - planes,
+              results and moves of every chunk
+    Raises:
+        ValueError - if the directory has no chunks of positions, or they
+                     were written by a newer version
+    """
+    path = os.path.join(directory, "manifest.json")
+    with open(path) as file:
+        manifest = json.load(file)
+    if manifest.get("format") != TENSORS_FORMAT:
+        raise ValueError(f"{path} is not a manifest of training positions")
+    if manifest["version"] > TENSORS_VERSION:
+        raise ValueError(f"{path} was made by a newer version (version {manifest['version']})")
+    if manifest["chunks"] == []:
+        raise ValueError(f"{path} has no chunks of positions")
+    return [tuple(np.load(chunk_path(directory, name, number), mmap_mode="r")
+                  for name in ARRAY_NAMES)
+            for number in range(len(manifest["chunks"]))]
+
+
+@click.command(name="checkers-export-tensors")
+@click.option('--input', 'input_path', default="games.jsonl",
+              help="File of records made by selfplay.py")
+@click.option('--output', default="tensors", help="Directory the chunks are written to")
+@click.option('--chunk-size', default=65536, help="Number of positions in a chunk")
+def cmd(input_path, output, chunk_size):
+    """
+    Exports the positions of the records.
+    """
+    with TensorWriter(output, chunk_size) as writer:
+        for record in load_records(input_path):
+            writer.add_record(record)
+    print(f"{sum(writer.chunks)} positions written to {output} in {len(writer.chunks)} chunks")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,31 @@
+from adjudication import Adjudicator, REPETITION, MATERIAL
+
+
+def test_adjudicator_draws_repeated_king_moves(make_game):
+    game = make_game([((0, 1), 0, True), ((7, 6), 1, True)])
+    players = game.players
+    king_1 = game.board.grid[0][1]
+    king_2 = game.board.grid[7][6]
+    adjudicator = Adjudicator()
+    adjudicator.start(game, players[0])
+
+    verdict = None
+    for _ in range(2):
+        for piece, path, next_player in [(king_1, [(1, 2)], players[1]),
+                                         (king_2, [(6, 5)], players[0]),
+                                         (king_1, [(0, 1)], players[1]),
+                                         (king_2, [(7, 6)], players[0])]:
+            assert verdict is None
+            captured = game.make_move([piece, path]).captured
+            verdict = adjudicator.record_move(game, True, captured, next_player)
+    assert verdict == (None, REPETITION)
+
+
+def test_adjudicator_decides_by_material(make_game):
+    game = make_game([((0, 1), 0, True), ((0, 3), 0, True), ((7, 6), 1, False)])
+    adjudicator = Adjudicator(adjudicate_after=1)
+    adjudicator.start(game, game.players[0])
+    king = game.board.grid[0][1]
+    captured = game.make_move([king, [(1, 2)]]).captured
+    assert adjudicator.record_move(game, True, captured, game.players[1]) == \
+        (game.players[0], MATERIAL)
@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+import analysis
+from analysis import AnalysisDaemon, PLAYERS, analyse_positions
+from game import Game
+from search import Searcher
+
+
+def test_daemon_analyses_a_batch_of_positions(tmp_path):
+    path = str(tmp_path / "analysis.sock")
+    game = Game(PLAYERS, 2, 6)
+    positions = [(game.snapshot(), 0)]
+    for move in game.get_possible_moves(PLAYERS[0]):
+        move_game = Game.from_snapshot(game.snapshot(), PLAYERS)
+        move_game.apply_move(PLAYERS[0], move[0].position, move[1])
+        positions.append((move_game.snapshot(), 1))
+
+    async def run():
+        daemon = AnalysisDaemon(path, processes=1, batch_size=4)
+        await daemon.start()
+        try:
+            # The client blocks on its socket, so it runs in a thread
+            return await asyncio.to_thread(
+                lambda: list(analyse_positions(path, positions, depth=2)))
+        finally:
+            await daemon.close()
+
+    results = asyncio.run(run())
+    assert sorted(index for index, _, _, _ in results) == list(range(len(positions)))
+    for index, score, depth, move in results:
+        snapshot, side = positions[index]
+        expected_score, expected_move = Searcher().search(
+            Game.from_snapshot(snapshot, PLAYERS), PLAYERS[side], 2)
+        assert depth == 2
+        assert score == expected_score
+        assert move == (expected_move[0].position, list(expected_move[1]))
+
+
+def test_a_bad_request_does_not_fail_the_others(tmp_path):
+    path = str(tmp_path / "analysis.sock")
+    game = Game(PLAYERS, 2, 6)
+    positions = [((2, 2, ((9, 9, 0, False),)), 0),
+                 ((6, 6, ((0, 1, 5, False),)), 0),
+                 ((100000, 100000, ()), 0),
+                 (game.snapshot(), 0)]
+
+    async def run():
+        daemon = AnalysisDaemon(path, processes=1, batch_size=4, batch_delay=0.5)
+        await daemon.start()
+        try:
+            return await asyncio.to_thread(
+                lambda: list(analyse_positions(path, positions, depth=2)))
+        finally:
+            await daemon.close()
+
+    results = sorted(asyncio.run(run()))
+    assert [(index, score) for index, score, _, _ in results[:3]] == \
+        [(0, None), (1, None), (2, None)]
+    index, score, depth, move = results[3]
+    assert (index, depth) == (3, 2)
+    assert score == Searcher().search(game, PLAYERS[0], 2)[0]
+
+    # A request that fails in the worker only fails itself
+    analysis._start_worker(1024, None)
+    results = analysis._analyse_batch([("bad", (2, 2, ((9, 9, 0, False),)), 0, 2),
+                                       ("good", game.snapshot(), 0, 2)])
+    assert results[0][0] == "bad" and len(results[0]) == 2
+    assert results[1][:3] == ("good", score, 2)
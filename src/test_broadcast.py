@@ -0,0 +1,59 @@
+import pytest
+
+from broadcast import BroadcastHub
+from game import Game
+from player import Player
+
+
+def play(game, plies):
+    for ply in range(plies):
+        player = game.players[ply % 2]
+        game.make_move(game.get_possible_moves(player)[0])
+
+
+def make_game():
+    return Game([Player("Player 1", ""), Player("Player 2", "")], 2, 6)
+
+
+def test_joiner_gets_a_snapshot_then_deltas():
+    game = make_game()
+    hub = BroadcastHub.for_game(game)
+    play(game, 1)
+
+    subscription = hub.subscribe()
+    snapshot = subscription.poll()
+    assert len(snapshot) == 1
+    assert snapshot[0].startswith("snapshot 1 6 6 1 ")
+
+    piece = game.get_possible_moves(game.players[1])[0][0]
+    origin = piece.position
+    delta = game.make_move(game.get_possible_moves(game.players[1])[0])
+    path = " ".join(f"{row},{col}" for row, col in delta.path)
+    assert subscription.poll() == [f"delta 2 1 0 0 {origin[0]},{origin[1]} {path}"]
+    assert subscription.poll() == []
+
+
+def test_slow_spectator_catches_up_with_a_snapshot():
+    game = make_game()
+    hub = BroadcastHub.for_game(game, buffer_size=2)
+    fast = hub.subscribe()
+    slow = hub.subscribe()
+    fast.poll()
+    slow.poll()
+
+    play(game, 2)
+    assert [message.split()[:2] for message in fast.poll()] == [["delta", "1"], ["delta", "2"]]
+    game.make_move(game.get_possible_moves(game.players[0])[0])
+    assert [message.split()[:2] for message in fast.poll()] == [["delta", "3"]]
+    game.make_move(game.get_possible_moves(game.players[1])[0])
+    assert not fast.lagging
+
+    # The slow spectator missed more moves than its buffer holds
+    assert slow.lagging
+    messages = slow.poll()
+    assert len(messages) == 1
+    assert messages[0].split()[:5] == ["snapshot", "4", "6", "6", "0"]
+
+    hub.end("0")
+    assert slow.poll() == ["end 0"]
+    assert slow.closed
@@ -0,0 +1,121 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from distributed import Coordinator, run_worker, _run_task
+from selfplay import SelfPlay, play_game
+from tournament import Tournament
+
+
+def start_workers(port, count):
+    threads = [threading.Thread(target=run_worker, args=("127.0.0.1", port), daemon=True)
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_workers_play_a_tournament():
+    coordinator = Coordinator(port=0, batch_size=2)
+    port = coordinator.start()
+    threads = start_workers(port, 2)
+    try:
+        tournament = Tournament("random-bot", "random-bot", rows_with_pieces=2, width=6,
+                                max_pairs=12, max_plies=60, workers=4, seed=1)
+        result = tournament.run(executor=coordinator)
+        assert len(result.pair_scores) == 12
+    finally:
+        coordinator.shutdown()
+    for thread in threads:
+        thread.join(10)
+        assert not thread.is_alive()
+
+
+def test_batch_of_a_dead_worker_is_played_by_another():
+    coordinator = Coordinator(port=0, batch_size=3)
+    port = coordinator.start()
+    try:
+        self_play = SelfPlay("random-bot", games=3, rows_with_pieces=2, width=6,
+                             max_plies=60, workers=2, seed=2)
+        records = []
+        self_play_thread = threading.Thread(
+            target=lambda: records.extend(self_play.run(executor=coordinator)))
+        self_play_thread.start()
+        # The games are handed out only once all of them are queued
+        deadline = time.monotonic() + 10
+        while len(coordinator._queue) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # This worker takes the first batch and dies without playing it
+        with socket.create_connection(("127.0.0.1", port)) as connection:
+            connection.sendall(b"HELLO \nWORK\n")
+            words = connection.makefile("r").readline().split(maxsplit=2)
+            assert words[0] == "BATCH"
+            assert len(json.loads(words[2])) == 3
+
+        start_workers(port, 1)
+        self_play_thread.join(30)
+        assert len(records) == 3
+        assert all(record.moves for record in records)
+    finally:
+        coordinator.shutdown()
+
+
+def test_workers_need_the_token_and_refuse_other_players():
+    coordinator = Coordinator(port=0, token="secret")
+    port = coordinator.start()
+    try:
+        with socket.create_connection(("127.0.0.1", port)) as connection:
+            connection.sendall(b"HELLO wrong\nWORK\n")
+            assert connection.makefile("r").readline() == ""
+        with pytest.raises(ValueError):
+            coordinator.submit(play_game, "engine:touch /tmp/x", "random-bot", [], 2, 6)
+    finally:
+        coordinator.shutdown()
+    assert "error" in _run_task("game", ["search-bot:/etc/passwd", "random-bot", [], 2, 6])
+
+
+def test_tasks_without_a_result_are_queued_again():
+    coordinator = Coordinator(port=0, batch_size=2)
+    port = coordinator.start()
+    try:
+        futures = [coordinator.submit(play_game, "random-bot", "random-bot", [], 2, 6, 40, seed)
+                   for seed in range(2)]
+        with socket.create_connection(("127.0.0.1", port)) as connection, \
+                connection.makefile("r") as stream:
+            connection.sendall(b"HELLO \nWORK\n")
+            words = stream.readline().split(maxsplit=2)
+            assert len(json.loads(words[2])) == 2
+            # Only the result of the first task is sent back
+            connection.sendall(f"RESULT {words[1]} [{{\"result\": 1}}]\nWORK\n".encode())
+            words = stream.readline().split(maxsplit=2)
+            assert words[0] == "BATCH" and len(json.loads(words[2])) == 1
+        assert futures[0].result(10) == 1
+        start_workers(port, 1)
+        assert futures[1].result(30)["moves"]
+    finally:
+        coordinator.shutdown()
+
+
+def test_malformed_results_are_queued_again():
+    coordinator = Coordinator(port=0, batch_size=2)
+    port = coordinator.start()
+    try:
+        futures = [coordinator.submit(play_game, "random-bot", "random-bot", [], 2, 6, 40, seed)
+                   for seed in range(2)]
+        for results in ["[5]", "5", "[{}, {}]", "[1"]:
+            with socket.create_connection(("127.0.0.1", port)) as connection, \
+                    connection.makefile("r") as stream:
+                connection.sendall(b"HELLO \nWORK\n")
+                words = stream.readline().split(maxsplit=2)
+                assert len(json.loads(words[2])) == 2
+                connection.sendall(f"RESULT {words[1]} {results}\n".encode())
+                # The coordinator drops the connection
+                assert stream.readline() == ""
+        start_workers(port, 1)
+        for future in futures:
+            assert future.result(30)["moves"]
+    finally:
+        coordinator.shutdown()
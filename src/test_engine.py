@@ -0,0 +1,62 @@
+import io
+import sys
+
+import pytest
+
+import engine
+from engine import Engine, EngineError, EnginePlayer, format_position, parse_position
+from game import Game
+from player import Player
+from bot import RandomBot
+from match import play_match
+
+ENGINE_COMMAND = [sys.executable, engine.__file__, "--depth", "2"]
+
+
+def test_position_round_trip():
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    snapshot = Game(players, 2, 6).snapshot()
+    assert parse_position(format_position(snapshot, 1).split()) == (snapshot, 1)
+
+
+def test_engine_answers_go_with_a_legal_move():
+    output = io.StringIO()
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = Game(players, 2, 6)
+    engine = Engine(depth=2, output=output)
+    engine.run(io.StringIO("isready\n" + format_position(game.snapshot(), 0) +
+                           "\ngo nodes 500\nquit\n"))
+
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "readyok"
+    assert len(lines) == 2
+    words = lines[1].split()
+    assert words[0] == "bestmove"
+    legal = {" ".join(f"{row},{col}" for row, col in [move[0].position] + move[1])
+             for move in game.get_possible_moves(players[0])}
+    assert " ".join(words[1:]) in legal
+
+
+def test_engine_player_plays_a_game_from_another_process():
+    engine_player = EnginePlayer("engine", "white", ENGINE_COMMAND)
+    try:
+        result = play_match([engine_player, RandomBot("random", "black")], 2, 6)
+    finally:
+        engine_player.close()
+    assert result.plies > 0
+
+
+def test_engine_player_refuses_illegal_moves():
+    # An engine that always answers with a move from a square off the board
+    script = ("import sys\n"
+              "for line in sys.stdin:\n"
+              "    if line.startswith('engine'): print('ready', flush=True)\n"
+              "    if line.startswith('go'): print('bestmove 9,9 8,8', flush=True)\n")
+    engine_player = EnginePlayer("engine", "white", [sys.executable, "-c", script],
+                                 ponder=False)
+    game = Game([engine_player, Player("Player 2", "black")], 2, 6)
+    try:
+        with pytest.raises(EngineError):
+            engine_player.choose_move(game.board, game.get_possible_moves(engine_player))
+    finally:
+        engine_player.close()
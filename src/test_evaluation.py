@@ -0,0 +1,24 @@
+from evaluation import EvaluationAccumulator, attach_evaluation
+
+
+def test_evaluation_is_kept_up_to_date(make_game):
+    game = make_game([((5, 2), 0, False), ((6, 3), 1, False), ((3, 3), 1, True),
+                      ((0, 1), 0, False)])
+    player_1 = game.players[0]
+    accumulator = attach_evaluation(game)
+    piece = game.board.grid[5][2]
+
+    def rescanned():
+        fresh = EvaluationAccumulator()
+        fresh.reset(game)
+        return fresh.evaluate(game, player_1), fresh.features(player_1)
+
+    before = rescanned()
+    captured = game.make_move([piece, [(7, 4)]]).captured
+    assert (accumulator.evaluate(game, player_1), accumulator.features(player_1)) == rescanned()
+    # Player 1 captured a man and made a king: one man against none,
+    # and one king against one
+    assert accumulator.features(player_1)[:2] == [1, 0]
+
+    game.unmake_move(piece, (5, 2), False, captured)
+    assert (accumulator.evaluate(game, player_1), accumulator.features(player_1)) == before
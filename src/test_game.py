@@ -0,0 +1,85 @@
+import pytest
+
+from game import IllegalMoveError
+
+
+def test_king_captures_from_a_distance(make_game):
+    game = make_game([((1, 0), 0, True), ((4, 3), 1, False)])
+    king = game.board.grid[1][0]
+    assert game.get_possible_moves(game.players[0]) == [[king, [(5, 4)]]]
+
+    delta = game.make_move([king, [(5, 4)]])
+    assert delta.captured_squares == [(4, 3)]
+    assert game.pieces_dict[game.players[1]] == []
+    assert game.board.grid[4][3] is None
+
+
+def test_unmake_move_restores_position(make_game):
+    game = make_game([((5, 2), 0, False), ((6, 3), 1, False), ((3, 3), 1, False)])
+    piece = game.board.grid[5][2]
+    before = [[repr(cell) for cell in row] for row in game.board.grid]
+
+    captured = game.make_move([piece, [(7, 4)]]).captured
+    assert piece.is_king
+    game.unmake_move(piece, (5, 2), False, captured)
+
+    assert [[repr(cell) for cell in row] for row in game.board.grid] == before
+    assert not piece.is_king
+    assert len(game.pieces_dict[game.players[1]]) == 2
+
+
+def test_material_counts_follow_moves(make_game):
+    game = make_game([((5, 2), 0, False), ((6, 3), 1, False), ((3, 3), 1, True),
+                      ((0, 1), 0, False)])
+    player_1, player_2 = game.players
+    piece = game.board.grid[5][2]
+
+    # Player 1 captures a man and makes a king
+    captured = game.make_move([piece, [(7, 4)]]).captured
+    assert game.men_counts == {player_1: 1, player_2: 0}
+    assert game.king_counts == {player_1: 1, player_2: 1}
+
+    game.unmake_move(piece, (5, 2), False, captured)
+    assert game.men_counts == {player_1: 2, player_2: 1}
+    assert game.king_counts == {player_1: 0, player_2: 1}
+
+
+def test_apply_move_rejects_illegal_moves(make_game):
+    # The capture is compulsory, so the quiet step of (2, 5) is illegal
+    game = make_game([((2, 1), 0, False), ((2, 5), 0, False), ((3, 2), 1, False)])
+    player = game.players[0]
+    before = game.snapshot()
+    with pytest.raises(IllegalMoveError):
+        game.apply_move(player, (2, 5), [(3, 6)])
+    with pytest.raises(IllegalMoveError):
+        game.apply_move(player, (2, 1), [(5, 4)])
+    assert game.snapshot() == before
+
+    delta = game.apply_move(player, [2, 1], [[4, 3]])
+    assert len(delta.captured) == 1
+
+
+def test_legal_moves_are_generated_once_per_ply(make_game):
+    game = make_game([((2, 1), 0, False), ((5, 4), 1, False)])
+    player = game.players[0]
+    legal_moves = game.get_legal_moves(player)
+    assert game.get_legal_moves(player) is legal_moves
+    assert set(legal_moves) == {((2, 1), ((3, 0),)), ((2, 1), ((3, 2),))}
+
+    game.apply_move(player, (2, 1), [(3, 2)])
+    assert game.get_legal_moves(player) is not legal_moves
+    assert set(game.get_legal_moves(player)) == {((3, 2), ((4, 1),)), ((3, 2), ((4, 3),))}
+
+
+def test_make_move_reports_a_delta_to_observers(make_game):
+    game = make_game([((5, 2), 0, False), ((6, 3), 1, False), ((3, 3), 1, False)])
+    piece = game.board.grid[5][2]
+    deltas = []
+    game.add_observer(lambda game, delta: deltas.append(delta))
+
+    delta = game.make_move([piece, [(7, 4)]])
+    assert deltas == [delta]
+    assert delta.player is game.players[0]
+    assert (delta.origin, delta.path) == ((5, 2), [(7, 4)])
+    assert delta.captured_squares == [(6, 3)]
+    assert delta.promoted and not delta.was_king
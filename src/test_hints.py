@@ -0,0 +1,28 @@
+from hints import HintAnalyser
+
+
+def test_hint_ranks_the_capture_first(make_game):
+    # The man on (2, 1) can capture (3, 2); the man on (2, 5) can only step
+    game = make_game([((2, 1), 0, False), ((2, 5), 0, False), ((3, 2), 1, False),
+                      ((7, 0), 1, False)])
+    analyser = HintAnalyser(depth=2, seconds=5.0, processes=1)
+    try:
+        ranking = analyser.analyse(game, game.players[0])
+    finally:
+        analyser.close()
+    assert len(ranking) == 1
+    score, depth, move = ranking[0]
+    assert move[0].position == (2, 1) and list(move[1]) == [(4, 3)]
+    assert depth > 0
+
+
+def test_hint_ranks_safe_moves_above_losing_ones(make_game):
+    # Stepping to (3, 4) lets the enemy man on (4, 5) capture
+    game = make_game([((2, 3), 0, False), ((5, 6), 1, False), ((4, 5), 1, False)])
+    analyser = HintAnalyser(depth=2, seconds=5.0, processes=1)
+    try:
+        ranking = analyser.analyse(game, game.players[0])
+    finally:
+        analyser.close()
+    assert [list(move[1]) for _, _, move in ranking] == [[(3, 2)], [(3, 4)]]
+    assert ranking[0][0] > ranking[1][0]
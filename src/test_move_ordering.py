@@ -0,0 +1,33 @@
+from search import Searcher
+from move_ordering import MoveOrderer, NoOrdering, move_key
+
+
+def test_orderer_puts_longest_jumps_first(make_game):
+    game = make_game([((2, 1), 0, False), ((3, 2), 1, False), ((5, 4), 1, False),
+                      ((2, 5), 0, False), ((3, 6), 1, False)])
+    jumps = game.get_all_jumps(game.players[0])
+    ordered = MoveOrderer().order(jumps, 0, game.board)
+    assert ordered[0][1] == [(4, 3), (6, 5)]
+
+
+def test_orderer_prefers_killers_then_history(make_game):
+    game = make_game([((2, 1), 0, False), ((2, 5), 0, False)])
+    moves = game.get_possible_moves(game.players[0])
+    orderer = MoveOrderer()
+
+    orderer.cutoff(moves[3], 1, 3)
+    assert move_key(orderer.order(moves, 1, game.board)[0]) == move_key(moves[3])
+
+    # At another ply the killer does not apply, but its history score does
+    orderer.cutoff(moves[2], 2, 1)
+    assert move_key(orderer.order(moves, 5, game.board)[0]) == move_key(moves[3])
+    assert move_key(orderer.order(moves, 2, game.board)[0]) == move_key(moves[2])
+
+
+def test_ordering_does_not_change_the_result(make_game):
+    game = make_game([((2, 1), 0, False), ((2, 3), 0, True), ((5, 2), 1, False),
+                      ((5, 6), 1, False), ((6, 5), 1, False)])
+    player = game.players[0]
+    ordered_score, _ = Searcher().search(game, player, 4)
+    unordered_score, _ = Searcher(orderer=NoOrdering()).search(game, player, 4)
+    assert ordered_score == unordered_score
@@ -0,0 +1,14 @@
+from search import Searcher
+from parallel_search import ParallelSearcher
+
+
+def test_parallel_search_agrees_with_search(make_game):
+    game = make_game([((3, 2), 0, False), ((5, 4), 1, False), ((1, 6), 0, False)])
+    player = game.players[0]
+    searcher = ParallelSearcher(workers=2, table_entries=1024)
+    try:
+        score, move = searcher.search(game, player, 4)
+    finally:
+        searcher.close()
+    assert score == Searcher().search(game, player, 4)[0]
+    assert move[1] != [(4, 3)]
@@ -0,0 +1,54 @@
+from search import Searcher, search_fingerprint
+from transposition import EXACT
+from persistent_cache import PersistentCache
+
+
+def test_persistent_cache_warm_starts_a_new_run(make_game, tmp_path):
+    path = str(tmp_path / "search.cache")
+    game = make_game([((3, 2), 0, False), ((5, 4), 1, False), ((1, 6), 0, False)])
+    player = game.players[0]
+
+    cache = PersistentCache(path, max_bytes=64 * 1024)
+    score, move = Searcher(table=cache).search(game, player, 4)
+    cache.close()
+
+    cache = PersistentCache(path, max_bytes=64 * 1024)
+    searcher = Searcher(table=cache)
+    assert searcher.search(game, player, 4) == (score, move)
+    assert searcher.nodes == 0
+    cache.close()
+
+
+def test_persistent_cache_prefers_deeper_results(tmp_path):
+    cache = PersistentCache(str(tmp_path / "search.cache"), max_bytes=64 + 16 * 4)
+    assert cache.entries == 4
+    cache.store(1, 6, 10, EXACT)
+    # Another position in the same slot does not push out a deeper result
+    cache.store(5, 2, 20, EXACT)
+    assert cache.probe(1) == (6, 10, EXACT, 0, 0)
+    assert cache.probe(5) is None
+    cache.close()
+
+    # In the next run, the old deep result makes way for new ones
+    cache = PersistentCache(str(tmp_path / "search.cache"), max_bytes=64 + 16 * 4)
+    assert cache.probe(1) == (6, 10, EXACT, 0, 0)
+    cache.store(5, 2, 20, EXACT)
+    assert cache.probe(5) == (2, 20, EXACT, 0, 0)
+    cache.close()
+
+
+def test_persistent_cache_of_other_settings_is_replaced_safely(tmp_path):
+    path = str(tmp_path / "search.cache")
+    cache = PersistentCache(path, max_bytes=64 * 1024, fingerprint=search_fingerprint())
+    cache.store(1, 6, 10, EXACT)
+
+    other = PersistentCache(path, max_bytes=64 * 1024,
+                            fingerprint=search_fingerprint(weights=[1, 2, 3, 4, 5, 6]))
+    assert other.probe(1) is None
+    # A smaller file replaces the old one without truncating it under the
+    # cache that still has it open
+    smaller = PersistentCache(path, max_bytes=1024, fingerprint=search_fingerprint())
+    assert smaller.entries < cache.entries
+    assert cache.probe(1) == (6, 10, EXACT, 0, 0)
+    for table in (cache, other, smaller):
+        table.close()
@@ -0,0 +1,19 @@
+from game import Game
+from player import Player
+from search import SearchBot
+from pondering import Ponderer
+
+
+def test_ponderer_fills_the_table_of_the_bot():
+    human = Player("Player 1", "white")
+    bot = SearchBot("Player 2", "black", depth=3)
+    game = Game([human, bot], 2, 6)
+    ponderer = Ponderer(bot)
+    ponderer.start(game, human)
+    ponderer.wait()
+    moves = game.get_possible_moves(human)
+    assert ponderer.positions == len(moves)
+
+    game.make_move(moves[0])
+    bot.choose_move(game.board, game.get_possible_moves(bot))
+    assert bot.searcher.nodes == 0
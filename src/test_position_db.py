@@ -0,0 +1,62 @@
+from player import Player
+from position_db import CONTINUATIONS, PositionDatabase, move_text, to_signed
+from record import GameRecord
+from selfplay import play_game
+from zobrist import hash_game
+
+
+def test_continuations_add_up_to_the_games_through_a_position(tmp_path, make_records):
+    records = make_records(6)
+    database = PositionDatabase(str(tmp_path / "positions.db"))
+    # A batch size that does not divide the number of records
+    assert database.add_records(records, batch_size=4) == 6
+
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    game = records[0].new_game(players)
+    size = (game.board.number_of_rows, game.board.number_of_cols)
+    start = hash_game(game, players[0])
+    games, wins, draws, losses = database.position(start, *size)
+    assert games == wins + draws + losses == 6
+
+    continuations = database.continuations(start, *size)
+    assert sum(statistics.games for statistics in continuations) == 6
+    assert [s.games for s in continuations] == sorted((s.games for s in continuations),
+                                                      reverse=True)
+    origin, path = records[0].moves[0]
+    first = next(s for s in continuations if s.move == move_text(origin, path))
+    game.apply_move(players[0], origin, path)
+    assert first.next_hash == hash_game(game, players[1])
+    assert database.position(first.next_hash, *size)[0] == first.games
+
+    # Adding the same records again doubles every count
+    database.add_records(records)
+    assert database.position(start, *size) == (12, 2 * wins, 2 * draws, 2 * losses)
+    database.close()
+
+
+def test_continuations_are_read_from_the_covering_index(tmp_path):
+    database = PositionDatabase(str(tmp_path / "positions.db"))
+    plan = database._connection.execute("EXPLAIN QUERY PLAN " + CONTINUATIONS,
+                                        (to_signed(1 << 63), 4, 6, 1)).fetchall()
+    assert "COVERING INDEX moves_by_games" in str(plan)
+    database.close()
+
+
+def test_positions_repeated_in_a_game_are_counted_once(tmp_path):
+    players = [Player("Player 1", ""), Player("Player 2", "")]
+    for seed in range(50):
+        record = GameRecord.from_dict(play_game("smart-bot", "smart-bot", [], 2, 6,
+                                                max_plies=300, seed=seed))
+        hashes = [hash_game(game, players[ply % 2])
+                  for ply, game in enumerate(record.replay(players))]
+        if len(set(hashes)) < len(hashes):
+            break
+    else:
+        raise AssertionError("no game repeats a position")
+
+    database = PositionDatabase(str(tmp_path / "positions.db"))
+    database.add_records([record])
+    connection = database._connection
+    assert connection.execute("SELECT MAX(games) FROM positions").fetchone() == (1,)
+    assert connection.execute("SELECT MAX(games) FROM moves").fetchone() == (1,)
+    database.close()
@@ -0,0 +1,67 @@
+import pygame
+import pytest
+
+from game import Game
+from player import Player
+from record import GameRecord, KeyframeIndex, load_record
+from render import render_frames, make_sprite_sheet, save_frames
+from gui import draw_board, RED, BLACK
+from match import play_match
+from bot import RandomBot
+
+
+def make_record():
+    player_1 = Player("Player 1", "Red")
+    player_2 = Player("Player 2", "Black")
+    game = Game([player_1, player_2], 2, 8)
+    record = GameRecord.for_game(game)
+    for player in [player_1, player_2, player_1]:
+        move = game.get_possible_moves(player)[0]
+        record.add_move(move)
+        game.make_move(move)
+    return record
+
+
+def test_record_round_trip(tmp_path):
+    record = make_record()
+    record.save(tmp_path / "game.json")
+    loaded = load_record(tmp_path / "game.json")
+    assert loaded.moves == record.moves
+    assert (loaded.width, loaded.rows_with_pieces) == (8, 2)
+
+
+def test_render_frames_offscreen():
+    frames = render_frames(make_record(), size=(80, 80))
+    # The starting position and one frame per move
+    assert len(frames) == 4
+    assert frames[0].get_size() == (80, 80)
+
+    sheet = make_sprite_sheet(frames, columns=3)
+    assert sheet.get_size() == (240, 160)
+
+
+def test_players_without_a_colour_are_drawn():
+    game = Game([Player("Player 1", ""), Player("Player 2", "no such colour")], 2, 8)
+    surface = pygame.Surface((400, 400))
+    draw_board(game, surface)
+    # Centres of the pieces on (0, 1) and (5, 0), on squares of 51 x 67 pixels
+    assert surface.get_at((51 + 25, 33))[:3] == RED
+    assert surface.get_at((25, 5 * 67 + 33))[:3] == BLACK
+
+
+def test_save_frames(tmp_path):
+    paths = save_frames(make_record(), str(tmp_path), size=(40, 40))
+    assert len(paths) == 4
+    assert all((tmp_path / f"frame_{ply:04d}.png").exists() for ply in range(4))
+
+
+def test_keyframe_index_matches_replay():
+    players = [RandomBot("Player 1", "Red"), RandomBot("Player 2", "Black")]
+    record = GameRecord(8, 3)
+    play_match(players, 3, 8, record=record)
+    snapshots = [game.snapshot() for game in record.replay()]
+
+    index = KeyframeIndex(record, interval=5)
+    assert len(index.keyframes) == len(record.moves) // 5 + 1
+    for ply in [len(snapshots) - 1, 0, 7, 5, 4]:
+        assert index.position(ply).snapshot() == snapshots[ply]
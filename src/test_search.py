@@ -0,0 +1,28 @@
+from game import Game
+from player import Player
+from search import Searcher, SearchBot
+
+
+def test_quiescence_sees_the_recapture(make_game):
+    # Moving to (4, 3) lets the enemy piece on (5, 4) jump over it
+    game = make_game([((3, 2), 0, False), ((5, 4), 1, False)])
+    player = game.players[0]
+
+    _, move = Searcher(quiescence_nodes=0).search(game, player, 1)
+    assert move[1] == [(4, 3)]
+
+    _, move = Searcher().search(game, player, 1)
+    assert move[1] == [(4, 1)]
+
+
+def test_search_bot_does_not_move_real_pieces():
+    player_1 = SearchBot("search-bot", "white", depth=3)
+    player_2 = Player("Player 2", "black")
+    game = Game([player_1, player_2], 2, 8)
+    positions = [piece.position for piece in game.pieces_dict[player_1]]
+
+    possible_moves = game.get_possible_moves(player_1)
+    move = player_1.choose_move(game.board, possible_moves)
+
+    assert move in possible_moves
+    assert [piece.position for piece in game.pieces_dict[player_1]] == positions
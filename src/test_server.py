@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from game import Game
+from server import GameServer, PLAYERS, format_square
+
+
+async def send(writer, line):
+    writer.write((line + "\n").encode())
+    await writer.drain()
+
+
+async def receive(reader):
+    line = await asyncio.wait_for(reader.readline(), 10)
+    return line.decode().split()
+
+
+def first_move(width, rows_with_pieces):
+    """Returns the first legal move of the starting position, as protocol words"""
+    game = Game(PLAYERS, rows_with_pieces, width)
+    move = game.get_possible_moves(PLAYERS[0])[0]
+    return [format_square(square) for square in [move[0].position] + list(move[1])]
+
+
+def test_two_clients_play_a_game():
+    async def run():
+        server = GameServer(processes=1)
+        port = await server.start(port=0)
+        try:
+            reader_1, writer_1 = await asyncio.open_connection("127.0.0.1", port)
+            reader_2, writer_2 = await asyncio.open_connection("127.0.0.1", port)
+
+            await send(writer_1, "CREATE 6 2")
+            assert await receive(reader_1) == ["CREATED", "1", "0"]
+            await send(writer_2, "JOIN 1")
+            assert await receive(reader_2) == ["JOINED", "1", "1"]
+
+            await send(writer_2, "MOVE 1 0,0 1,1")
+            assert await receive(reader_2) == ["ERROR", "it", "is", "not", "your", "turn"]
+            await send(writer_1, "MOVE 1 0,1 4,1")
+            assert await receive(reader_1) == ["ERROR", "illegal", "move"]
+
+            move = first_move(6, 2)
+            await send(writer_1, "MOVE 1 " + " ".join(move))
+            assert await receive(reader_1) == ["MOVED", "1", "0"] + move
+            assert await receive(reader_2) == ["MOVED", "1", "0"] + move
+
+            # The game is lost by the client that leaves
+            writer_1.close()
+            assert await receive(reader_2) == ["OVER", "1", "1"]
+            assert server.games == {}
+            writer_2.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_bot_answers_from_the_process_pool():
+    async def run():
+        server = GameServer(processes=1)
+        port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await send(writer, "CREATE 6 2 random-bot")
+            assert await receive(reader) == ["CREATED", "1", "0"]
+
+            await send(writer, "MOVE 1 " + " ".join(first_move(6, 2)))
+            assert (await receive(reader))[:3] == ["MOVED", "1", "0"]
+            assert (await receive(reader))[:3] == ["MOVED", "1", "1"]
+
+            await send(writer, "BOARD 1")
+            words = await receive(reader)
+            assert words[:5] == ["BOARD", "1", "0", "6", "6"]
+            assert len(words) == 5 + 12
+            writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_spectator_gets_a_snapshot_and_the_moves():
+    async def run():
+        server = GameServer(processes=1)
+        port = await server.start(port=0)
+        try:
+            reader_1, writer_1 = await asyncio.open_connection("127.0.0.1", port)
+            reader_2, writer_2 = await asyncio.open_connection("127.0.0.1", port)
+            reader_3, writer_3 = await asyncio.open_connection("127.0.0.1", port)
+            await send(writer_1, "CREATE 6 2")
+            await receive(reader_1)
+            await send(writer_2, "JOIN 1")
+            await receive(reader_2)
+
+            await send(writer_3, "WATCH 1")
+            assert (await receive(reader_3))[:6] == ["WATCH", "1", "snapshot", "0", "6", "6"]
+
+            move = first_move(6, 2)
+            await send(writer_1, "MOVE 1 " + " ".join(move))
+            assert await receive(reader_3) == ["WATCH", "1", "delta", "1", "0", "0", "0"] + move
+
+            writer_2.close()
+            assert await receive(reader_3) == ["WATCH", "1", "end", "0"]
+            writer_1.close()
+            writer_3.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_huge_boards_and_lines_are_refused():
+    async def run():
+        server = GameServer(processes=1)
+        port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await send(writer, "CREATE 100000 100000")
+            assert (await receive(reader))[0] == "ERROR"
+            await send(writer, "CREATE 8 13")
+            assert (await receive(reader))[0] == "ERROR"
+            assert server.games == {}
+
+            await send(writer, "BOARD " + "1" * 100000)
+            assert await receive(reader) == ["ERROR", "the", "line", "is", "too", "long"]
+            assert await receive(reader) == []
+            writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
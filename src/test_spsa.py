@@ -0,0 +1,76 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from bot import CheckersBot, PARAMETER_NAMES, DEFAULT_PARAMETERS, save_parameters
+from game import Game
+from game_piece import GamePiece
+from board import Board
+from match import make_player
+from player import Player
+from spsa import SPSATuner, parameters_spec
+
+
+def make_position(bot, enemy, own_squares, enemy_squares, number_of_rows=8):
+    game = Game([bot, enemy], 2, 8)
+    game.board = Board(number_of_rows, 8)
+    game.pieces_dict[bot] = [GamePiece(square, bot) for square in own_squares]
+    game.pieces_dict[enemy] = [GamePiece(square, enemy) for square in enemy_squares]
+    for piece in game.pieces_dict[bot] + game.pieces_dict[enemy]:
+        game.board.place_piece(piece)
+    return game
+
+
+def test_back_squares_come_from_the_parameters():
+    bot = CheckersBot("bot", "")
+    game = make_position(bot, Player("Player 2", ""), [(2, 0), (2, 4)], [(7, 7)])
+    moves = game.get_possible_moves(bot)
+    assert len(bot.check_if_back_pieces(moves, 8)) == len(moves)
+
+    parameters = dict(zip(PARAMETER_NAMES, DEFAULT_PARAMETERS))
+    parameters["left_guard_row_1"] = 2
+    guarded = CheckersBot("bot", "", parameters)
+    assert [move[0].position for move in guarded.check_if_back_pieces(moves, 8)] == \
+        [(2, 4), (2, 4)]
+
+    # The right guard squares are on the last column, also when the board
+    # has fewer rows than columns
+    parameters = list(DEFAULT_PARAMETERS)
+    parameters[3] = 10.0
+    defensive = CheckersBot("bot", "", parameters)
+    # Without the guard, moving the piece on (0, 7) towards the enemy would
+    # be the most aggressive move
+    game = make_position(defensive, Player("Player 2", ""), [(0, 7), (0, 1)], [(5, 6)], 6)
+    moves = game.get_possible_moves(defensive)
+    assert all(defensive.choose_move(game.board, moves)[0].position == (0, 1)
+               for _ in range(10))
+
+
+def test_filter_order_follows_the_priorities():
+    # A man can be made a king, or another one moved next to the enemy
+    bot = CheckersBot("bot", "")
+    enemy = Player("Player 2", "")
+    game = make_position(bot, enemy, [(6, 1), (2, 3)], [(5, 6)])
+    moves = game.get_possible_moves(bot)
+    assert all(bot.choose_move(game.board, moves)[1][-1][0] == 7 for _ in range(10))
+
+    parameters = list(DEFAULT_PARAMETERS)
+    parameters[0], parameters[2] = 0.0, 9.0
+    aggressive = CheckersBot("bot", "", parameters)
+    assert aggressive.choose_move(game.board, moves)[1] == [(3, 4)]
+
+
+def test_tuner_keeps_parameters_in_bounds(tmp_path):
+    tuner = SPSATuner(rows_with_pieces=2, width=6, directions=2, pairs=1, step=1.0, seed=1)
+    with ThreadPoolExecutor(1) as executor:
+        score = tuner.iterate(executor)
+    assert 0 <= score <= 1
+    assert tuner.iterations == 1
+    assert all(low <= value <= high
+               for value, (low, high) in zip(tuner.parameters, tuner.bounds))
+    # The board has 6 rows, so the guard rows are at most 5
+    assert max(tuner.parameters[4:8]) <= 5
+
+    path = str(tmp_path / "parameters.json")
+    save_parameters(path, tuner.parameters)
+    assert make_player("smart-bot:" + path, 1, "").parameters == tuner.parameters
+    assert make_player(parameters_spec(DEFAULT_PARAMETERS), 1, "").parameters == \
+        DEFAULT_PARAMETERS
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from record import GameRecord
+from tensor_export import TensorWriter, load_chunks, move_index
+
+
+def test_positions_are_written_in_chunks_that_load_without_copying(tmp_path, make_records):
+    records = make_records(3)
+    with TensorWriter(str(tmp_path), chunk_size=16) as writer:
+        for record in records:
+            writer.add_record(record)
+
+    chunks = load_chunks(str(tmp_path))
+    total = sum(len(record.moves) for record in records)
+    assert [len(moves) for _, _, moves in chunks] == writer.chunks
+    assert sum(writer.chunks) == total
+    assert all(size == 16 for size in writer.chunks[:-1])
+
+    planes, results, moves = chunks[0]
+    assert isinstance(planes, np.memmap)
+    assert planes.shape[1:] == (5, writer.number_of_rows, writer.number_of_cols)
+    # The first player moves first, and has as many pieces as the second one
+    assert planes[0, 4].all() and not planes[1, 4].any()
+    assert planes[0, 0].sum() == planes[0, 2].sum() == 6
+    assert not planes[0, [1, 3]].any()
+
+    first = records[0]
+    origin, path = first.moves[0]
+    assert moves[0] == move_index(origin, path, writer.number_of_rows, writer.number_of_cols)
+    if first.result is None:
+        assert results[0] == results[1] == 0
+    else:
+        assert results[0] == -results[1] != 0
+
+
+def test_records_of_another_board_are_refused(tmp_path, make_records):
+    writer = TensorWriter(str(tmp_path))
+    writer.add_record(make_records(1)[0])
+    with pytest.raises(ValueError):
+        writer.add_record(GameRecord(8, 3, [((2, 1), [(3, 0)])]))
+
+
+def test_a_writer_without_positions_writes_no_manifest(tmp_path):
+    writer = TensorWriter(str(tmp_path))
+    writer.add_record(GameRecord(6, 2))
+    with pytest.raises(ValueError):
+        writer.close()
+    with pytest.raises(FileNotFoundError):
+        load_chunks(str(tmp_path))
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+
+from match import play_match, random_opening, make_player
+from tournament import (Tournament, H1, elo_to_score, score_to_elo, sprt_llr,
+                        sprt_bounds, elo_estimate, play_pair)
+from selfplay import SelfPlay
+from checkpoint import Checkpoint
+
+
+def test_elo_and_score_are_inverse():
+    assert elo_to_score(0) == pytest.approx(0.5)
+    assert score_to_elo(elo_to_score(100)) == pytest.approx(100)
+    assert score_to_elo(1.0) > 1000
+
+
+def test_sprt_favours_the_hypothesis_closest_to_the_scores():
+    strong = [1.0, 0.75, 1.0, 0.5] * 10
+    even = [0.5, 0.25, 0.75, 0.5] * 10
+    assert sprt_llr(strong, 0, 50) > sprt_bounds(0.05, 0.05)[1]
+    assert sprt_llr(even, 0, 50) < 0
+    elo, low, high = elo_estimate(strong)
+    assert low < elo < high
+    assert low > 0
+
+
+def test_opening_is_played_before_the_bots():
+    opening = random_opening(2, 6, 3, random.Random(1))
+    assert len(opening) == 3
+    players = [make_player("random-bot", 1, ""), make_player("random-bot", 2, "")]
+    result = play_match(players, 2, 6, opening=opening)
+    assert result.plies >= 3
+
+
+def test_pair_swaps_colours():
+    score, plies = play_pair("random-bot", "random-bot", [], 2, 6, max_plies=50)
+    assert 0 <= score <= 1
+    assert plies > 0
+
+
+def test_stronger_player_is_accepted():
+    tournament = Tournament("smart-bot", "random-bot", rows_with_pieces=2, width=6,
+                            elo0=0, elo1=100, max_pairs=60, workers=1, seed=3)
+    result = tournament.run()
+    assert result.decision == H1
+    assert result.games == 2 * len(result.pair_scores)
+    assert result.elo > 0
+
+
+def test_tournament_without_pairs_is_refused():
+    with pytest.raises(ValueError):
+        Tournament("smart-bot", "random-bot", max_pairs=0)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def test_interrupted_tournament_resumes_where_it_stopped(tmp_path):
+    def make_tournament():
+        return Tournament("random-bot", "random-bot", rows_with_pieces=2, width=6,
+                          elo0=0, elo1=400, min_pairs=100, max_pairs=10, max_plies=60, workers=1,
+                          seed=5)
+
+    def interrupt(pair_scores, llr):
+        if len(pair_scores) == 4:
+            raise Interrupted()
+
+    checkpoint = Checkpoint(str(tmp_path / "tournament.json"), interval=0)
+    with pytest.raises(Interrupted):
+        make_tournament().run(interrupt, checkpoint=checkpoint)
+
+    resumed = make_tournament().run(checkpoint=checkpoint)
+    uninterrupted = make_tournament().run()
+    assert resumed.pair_scores[:4] == uninterrupted.pair_scores[:4]
+    assert sorted(resumed.pair_scores) == sorted(uninterrupted.pair_scores)
+    assert resumed.plies == uninterrupted.plies
+
+    other = Tournament("random-bot", "smart-bot", rows_with_pieces=2, width=6, seed=5)
+    with pytest.raises(ValueError):
+        other.run(checkpoint=checkpoint)
+
+
+def test_self_play_resumes_with_the_same_games(tmp_path):
+    def interrupt(index, record):
+        raise Interrupted()
+
+    checkpoint = Checkpoint(str(tmp_path / "selfplay.json"))
+    self_play = SelfPlay("random-bot", games=4, rows_with_pieces=2, width=6, max_plies=60,
+                         workers=1, seed=7)
+    with pytest.raises(Interrupted):
+        self_play.run(interrupt, checkpoint=checkpoint)
+    resumed = self_play.run(checkpoint=checkpoint)
+    uninterrupted = self_play.run()
+    assert [record.moves for record in resumed] == [record.moves for record in uninterrupted]
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from evaluation import NetworkWeights, load_weights, save_weights, FEATURE_NAMES
+from game import Game
+from match import make_player
+from player import Player
+from td_training import TDTrainer, td_targets
+
+
+def test_targets_alternate_between_the_players():
+    values = np.array([0.1, 0.2, 0.3])
+    # With lambda 1 the target is the result, seen by the player to move
+    assert td_targets(values, 1.0, 1.0).tolist() == [-1.0, 1.0, -1.0]
+    # With lambda 0 it is the negated value of the next position
+    assert td_targets(values, 1.0, 0.0) == pytest.approx([-0.2, -0.3, -1.0])
+
+
+def test_network_gradient_matches_finite_differences():
+    trainer = TDTrainer(2, 6, model="network", hidden_units=4, learning_rate=1e-4, seed=1)
+    features = np.random.default_rng(2).integers(-3, 4, (5, len(FEATURE_NAMES))).astype(float)
+    targets = np.linspace(-0.5, 0.5, 5)
+
+    def loss():
+        values, _ = trainer.forward(features)
+        return 0.5 * np.mean((values - targets) ** 2)
+
+    before = trainer.hidden.copy()
+    trainer.update(features, targets)
+    step = (before - trainer.hidden) / trainer.learning_rate
+    trainer.hidden = before.copy()
+    trainer.hidden[1, 2] += 1e-6
+    higher = loss()
+    trainer.hidden[1, 2] -= 2e-6
+    lower = loss()
+    assert step[1, 2] == pytest.approx((higher - lower) / 2e-6, rel=1e-3)
+
+
+@pytest.mark.parametrize("model", ["linear", "network"])
+def test_trained_weights_are_loaded_by_bots(tmp_path, model):
+    path = str(tmp_path / "weights.json")
+    trainer = TDTrainer(2, 6, model=model, hidden_units=4, games_per_iteration=2, seed=3)
+    with ThreadPoolExecutor(1) as executor:
+        trainer.train_iteration(path, executor)
+    assert trainer.games == 2
+
+    weights = load_weights(path, 6, 6)
+    assert isinstance(weights, NetworkWeights) == (model == "network")
+    with pytest.raises(ValueError):
+        load_weights(path, 8, 8)
+
+    bot = make_player("search-bot:" + path, 1, "")
+    opponent = Player("Player 2", "")
+    game = Game([bot, opponent], 2, 6)
+    moves = game.get_possible_moves(bot)
+    assert bot.choose_move(game.board, moves) in moves
+    # The weights are only used on the board they were made for
+    game = Game([bot, opponent], 3, 8)
+    with pytest.raises(ValueError):
+        bot.choose_move(game.board, game.get_possible_moves(bot))
+
+
+def test_newer_weights_files_are_refused(tmp_path):
+    path = str(tmp_path / "weights.json")
+    save_weights(path, [1] * len(FEATURE_NAMES), 6, 6)
+    text = open(path).read().replace('"version": 1', '"version": 99')
+    open(path, "w").write(text)
+    with pytest.raises(ValueError):
+        load_weights(path)
@@ -0,0 +1,26 @@
+from transposition import TranspositionTable, EXACT, LOWER_BOUND
+from zobrist import get_keys, hash_game, update_hash
+
+
+def test_transposition_table_detects_other_positions():
+    table = TranspositionTable(64)
+    table.store(12345, 3, -250, LOWER_BOUND, 10, 19)
+    assert table.probe(12345) == (3, -250, LOWER_BOUND, 10, 19)
+    # Same slot of the table, but another position
+    assert table.probe(12345 + 64) is None
+
+    # A shallower result does not replace a deeper one of the same position
+    table.store(12345, 2, 0, EXACT)
+    assert table.probe(12345)[0] == 3
+
+
+def test_hash_is_updated_incrementally(make_game):
+    game = make_game([((5, 2), 0, False), ((6, 3), 1, False), ((3, 3), 1, True)])
+    player_1, player_2 = game.players
+    piece = game.board.grid[5][2]
+    keys = get_keys(8, 8)
+    before = hash_game(game, player_1)
+
+    captured = game.make_move([piece, [(7, 4)]]).captured
+    after = update_hash(before, keys, game, piece, (5, 2), False, captured)
+    assert after == hash_game(game, player_2)
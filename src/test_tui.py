@@ -1,10 +1,11 @@
 import pytest
 from unittest.mock import Mock
+from click.testing import CliRunner
 
 from player import Player
 from game import Game
 from bot import CheckersBot, RandomBot
-from tui import TUIGame, is_bot
+from tui import TUIGame, is_bot, cmd
 
 
 
@@ -39,3 +40,18 @@ def test_is_draw():
     # Case 2 - Both players do not agree for a draw
     mock_tui.get_bool_input.return_value = False
     assert not test_TUIGame.is_draw(player_1, player_2)
+
+
+def test_headless_mode_plays_all_games_between_bots():
+    runner = CliRunner()
+    result = runner.invoke(cmd, ["--player-1-type", "random-bot",
+                                 "--player-2-type", "random-bot",
+                                 "--headless", "--games", "3"])
+    assert result.exit_code == 0
+    assert "Games played: 3" in result.output
+
+
+def test_headless_mode_refuses_real_players():
+    runner = CliRunner()
+    result = runner.invoke(cmd, ["--player-1-type", "random-bot", "--headless"])
+    assert result.exit_code != 0
@@ -0,0 +1,388 @@
+"""
+This is a file that contains a harness for finding out whether one player
+is stronger than another.
+
+Games are played in pairs: both games of a pair start from the same random
+opening (see match.random_opening), and the players swap colours between
+them, so that neither player is helped by a lucky opening or by moving
+first. Pairs are played in parallel by a pool of processes.
+
+After every pair, a sequential probability ratio test (SPRT) compares two
+hypotheses about the Elo difference between player A and player B:
+H0 - the difference is elo0, and H1 - it is elo1. The tournament stops as
+soon as one of them is accepted, which takes few games when one player is
+much stronger, and as many as needed when they are close. The scores of
+whole pairs are used as the samples of the test, as the two games of a pair
+are not independent.
+
+To run a tournament, run the following from the root of the repository:
+
+    python3 src/tournament.py --player-a search-bot --player-b smart-bot --elo0 0 --elo1 50
+"""
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from statistics import NormalDist
+
+import click
+
+from adjudication import Adjudicator
+from match import play_match, random_opening, cached_player
+from checkpoint import Checkpoint, RunProgress
+
+H0 = "H0"
+H1 = "H1"
+
+# Scores are kept away from 0 and 1, where the Elo difference is infinite
+_SCORE_MARGIN = 1e-3
+
+
+def elo_to_score(elo):
+    """
+    Input:
+        elo (float) - Elo difference between two players
+    Output:
+        (float) - expected score of the stronger player, from 0 to 1
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score):
+    """
+    Input:
+        score (float) - average score of a player, from 0 to 1
+    Output:
+        (float) - the Elo difference that the score corresponds to
+    """
+    score = min(max(score, _SCORE_MARGIN), 1 - _SCORE_MARGIN)
+    return -400 * math.log10(1 / score - 1)
+
+
+def _mean_and_variance(scores):
+    mean = sum(scores) / len(scores)
+    variance = sum((score - mean) ** 2 for score in scores) / len(scores)
+    return mean, variance
+
+
+def sprt_llr(scores, elo0, elo1):
+    """
+    Computes the log-likelihood ratio of H1 against H0, with the normal
+    approximation of the generalised SPRT.
+
+    Input:
+        scores (list[float]) - scores of player A in every pair, from 0 to 1
+        elo0, elo1 (float) - Elo differences of the two hypotheses
+    Output:
+        (float) - the log-likelihood ratio; positive values favour H1
+    """
+    if scores == []:
+        return 0.0
+    mean, variance = _mean_and_variance(scores)
+    # A player who always scores the same still leaves some uncertainty
+    variance = max(variance, 1e-4)
+    score0 = elo_to_score(elo0)
+    score1 = elo_to_score(elo1)
+    return len(scores) * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+
+def sprt_bounds(alpha, beta):
+    """
+    Input:
+        alpha (float) - chance of accepting H1 when H0 is true
+        beta (float) - chance of accepting H0 when H1 is true
+    Output:
+        tuple(float, float) - log-likelihood ratios below which H0 and above
+                              which H1 is accepted
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def elo_estimate(scores, confidence=0.95):
+    """
+    Input:
+        scores (list[float]) - scores of player A in every pair, from 0 to 1
+        confidence (float) - confidence level of the interval
+    Output:
+        tuple(float, float, float) - the Elo difference between player A and
+              player B, and the lower and upper ends of its confidence interval
+    """
+    mean, variance = _mean_and_variance(scores)
+    margin = NormalDist().inv_cdf((1 + confidence) / 2) * math.sqrt(variance / len(scores))
+    return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+
+def spec_name(spec):
+    """
+    Input:
+        spec (str or function) - a player type or a function that creates a
+                                 Player
+    Output:
+        (str) - the same name for the same player in every run
+    """
+    if callable(spec):
+        return f"{spec.__module__}.{spec.__qualname__}"
+    return spec
+
+
+def play_pair(spec_a, spec_b, opening, rows_with_pieces, width, max_plies=None, seed=None):
+    """
+    Plays both games of a pair, with the colours swapped.
+
+    Input:
+        spec_a, spec_b (str or function) - the players, see cached_player
+        opening (list) - the opening both games start from
+        rows_with_pieces (int) - number of rows with pieces of every player
+        width (int) - width of the board
+        max_plies (int) - number of moves after which a game is decided by
+                          material, or None
+        seed (int) - seed of the random choices of the bots, or None
+    Output:
+        tuple(float, int) - score of player A in the pair, from 0 to 1, and the
+                            number of plies of both games
+    """
+    if seed is not None:
+        random.seed(seed)
+    player_a = cached_player(spec_a, "A")
+    player_b = cached_player(spec_b, "B")
+    score = 0.0
+    plies = 0
+    for players in ([player_a, player_b], [player_b, player_a]):
+        adjudicator = Adjudicator(adjudicate_after=max_plies)
+        result = play_match(players, rows_with_pieces, width, adjudicator,
+                            opening=opening)
+        plies += result.plies
+        if result.winner is None:
+            score += 0.5
+        elif players[result.winner] is player_a:
+            score += 1
+    return score / 2, plies
+
+
+class TournamentResult:
+    """
+    This class describes the outcome of a tournament.
+
+    Public Attributes:
+        - pair_scores (list[float]) - score of player A in every pair
+        - games (int) - number of games played
+        - plies (int) - number of moves made in all the games
+        - llr (float) - log-likelihood ratio of the SPRT
+        - decision (str) - H0 or H1 if one of them was accepted, or None if
+                           the tournament ran out of pairs first
+        - elo, elo_low, elo_high (float) - the Elo difference between player A
+                                           and player B with its confidence
+                                           interval
+    """
+
+    def __init__(self, pair_scores, plies, llr, decision, confidence=0.95):
+        self.pair_scores = pair_scores
+        self.games = 2 * len(pair_scores)
+        self.plies = plies
+        self.llr = llr
+        self.decision = decision
+        self.elo, self.elo_low, self.elo_high = elo_estimate(pair_scores, confidence)
+
+
+class Tournament:
+    """
+    This class plays pairs of games between two players until the SPRT
+    accepts one of its hypotheses or max_pairs pairs are played.
+
+    Public Attributes:
+        - spec_a, spec_b (str or function) - the players: a player type (see
+                                             match.make_player) or a
+                                             function that creates a Player.
+                                             Functions have to be defined at
+                                             the top level of a module, so
+                                             that worker processes can use
+                                             them.
+        - rows_with_pieces (int), width (int) - size of the board
+        - opening_plies (int) - number of random moves of every opening
+        - elo0, elo1 (float) - Elo differences of the hypotheses H0 and H1
+        - alpha, beta (float) - error rates of the test, see sprt_bounds
+        - min_pairs (int) - number of pairs played before the test may stop
+        - max_pairs (int) - largest number of pairs played
+        - max_plies (int) - number of moves after which a game is decided by
+                            material, or None
+        - workers (int) - number of processes playing pairs
+        - seed (int) - seed of the random openings and of the random choices
+                       of the bots
+    """
+
+    def __init__(self, spec_a, spec_b, rows_with_pieces=3, width=8, opening_plies=4,
+                 elo0=0, elo1=10, alpha=0.05, beta=0.05, min_pairs=8, max_pairs=1000,
+                 max_plies=200, workers=None, seed=None):
+        # The Elo estimate needs at least one pair
+        if max_pairs < 1:
+            raise ValueError(f"a tournament has to play at least one pair, not {max_pairs}")
+        self.spec_a = spec_a
+        self.spec_b = spec_b
+        self.rows_with_pieces = rows_with_pieces
+        self.width = width
+        self.opening_plies = opening_plies
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.alpha = alpha
+        self.beta = beta
+        self.min_pairs = min_pairs
+        self.max_pairs = max_pairs
+        self.max_plies = max_plies
+        self.workers = os.cpu_count() if workers is None else workers
+        self.seed = seed
+
+    def decide(self, pair_scores):
+        """
+        Input:
+            pair_scores (list[float]) - scores of player A in the pairs so far
+        Output:
+            tuple(float, str) - the log-likelihood ratio and H0 or H1 if the
+                                test can stop, or None if it cannot
+        """
+        llr = sprt_llr(pair_scores, self.elo0, self.elo1)
+        if len(pair_scores) < self.min_pairs:
+            return llr, None
+        lower, upper = sprt_bounds(self.alpha, self.beta)
+        if llr <= lower:
+            return llr, H0
+        if llr >= upper:
+            return llr, H1
+        return llr, None
+
+    def parameters(self):
+        """
+        Output:
+            (dict) - what the tournament is, so that a checkpoint is not
+                     resumed by another one (see Checkpoint.load). max_pairs
+                     is left out, so a finished tournament can be extended.
+        """
+        return {"run": "tournament", "player_a": spec_name(self.spec_a),
+                "player_b": spec_name(self.spec_b), "rows_with_pieces": self.rows_with_pieces,
+                "width": self.width, "opening_plies": self.opening_plies, "elo0": self.elo0,
+                "elo1": self.elo1, "alpha": self.alpha, "beta": self.beta,
+                "min_pairs": self.min_pairs, "max_plies": self.max_plies, "seed": self.seed}
+
+    def make_opening(self, rng):
+        return random_opening(self.rows_with_pieces, self.width, self.opening_plies, rng)
+
+    def run(self, on_pair=None, executor=None, checkpoint=None):
+        """
+        Plays the tournament. A few more pairs than needed may be finished
+        after the test stops, as the workers play several pairs at once;
+        their results are kept.
+
+        Input:
+            on_pair (function) - called as on_pair(pair_scores, llr) after every
+                                 finished pair, for example to show progress
+            executor (Executor) - runs the pairs, for example a Coordinator
+                                  (see distributed.py). A pool of
+                                  processes is used if not given.
+            checkpoint (Checkpoint) - if given, the tournament carries on from
+                                      the progress saved in it, and saves its
+                                      progress to it as it goes
+        Output:
+            (TournamentResult)
+        """
+        if executor is None:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                return self.run(on_pair, executor, checkpoint)
+
+        progress = None if checkpoint is None else checkpoint.load(self.parameters())
+        if progress is None:
+            progress = RunProgress(self.seed)
+        pair_scores = []
+        plies = 0
+        llr, decision = 0.0, None
+        for _, (score, pair_plies) in progress.finished:
+            pair_scores.append(score)
+            plies += pair_plies
+            llr, pair_decision = self.decide(pair_scores)
+            decision = decision or pair_decision
+
+        running = {}
+
+        def submit(index, opening, seed):
+            future = executor.submit(play_pair, self.spec_a, self.spec_b, opening,
+                                     self.rows_with_pieces, self.width, self.max_plies, seed)
+            running[future] = index
+
+        if decision is None:
+            for index, (opening, seed) in progress.pending.items():
+                submit(index, opening, seed)
+        try:
+            while True:
+                # Two pairs per worker keep the workers busy between results
+                while decision is None and progress.started < self.max_pairs and \
+                        len(running) < 2 * self.workers:
+                    submit(*progress.new_task(self.make_opening))
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                # In the order the pairs were started, so that a resumed
+                # tournament sees the same scores
+                for future in sorted(done, key=running.get):
+                    index = running.pop(future)
+                    if future.cancelled():
+                        continue
+                    score, pair_plies = future.result()
+                    progress.finish(index, [score, pair_plies])
+                    pair_scores.append(score)
+                    plies += pair_plies
+                    llr, pair_decision = self.decide(pair_scores)
+                    decision = decision or pair_decision
+                    if on_pair is not None:
+                        on_pair(pair_scores, llr)
+                if decision is not None:
+                    for future in running:
+                        future.cancel()
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save(self.parameters(), progress)
+        finally:
+            if checkpoint is not None:
+                checkpoint.save(self.parameters(), progress)
+        return TournamentResult(pair_scores, plies, llr, decision)
+
+
+@click.command(name="checkers-tournament")
+@click.option('--player-a', default="search-bot", help="Type of the player being tested")
+@click.option('--player-b', default="smart-bot", help="Type of the player it is compared to")
+@click.option('--width', default=8)
+@click.option('--rows-with-pieces', default=3)
+@click.option('--elo0', default=0.0, help="Elo difference of the hypothesis H0")
+@click.option('--elo1', default=10.0, help="Elo difference of the hypothesis H1")
+@click.option('--max-pairs', default=1000, type=click.IntRange(min=1))
+@click.option('--workers', default=None, type=int)
+@click.option('--seed', default=None, type=int)
+@click.option('--checkpoint', 'checkpoint_path', default=None,
+              help="File the progress is saved to, and resumed from if it exists")
+def cmd(player_a, player_b, width, rows_with_pieces, elo0, elo1, max_pairs, workers, seed,
+        checkpoint_path):
+    """
+    Runs a tournament and prints its result.
+    """
+    tournament = Tournament(player_a, player_b, rows_with_pieces, width, elo0=elo0,
+                            elo1=elo1, max_pairs=max_pairs, workers=workers, seed=seed)
+    lower, upper = sprt_bounds(tournament.alpha, tournament.beta)
+
+    def show_progress(pair_scores, llr):
+        print(f"\rPairs: {len(pair_scores)}  LLR: {llr:.2f} ({lower:.2f}, {upper:.2f})",
+              end="", flush=True)
+
+    checkpoint = None if checkpoint_path is None else Checkpoint(checkpoint_path)
+    result = tournament.run(show_progress, checkpoint=checkpoint)
+    print()
+    print(f"Games played: {result.games}, score of {player_a}: "
+          f"{sum(result.pair_scores) / len(result.pair_scores):.3f}")
+    print(f"Elo difference: {result.elo:.1f} "
+          f"[{result.elo_low:.1f}, {result.elo_high:.1f}]")
+    if result.decision == H1:
+        print(f"H1 accepted: {player_a} is at least {elo1} Elo stronger")
+    elif result.decision == H0:
+        print(f"H0 accepted: {player_a} is not {elo1} Elo stronger")
+    else:
+        print("No hypothesis was accepted before the pairs ran out")
+
+
+if __name__ == "__main__":
+    cmd()
@@ -0,0 +1,166 @@
+"""
+This is a file that contains a transposition table: a fixed-size hash table
+of search results, indexed by the Zobrist hash of a position.
+
+Entries are packed into two 64-bit words, so the table can live in any
+writable buffer - a bytearray, a multiprocessing.shared_memory block shared
+by several search processes, or a memory-mapped file.
+
+The first word of an entry is the hash of the position XORed with the
+second word, the packed data: score, depth, bound, best move and the
+generation the entry was stored in. Processes
+write the two words without locking, so an entry can be torn by two
+simultaneous writes; a torn entry no longer XORs back to the hash it is
+looked up with, and is simply treated as missing.
+"""
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+ENTRY_BYTES = 16
+NO_MOVE = 0
+
+_SCORE_BITS = 24
+_SCORE_OFFSET = 1 << (_SCORE_BITS - 1)
+_SQUARE_BITS = 12
+_GENERATION_SHIFT = 34 + 2 * _SQUARE_BITS
+_MASK_64 = (1 << 64) - 1
+
+# Number of different generations an entry can be marked with
+GENERATIONS = 1 << (64 - _GENERATION_SHIFT)
+
+
+def pack_entry(depth, score, bound, from_square, to_square, generation=0):
+    """
+    Input:
+        depth (int) - depth of the search, from 0 to 255
+        score (int) - score of the position, up to 2^23 in absolute value
+        bound (int) - EXACT, LOWER_BOUND or UPPER_BOUND
+        from_square (int) - square index of the piece of the best move plus
+                            one, or NO_MOVE
+        to_square (int) - square index the best move ends on plus one,
+                          or NO_MOVE
+        generation (int) - generation of the table, from 0 to GENERATIONS - 1
+    Output:
+        (int) - the data packed into a 64-bit word
+    """
+    return ((score + _SCORE_OFFSET)
+            | min(depth, 255) << 24
+            | bound << 32
+            | from_square << 34
+            | to_square << (34 + _SQUARE_BITS)
+            | generation << _GENERATION_SHIFT)
+
+
+def unpack_entry(data):
+    """
+    Input:
+        data (int) - a word made by pack_entry
+    Output:
+        tuple(int, int, int, int, int) - depth, score, bound, from square
+                                         and to square
+    """
+    score = (data & ((1 << _SCORE_BITS) - 1)) - _SCORE_OFFSET
+    depth = (data >> 24) & 0xFF
+    bound = (data >> 32) & 0x3
+    from_square = (data >> 34) & ((1 << _SQUARE_BITS) - 1)
+    to_square = (data >> (34 + _SQUARE_BITS)) & ((1 << _SQUARE_BITS) - 1)
+    return depth, score, bound, from_square, to_square
+
+
+class TranspositionTable:
+    """
+    This class is a hash table of search results stored in a buffer.
+
+    Public Attributes:
+        - entries (int) - number of entries the table can hold
+        - depth_preferred (bool) - if True, an entry is only replaced by a
+                                   search that is at least as deep, even when
+                                   it is of another position, unless it was
+                                   stored in another generation
+        - generation (int) - generation stored entries are marked with, from
+                             0 to GENERATIONS - 1. Tables kept between runs
+                             change it for every run.
+    """
+
+    def __init__(self, entries=1 << 16, buffer=None, depth_preferred=False):
+        """
+        Input:
+            entries (int) - number of entries of the table
+            buffer (buffer) - writable buffer of at least
+                              bytes_needed(entries) bytes to keep the table in.
+                              If not given, a new bytearray is used.
+            depth_preferred (bool) - the replacement policy, see above
+        """
+        if buffer is None:
+            buffer = bytearray(self.bytes_needed(entries))
+        if len(buffer) < self.bytes_needed(entries):
+            raise Exception("The buffer is too small for the table")
+        self.entries = entries
+        self.depth_preferred = depth_preferred
+        self.generation = 0
+        self._buffer = buffer
+        self._words = memoryview(buffer).cast("B")[:self.bytes_needed(entries)].cast("Q")
+
+    @staticmethod
+    def bytes_needed(entries):
+        """
+        Input:
+            entries (int) - number of entries of the table
+        Output:
+            (int) - size of a buffer that holds the table
+        """
+        return entries * ENTRY_BYTES
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Input:
+            key (int) - 64-bit hash of the position
+        Output:
+            tuple(int, int, int, int, int) - depth, score, bound, from square
+                  and to square, or None if the position is not in the table
+        """
+        index = 2 * (key % self.entries)
+        data = self._words[index + 1]
+        if self._words[index] ^ data != key or data == 0:
+            return None
+        return unpack_entry(data)
+
+    def store(self, key, depth, score, bound, from_square=NO_MOVE,
+              to_square=NO_MOVE):
+        """
+        Saves the result of a search of a position. An entry of the same
+        position is only replaced by a search that is at least as deep, and
+        so is an entry of another position of the same generation if the
+        table is depth-preferred.
+
+        Input:
+            key (int) - 64-bit hash of the position
+            depth, score, bound, from_square, to_square - see pack_entry
+        """
+        index = 2 * (key % self.entries)
+        old_data = self._words[index + 1]
+        if old_data != 0 and (old_data >> 24) & 0xFF > depth:
+            if self._words[index] ^ old_data == key:
+                return
+            if self.depth_preferred and old_data >> _GENERATION_SHIFT == self.generation:
+                return
+        data = pack_entry(depth, score, bound, from_square, to_square, self.generation)
+        self._words[index] = (key ^ data) & _MASK_64
+        self._words[index + 1] = data
+
+    def clear(self):
+        """
+        Removes all entries from the table.
+        """
+        self._words.cast("B")[:] = bytes(self.bytes_needed(self.entries))
+
+    def release(self):
+        """
+        Lets go of the buffer, which is needed before a shared memory block
+        or a memory-mapped file can be closed.
+        """
+        self._words.release()
@@ -11,6 +11,14 @@ from game import Game
 from player import Player
 from board import Board
 from bot import CheckersBot, RandomBot
+from search import SearchBot
+from parallel_search import ParallelSearchBot
+from record import GameRecord, KeyframeIndex, load_record
+from adjudication import Adjudicator
+from match import play_matches, make_player
+from pondering import Ponderer, can_ponder
+from hints import HintAnalyser
+from engine import EnginePlayer
 
 import math
 
@@ -19,9 +27,15 @@ class TUI:
     This class is used to call methods for interacting with user via a console 
     (Text-Based User Interface).
     Both input and output functions are located here
+
+    Public Attributes:
+        - console (Console) - the console everything is printed to
+        - hints (HintAnalyser) - ranks the moves of a player when they ask
+                                 for a hint
     """
-    def __init__(self):
+    def __init__(self, hints=None):
         self.console = Console()
+        self.hints = HintAnalyser() if hints is None else hints
     
     def print_board(self, game, highlights=[]):
         """
@@ -77,7 +91,21 @@ class TUI:
             self.console.print(separator_line)
             row_number += 1
 
-    def get_int_input(self, prompt, range=(-1, -1)):
+    def print_status(self, game):
+        """
+        This function prints how many men and kings every player has left.
+
+        Input:
+            game: (Game) The game that is being played
+        """
+        status = []
+        for player in game.players:
+            status.append(f"[{player.color}]{player.name}[/{player.color}]: "
+                          f"{game.men_counts[player]} men, "
+                          f"{game.king_counts[player]} kings")
+        self.console.print(" | ".join(status))
+
+    def get_int_input(self, prompt, range=(-1, -1), commands={}):
         """
         This method will repeatedly ask user to select a user to enter an
         integer until a valid value is given.
@@ -88,6 +116,9 @@ class TUI:
                                     follows: (min_val, max_val). If the tuple is
                                     given as (-1,-1) then the range is not
                                     applicable.
+            commands (dict[str, function]) - words the user can type instead
+                                    of a number; the matching function is
+                                    called and the user is asked again.
         Output:
             (int) - a value of type integer and in a certain range,
                     if was provided.
@@ -97,6 +128,9 @@ class TUI:
         while not valid_input:
             self.console.print(f"[on red]{prompt}[/on red]")
             result = input()
+            if result.strip().lower() in commands:
+                commands[result.strip().lower()]()
+                continue
             try:
                 result = int(result)
                 if range != (-1, -1):
@@ -146,7 +180,7 @@ class TUI:
 
         return result
 
-    def print_winner_screen(self, winner=None) -> None:
+    def print_winner_screen(self, winner=None, reason=None) -> None:
         """
         Prints information which player won.
 
@@ -154,15 +188,35 @@ class TUI:
             player (Player) - player that has won the game. 
                             If player is passed as None, then the game was 
                             terminated with a draw
+            reason (str) - why the game was ended by adjudication, if it was
         """
         self.console.print("-"*10 + " [yellow]THE GAME IS OVER[/yellow] " + "-"*10)
         if winner is None:
             self.console.print("[green]DRAW![/green] There is no winner")
         else:
             self.console.print(f"Winner: [on green]{winner.name}[/on green]")
+        if reason is not None:
+            self.console.print(f"The game was ended by {reason}")
         self.console.print("-"*10)  
 
-    def get_valid_pos(self, valid_poisitions, prompt="Choose a piece to move"):
+    def print_match_stats(self, players, stats):
+        """
+        Prints the results of a series of games played without printing
+        the board.
+
+        Input:
+            players (list[Player]) - players of the games
+            stats (MatchStats) - results of the games
+        """
+        self.console.print(f"Games played: {stats.games} in {stats.seconds:.2f}s "
+                           f"({stats.games_per_second:.2f} games/sec)")
+        self.console.print(f"Average plies per game: {stats.average_plies:.1f}")
+        for player, wins in zip(players, stats.wins):
+            self.console.print(f"[{player.color}]{player.name}[/{player.color}] won: {wins}")
+        self.console.print(f"Draws: {stats.draws}")
+
+    def get_valid_pos(self, valid_poisitions, prompt="Choose a piece to move",
+                      commands={}):
         """
         This method will repeatedly ask user to select a valid row and column
         from a list of valid positions. The positions do not get printed in this
@@ -172,6 +226,9 @@ class TUI:
             valid_poisitions (list[tuple(int, int)]) - a list of valid positions a user must chose from.
 
             prompt (str) - a message that explains what the input is for
+
+            commands (dict[str, function]) - words the user can type instead
+                                    of a row, see get_int_input
         Output:
             tuple(int,int)
         """
@@ -181,13 +238,38 @@ class TUI:
         while (row,col) not in valid_poisitions:
             self.console.print(prompt)
 
-            row = -1 + self.get_int_input("Select a row: ")
+            row = -1 + self.get_int_input("Select a row: ", commands=commands)
             col = -1 + self.get_int_input("Select a column: ")
 
             if (row, col) not in valid_poisitions:
                 self.console.print("Invalid position")
         return (row, col)
 
+    def print_hint(self, player, game):
+        """
+        This method ranks all the moves of the player, prints them with their
+        scores and shows the path of the best one on the board.
+
+        Inputs:
+            player (Player) - player whose turn it is
+
+            game (Game) - the game that is being played
+        """
+        self.console.print(f"Analysing the moves of [on green]{player.name}[/on green]...")
+        ranking = self.hints.analyse(game, player)
+        if ranking == []:
+            return
+        for index, (score, depth, move) in enumerate(ranking):
+            if depth == 0:
+                self.console.print(f"{index + 1}: {move[0].position} -> {move[1]}"
+                                   f" (not analysed in time)")
+            else:
+                self.console.print(f"{index + 1}: {move[0].position} -> {move[1]}"
+                                   f" score {score} (depth {depth})")
+        best_move = ranking[0][2]
+        self.console.print("The best move found:")
+        self.print_board(game, highlights=[best_move[0].position] + list(best_move[1]))
+
     def get_player_move(self,player,game):
         """
         This method will ask user to select a piece to move.
@@ -201,6 +283,7 @@ class TUI:
         """
 
         possible_jumps = game.get_all_jumps(player)
+        hint_command = {"hint": lambda: self.print_hint(player, game)}
        
         if possible_jumps == []:
             possible_moves = game.get_possible_moves(player)
@@ -215,7 +298,9 @@ class TUI:
             self.print_board(game, highlights=pieces_that_can_be_moved_pos)
 
             # Force user to chose valid game_piece position
-            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos)
+            self.console.print("Type 'hint' instead of a row to see the best moves")
+            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos,
+                                                 commands=hint_command)
             piece_to_move = game.board.grid[valid_piece_pos[0]][valid_piece_pos[1]]
 
             # Print possible moves for that piece
@@ -244,7 +329,9 @@ class TUI:
             self.console.print(f"[on green]{player.name}[/on green] can move this pieces:")
             self.print_board(game, highlights=pieces_that_can_be_moved_pos)
             # Force user to chose valid game_piece position
-            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos)
+            self.console.print("Type 'hint' instead of a row to see the best moves")
+            valid_piece_pos = self.get_valid_pos(pieces_that_can_be_moved_pos,
+                                                 commands=hint_command)
             piece_to_move = game.board.grid[valid_piece_pos[0]][valid_piece_pos[1]]
             # Print possible moves for that piece
             possible_piece_moves = game.get_possible_jumps_for_piece(piece_to_move)
@@ -278,7 +365,8 @@ def is_bot(player) -> bool:
         True - if the player is of class that inherits Player
         False - if the player is of class Player and not its children.
     """
-    return type(player) is RandomBot or type(player) is CheckersBot
+    return type(player) in (RandomBot, CheckersBot, SearchBot, ParallelSearchBot,
+                            EnginePlayer)
    
 
 class TUIGame:
@@ -288,11 +376,21 @@ class TUIGame:
     Public Attributes:
         - game (Game) - the game that the player has to play.
         - tui (TUI) - a class that allows to interact with the user interface.
+        - record (GameRecord) - record of the moves made during the game.
+        - adjudicator (Adjudicator) - ends games that would never finish
+                                      (repeated positions, no progress).
+        - ponder (bool) - whether search bots think about their answers
+                          while a real player is choosing a move.
     """
 
-    def __init__(self, game):
+    def __init__(self, game, adjudicator=None, ponder=True):
         self.game = game
         self.tui = TUI()
+        self.record = GameRecord.for_game(game)
+        game.add_observer(self.record.add_delta)
+        self.adjudicator = Adjudicator() if adjudicator is None else adjudicator
+        self.ponder = ponder
+        self._ponderers = {}
 
     def play_game(self):
         """
@@ -303,18 +401,21 @@ class TUIGame:
         turn = 0
         player_count = len(self.game.players)
         is_draw = False
+        verdict = None
 
         current_player = self.game.players[0]
         next_player = self.game.players[1]
+        self.adjudicator.start(self.game, current_player)
 
         # Flag that checks if the players should have a offer_draw option
         should_offer_draw = not(is_bot(current_player) or is_bot(next_player))
 
 
         # Game loop
-        while not (self.check_player_lost(current_player) or is_draw):
+        while not (verdict is not None or self.check_player_lost(current_player) or is_draw):
              # Printing board
             self.tui.print_board(self.game)
+            self.tui.print_status(self.game)
             
             # A turns starts with asking if users want to declare a draw
             if should_offer_draw:
@@ -329,20 +430,52 @@ class TUIGame:
             if is_bot(current_player):
                 move = current_player.choose_move(self.game.board, self.game.get_possible_moves(current_player))
             else:
-                move = self.tui.get_player_move(current_player, self.game)
+                ponderer = self.get_ponderer(next_player)
+                if ponderer is not None:
+                    ponderer.start(self.game, current_player)
+                try:
+                    move = self.tui.get_player_move(current_player, self.game)
+                finally:
+                    if ponderer is not None:
+                        ponderer.stop()
 
             # Performing the move
-            self.game.make_move(move)
+            delta = self.game.make_move(move)
 
             # Updating some pointers
             turn += 1
             current_player = self.game.players[turn % player_count]
             next_player = self.game.players[(turn + 1) % player_count]
 
+            # Ending games that go nowhere
+            verdict = self.adjudicator.record_move(self.game, delta.was_king,
+                                                   delta.captured, current_player)
+
         # When the game is over, a description of how the game ended should 
         # be provided
-        winner = None if is_draw else self.game.players[(turn + 1) % player_count]
-        self.tui.print_winner_screen(winner)         
+        reason = None
+        if verdict is not None:
+            winner, reason = verdict
+        elif is_draw:
+            winner = None
+        else:
+            winner = self.game.players[(turn + 1) % player_count]
+        self.record.result = None if winner is None else self.game.players.index(winner)
+        self.tui.print_winner_screen(winner, reason)
+
+    def get_ponderer(self, player):
+        """
+        Input:
+            player (Player) - a player that is going to move next
+        Output:
+            (Ponderer) - the ponderer of the player, created the first time
+                         it is needed, or None if the player does not ponder
+        """
+        if not (self.ponder and can_ponder(player)):
+            return None
+        if player not in self._ponderers:
+            self._ponderers[player] = Ponderer(player)
+        return self._ponderers[player]
 
     def check_player_lost(self, current_player):
         """
@@ -379,12 +512,83 @@ class TUIGame:
 
         return False
 
+class TUIReplay:
+    """
+    This is a class that allows to look through a recorded game in the TUI,
+    one ply at a time or by jumping straight to any ply.
+
+    Public Attributes:
+        - index (KeyframeIndex) - the recorded game with its keyframes
+        - tui (TUI) - a class that allows to interact with the user interface.
+        - ply (int) - number of moves made in the shown position
+        - game (Game) - the shown position
+    """
+
+    def __init__(self, record, keyframe_interval=16):
+        players = [Player("Player 1", "#5442f5"), Player("Player 2", "#42f2f5")]
+        self.index = KeyframeIndex(record, keyframe_interval, players)
+        self.tui = TUI()
+        self.ply = 0
+        self.game = self.index.position(0)
+
+    def seek(self, ply):
+        """
+        Shows the position after a given number of plies. Stepping one ply
+        forward makes a single move, any other ply is rebuilt from the
+        nearest keyframe.
+
+        Input:
+            ply (int) - number of moves made, from 0 to the length of the game
+        """
+        if ply == self.ply + 1:
+            origin, path = self.index.record.moves[self.ply]
+            piece = self.game.board.grid[origin[0]][origin[1]]
+            self.game.make_move([piece, list(path)])
+        elif ply != self.ply:
+            self.game = self.index.position(ply)
+        self.ply = ply
+
+    def play_replay(self):
+        """
+        Shows the recorded game and asks the user where to go next until
+        they quit.
+        """
+        while True:
+            self.tui.console.print(f"Ply {self.ply} of {self.index.plies}")
+            self.tui.print_board(self.game)
+            self.tui.print_status(self.game)
+            self.tui.console.print("[on red]n - next ply, p - previous ply, "
+                                   "g <ply> - go to a ply, q - quit[/on red]")
+            command = input().strip().lower().split()
+            if command == []:
+                continue
+            if command[0] == "q":
+                return
+            if command[0] == "n" and self.ply < self.index.plies:
+                self.seek(self.ply + 1)
+            elif command[0] == "p" and self.ply > 0:
+                self.seek(self.ply - 1)
+            elif command[0] == "g" and len(command) == 2 and command[1].isdigit() \
+                    and int(command[1]) <= self.index.plies:
+                self.seek(int(command[1]))
+            else:
+                self.tui.console.print("This is an invalid command")
+
+
 @click.command(name="checkers-tui")
 @click.option('--player-1-type', default="Player One")
 @click.option('--player-2-type', default="Player Two")
 @click.option('--width', default=8)
 @click.option('--rows-with-pieces', default=2)
-def cmd(player_1_type, player_2_type, width, rows_with_pieces):
+@click.option('--headless', is_flag=True,
+              help="Play bot against bot without printing the board")
+@click.option('--games', default=1, help="Number of games to play with --headless")
+@click.option('--save-record', default=None, help="Save the moves of the game to this file")
+@click.option('--replay', default=None, help="Look through a game saved with --save-record")
+@click.option('--keyframe-interval', default=16,
+              help="Plies between the positions kept in memory during a replay")
+def cmd(player_1_type, player_2_type, width, rows_with_pieces, headless, games,
+        save_record, replay, keyframe_interval):
     """
     This is the command line interface for the Checkers TUI.
 
@@ -393,27 +597,36 @@ def cmd(player_1_type, player_2_type, width, rows_with_pieces):
         player_2_type (str) - type of player 2
         width (int) - width of the board
         rows_with_pieces (int) - number of rows with pieces
+        headless (bool) - whether to only play bots against each other and
+                          print the results of the games
+        games (int) - number of games to play when headless
+        save_record (str) - path to save the record of the game to
+        replay (str) - path of a saved record to look through instead of
+                       playing a game
+        keyframe_interval (int) - plies between keyframes of a replay
     """
-    if player_1_type == "random-bot":
-        player_1 = RandomBot("random-bot-1","#5442f5")
-    elif player_1_type == "smart-bot":
-        player_1 = CheckersBot("smart-bot-1","#5442f5")
-    else:
-        player_1 = Player(player_1_type, "#5442f5")
-
-    if player_2_type == "random-bot":
-        player_2 = RandomBot("random-bot-2","#42f2f5")
-    elif player_2_type == "smart-bot":
-        player_2 = CheckersBot("smart-bot-2","#42f2f5")
-    else:
-        player_2 = Player(player_2_type, "#42f2f5")
-    
+    if replay is not None:
+        TUIReplay(load_record(replay), keyframe_interval).play_replay()
+        return
+
+    player_1 = make_player(player_1_type, 1, "#5442f5")
+    player_2 = make_player(player_2_type, 2, "#42f2f5")
     players = [player_1, player_2]
+
+    if headless:
+        if not (is_bot(player_1) and is_bot(player_2)):
+            raise click.UsageError("--headless needs both players to be bots")
+        stats = play_matches(players, games, rows_with_pieces, width)
+        TUI().print_match_stats(players, stats)
+        return
+
     game = Game(players, rows_with_pieces, width)
 
     tui_game = TUIGame(game)
 
     tui_game.play_game()
+    if save_record is not None:
+        tui_game.record.save(save_record)
 
 
 if __name__ == "__main__":
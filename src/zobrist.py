@@ -0,0 +1,116 @@
+"""
+This is a file that contains Zobrist hashing of checkers positions.
+
+Every (square, kind of piece) pair gets a random 64-bit key, and the hash
+of a position is the XOR of the keys of all its pieces (and of a key for
+the second player being the one to move). A move changes only a few
+squares, so the hash can be updated in a few XORs instead of rescanning
+the board.
+
+The keys of a board size are generated from a fixed seed, so every process
+and every run gets the same hash for the same position. Every hash also
+includes a key of the board size itself, so tables that are shared between
+board sizes (like the cache in persistent_cache.py) do not mix them up.
+"""
+
+import random
+
+
+class ZobristKeys:
+    """
+    This class stores the random keys for one board size.
+
+    Public Attributes:
+        - number_of_rows (int) - number of rows of the board
+        - number_of_cols (int) - number of columns of the board
+        - pieces (list[list[int]]) - keys for every square and kind of piece.
+                    The kind is 2 * index of the player + 1 if it is a king.
+        - side (int) - key that is added when the second player is to move
+        - geometry (int) - key that is added to every hash of the board size
+    """
+
+    def __init__(self, number_of_rows, number_of_cols):
+        self.number_of_rows = number_of_rows
+        self.number_of_cols = number_of_cols
+        generator = random.Random(f"zobrist-{number_of_rows}x{number_of_cols}")
+        self.pieces = []
+        for square in range(number_of_rows * number_of_cols):
+            self.pieces.append([generator.getrandbits(64) for kind in range(4)])
+        self.side = generator.getrandbits(64)
+        self.geometry = generator.getrandbits(64)
+
+    def piece_key(self, position, player_index, is_king):
+        """
+        Input:
+            position (tuple(int, int)) - position of the piece as (row, col)
+            player_index (int) - index of the owner of the piece in game.players
+            is_king (bool) - whether the piece is a king
+        Output:
+            (int) - the key of the piece on that square
+        """
+        square = position[0] * self.number_of_cols + position[1]
+        return self.pieces[square][2 * player_index + (1 if is_king else 0)]
+
+
+_keys_by_size = {}
+
+
+def get_keys(number_of_rows, number_of_cols):
+    """
+    Input:
+        number_of_rows (int) - number of rows of the board
+        number_of_cols (int) - number of columns of the board
+    Output:
+        (ZobristKeys) - the keys of the board size, created once per process
+    """
+    size = (number_of_rows, number_of_cols)
+    if size not in _keys_by_size:
+        _keys_by_size[size] = ZobristKeys(number_of_rows, number_of_cols)
+    return _keys_by_size[size]
+
+
+def hash_game(game, player):
+    """
+    Computes the hash of a position from scratch.
+
+    Input:
+        game (Game) - the game in the position to hash
+        player (Player) - the player to move
+    Output:
+        (int) - 64-bit hash of the position
+    """
+    keys = get_keys(game.board.number_of_rows, game.board.number_of_cols)
+    result = keys.geometry
+    if game.players.index(player) % 2 == 1:
+        result ^= keys.side
+    for index, owner in enumerate(game.players):
+        for piece in game.pieces_dict[owner]:
+            result ^= keys.piece_key(piece.position, index % 2, piece.is_king)
+    return result
+
+
+def update_hash(position_hash, keys, game, piece, initial_pos, was_king, captured):
+    """
+    Updates a hash after a move was made with Game.make_move
+
+    Input:
+        position_hash (int) - hash of the position before the move
+        keys (ZobristKeys) - keys of the board size
+        game (Game) - the game, after the move was made
+        piece (GamePiece) - the piece that was moved
+        initial_pos (tuple(int, int)) - position of the piece before the move
+        was_king (bool) - whether the piece was a king before the move
+        captured (list[GamePiece]) - pieces captured by the move
+    Output:
+        (int) - hash of the position after the move, with the other player to move
+    """
+    players = game.players
+    index = players.index(piece.player) % 2
+    position_hash ^= keys.side
+    position_hash ^= keys.piece_key(initial_pos, index, was_king)
+    position_hash ^= keys.piece_key(piece.position, index, piece.is_king)
+    for captured_piece in captured:
+        position_hash ^= keys.piece_key(captured_piece.position,
+                                        players.index(captured_piece.player) % 2,
+                                        captured_piece.is_king)
+    return position_hash